@@ -0,0 +1,136 @@
+"""
+All served datasets in one read-optimized SQLite file.
+
+autoschema --bundle copies every table of the manifest into 'db/bundle.db',
+e.g. 'physics/units/prefixes' as table 'physics__units__prefixes', with its
+indexes, ANALYZE statistics and a 'catalog' table of the manifest entries and
+schemas. The file is vacuumed with a larger page size. The API serves the
+datasets from it instead of the per-dataset files (DB_BUNDLE), and other
+tools can ATTACH it read-only.
+"""
+import json
+import re
+import sqlite3
+from contextlib import closing
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional
+
+BUNDLE_FILE = Path("bundle.db")
+CATALOG_TABLE = "catalog"
+PAGE_SIZE = 16384  # fewer, larger pages for full-table reads; SQLite's default is 4096
+CATALOG_FIELDS = ("dataset", "table_name", "source_db", "source_table", "data_hash", "schema_hash",
+                  "row_count", "private", "fields", "schema", "built")
+
+
+def bundle_table(dataset: str) -> str:
+    """Table name of a dataset in the bundle, e.g. 'utilities__countries__joined'."""
+    return re.sub(r"\W", "_", dataset.replace("/", "__"))
+
+
+def _connect_ro(path: Path) -> sqlite3.Connection:
+    return sqlite3.connect(path.resolve().as_uri() + "?mode=ro", uri=True)
+
+
+def attach(conn: sqlite3.Connection, path: Path, alias: str = "bundle"):
+    """Attach the bundle read-only to a connection opened with uri=True, e.g. 'SELECT * FROM bundle.catalog'."""
+    conn.execute(f"ATTACH DATABASE ? AS {alias}", (path.resolve().as_uri() + "?mode=ro",))
+
+
+def read_catalog(path: Path) -> List[Dict]:
+    """
+    The bundle's datasets as manifest entries whose 'db_path' is the bundle,
+    so DatasetCatalog serves them like the per-dataset files.
+    """
+    with closing(_connect_ro(path)) as conn:
+        rows = conn.execute(f"SELECT {', '.join(CATALOG_FIELDS)} FROM {CATALOG_TABLE} ORDER BY dataset").fetchall()
+    entries = []
+    for row in rows:
+        record = dict(zip(CATALOG_FIELDS, row))
+        entries.append({
+            "dataset": record["dataset"],
+            "table": record["table_name"],
+            "db_path": str(path),
+            "data_hash": record["data_hash"],
+            "schema_hash": record["schema_hash"],
+            "row_count": record["row_count"],
+            "private": bool(record["private"]),
+            "fields": json.loads(record["fields"]) if record["fields"] else None,
+            "built": record["built"],  # a rebuilt bundle is a new file, so its datasets are reopened
+        })
+    return entries
+
+
+def _copy_indexes(conn: sqlite3.Connection, source_table: str, table: str):
+    """Recreate the source table's explicit indexes on the bundle table."""
+    for _, name, unique, origin, _ in conn.execute(f"PRAGMA source.index_list({source_table})").fetchall():
+        if origin != "c":  # primary key and UNIQUE constraints come with the CREATE TABLE
+            continue
+        columns = [row[2] for row in conn.execute(f"PRAGMA source.index_info({name})")]
+        conn.execute(f'CREATE {"UNIQUE " if unique else ""}INDEX "idx_{table}_{"_".join(columns)}" '
+                     f'ON "{table}" ({", ".join(columns)})')
+
+
+def build_bundle(path: Path, db_dir: Path, entries: List[Dict], schemas: Dict[str, Optional[Dict]],
+                 page_size: int = PAGE_SIZE) -> Path:
+    """
+    Build the bundle from the per-dataset databases and replace `path` atomically.
+
+    :param entries: Manifest entries of the datasets to include.
+    :param schemas: Schema per dataset name, stored in the catalog (None for joined views).
+    """
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.unlink(missing_ok=True)
+    built = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    conn = sqlite3.connect(tmp_path, isolation_level=None)
+    try:
+        conn.execute(f"PRAGMA page_size = {int(page_size)}")
+        conn.execute("PRAGMA journal_mode = OFF")  # a failed build is discarded as a whole
+        conn.execute(f"CREATE TABLE {CATALOG_TABLE} (dataset TEXT PRIMARY KEY, table_name TEXT, source_db TEXT, "
+                     "source_table TEXT, data_hash TEXT, schema_hash TEXT, row_count INTEGER, private BOOLEAN, "
+                     "fields JSON, schema JSON, built TEXT)")
+        for entry in entries:
+            table = bundle_table(entry["dataset"])
+            conn.execute("ATTACH DATABASE ? AS source", (str(db_dir / entry["db_path"]),))
+            try:
+                conn.execute("BEGIN")
+                sql = conn.execute("SELECT sql FROM source.sqlite_master WHERE type = 'table' AND name = ?",
+                                   (entry["table"],)).fetchone()[0]
+                conn.execute(f'CREATE TABLE "{table}" {sql[sql.index("("):]}')
+                conn.execute(f'INSERT INTO "{table}" SELECT * FROM source.{entry["table"]}')
+                _copy_indexes(conn, entry["table"], table)
+                schema = schemas.get(entry["dataset"])
+                conn.execute(f"INSERT INTO {CATALOG_TABLE} VALUES ({', '.join('?' * len(CATALOG_FIELDS))})", (
+                    entry["dataset"], table, entry["db_path"], entry["table"], entry.get("data_hash"),
+                    entry.get("schema_hash"), entry.get("row_count"), bool(entry.get("private")),
+                    json.dumps(entry["fields"], ensure_ascii=False) if entry.get("fields") else None,
+                    json.dumps(schema, ensure_ascii=False) if schema else None, built,
+                ))
+                conn.execute("COMMIT")
+            except Exception:
+                if conn.in_transaction:
+                    conn.execute("ROLLBACK")
+                raise
+            finally:
+                conn.execute("DETACH DATABASE source")
+        # Statistics for the query planner, then one compact file with the new page size
+        conn.execute("ANALYZE")
+        conn.execute("VACUUM")
+        conn.close()
+        tmp_path.replace(path)
+    finally:
+        conn.close()
+        tmp_path.unlink(missing_ok=True)
+    return path
+
+
+def bundled_versions(path: Path) -> Optional[Dict[str, tuple]]:
+    """Hashes and row count per dataset in an existing bundle, to skip unchanged rebuilds."""
+    if not path.exists():
+        return None
+    try:
+        with closing(_connect_ro(path)) as conn:
+            rows = conn.execute(f"SELECT dataset, data_hash, schema_hash, row_count FROM {CATALOG_TABLE}").fetchall()
+    except sqlite3.Error:
+        return None
+    return {row[0]: tuple(row[1:]) for row in rows}
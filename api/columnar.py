@@ -0,0 +1,309 @@
+"""
+Columnar copies of dataset tables for bulk readers.
+
+autoschema writes one next to each database (e.g. 'db/physics/units/prefixes.npz'
+beside 'prefixes.db') and the API serves it as a file. Array fields become
+typed fixed-shape columns: a VEC [3] field is a float64 array of shape (rows, 3).
+"""
+import os
+import sqlite3
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Suffix and media type per format; arrow and parquet need pyarrow
+FORMATS = {
+    "npz": (".npz", "application/octet-stream"),
+    "arrow": (".arrow", "application/vnd.apache.arrow.file"),
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+ARRAY_TYPES = ("VEC", "MATRIX", "TENSOR", "QUATERNION")
+NULL_SUFFIX = ".null"  # boolean mask '<field>.null' for non-float columns with NULLs
+OFFSETS_SUFFIX = ".offsets"  # '<field>.offsets' for array fields whose cells differ in size
+MAX_BINS = 1000  # histogram bins per request, each bin costs an edge and a count
+
+
+def columnar_path(db_path: Path, fmt: str) -> Path:
+    return db_path.with_suffix(FORMATS[fmt][0])
+
+
+def _shape(field: Dict) -> List[int]:
+    params = field.get("type_params") or []
+    return list(params) or ([4] if field["type"] == "QUATERNION" else [])
+
+
+def _column(field: Dict, values: list) -> Dict[str, np.ndarray]:
+    """One field as arrays: the values, plus a NULL mask or offsets where needed."""
+    name, field_type = field["name"], field["type"]
+    nulls = np.array([v is None for v in values], dtype=bool)
+    columns = {}
+
+    if field_type in ARRAY_TYPES:
+        cells = [np.frombuffer(v, dtype=np.float64) if isinstance(v, bytes) else None for v in values]
+        shape = _shape(field)
+        sizes = {c.size for c in cells if c is not None}
+        if not shape and len(sizes) == 1:
+            shape = list(sizes)  # no shape declared, but all cells have the same size
+        size = int(np.prod(shape)) if shape else 0
+        if size and all(c is None or c.size == size for c in cells):
+            array = np.full((len(cells), size), np.nan)
+            for i, cell in enumerate(cells):
+                if cell is not None:
+                    array[i] = cell
+            columns[name] = array.reshape([len(cells)] + shape)
+        else:
+            # No fixed shape: all numbers in one array and where each row starts
+            sizes = [0 if c is None else c.size for c in cells]
+            columns[name] = np.concatenate([c for c in cells if c is not None] or [np.empty(0)])
+            columns[name + OFFSETS_SUFFIX] = np.concatenate([[0], np.cumsum(sizes)]).astype(np.int64)
+        nulls |= np.array([c is None for c in cells], dtype=bool)
+    elif field_type == "REAL":
+        columns[name] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        return columns  # NULL is NaN
+    elif field_type in ("INT", "INTEGER"):
+        columns[name] = np.array([0 if v is None else v for v in values], dtype=np.int64)
+    elif field_type == "BOOLEAN":
+        columns[name] = np.array([bool(v) for v in values], dtype=bool)
+    else:
+        columns[name] = np.array(["" if v is None else str(v) for v in values], dtype=str)
+
+    if nulls.any():
+        columns[name + NULL_SUFFIX] = nulls
+    return columns
+
+
+def read_columns(db_path: Path, schema: Dict) -> Dict[str, np.ndarray]:
+    """
+    The schema's table as typed NumPy arrays, in schema field order.
+
+    NULLs are NaN in REAL and array columns; other columns with NULLs get a
+    '<field>.null' mask. TEXT and JSON columns are unicode arrays.
+    """
+    uri = db_path.resolve().as_uri() + "?mode=ro"
+    with sqlite3.connect(uri, uri=True) as conn:
+        return table_columns(conn, schema["table"], schema["fields"])
+
+
+def table_columns(conn: sqlite3.Connection, table: str, fields: Optional[List[Dict]] = None) -> Dict[str, np.ndarray]:
+    """Like read_columns on an open connection; without fields, the declared column types are used."""
+    if fields is None:
+        fields = [{"name": row[1], "type": row[2].upper()} for row in conn.execute(f"PRAGMA table_info({table})")]
+    rows = conn.execute(f"SELECT {', '.join(f['name'] for f in fields)} FROM {table} ORDER BY rowid").fetchall()
+    columns = {}
+    for field, values in zip(fields, zip(*rows) if rows else [()] * len(fields)):
+        columns.update(_column(field, list(values)))
+    return columns
+
+
+def _write_arrow(path: Path, columns: Dict[str, np.ndarray], fmt: str):
+    """Arrow IPC file (memory-mappable) or Parquet; fixed-shape arrays become tensor columns."""
+    import pyarrow as pa  # optional dependency
+
+    arrays = {}
+    for name, values in columns.items():
+        if name.endswith((NULL_SUFFIX, OFFSETS_SUFFIX)):
+            continue
+        offsets = columns.get(name + OFFSETS_SUFFIX)
+        if offsets is not None:
+            arrays[name] = pa.LargeListArray.from_arrays(pa.array(offsets), pa.array(values))
+        elif values.ndim > 1:
+            arrays[name] = pa.FixedShapeTensorArray.from_numpy_ndarray(np.ascontiguousarray(values))
+        else:
+            arrays[name] = pa.array(values, mask=columns.get(name + NULL_SUFFIX))
+    table = pa.table(arrays)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        pq.write_table(table, path)
+    else:
+        with pa.OSFile(str(path), "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def write_columnar(db_path: Path, schema: Dict, fmt: str = "npz") -> Path:
+    """
+    Write the table next to its database, replacing the previous file atomically
+    so the server never sends a partial one. npz members are stored
+    uncompressed, so they can be mapped from their offsets in the file.
+    """
+    target = columnar_path(db_path, fmt)
+    tmp_path = target.with_name(target.name + ".tmp")
+    columns = read_columns(db_path, schema)
+    try:
+        if fmt == "npz":
+            with open(tmp_path, "wb") as f:
+                np.savez(f, **columns)
+        else:
+            _write_arrow(tmp_path, columns, fmt)
+        os.replace(tmp_path, target)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+    return target
+
+
+def load_npz(path: Path) -> Dict[str, np.ndarray]:
+    with np.load(path) as npz:
+        return {name: npz[name] for name in npz.files}
+
+
+def _plain(values: np.ndarray) -> Any:
+    """Array as JSON-ready lists; NaN (no values) becomes None."""
+    if values.dtype.kind == "f":
+        return np.where(np.isnan(values), None, values).tolist()
+    return values.tolist()
+
+
+class ColumnStore:
+    """
+    One dataset snapshot as NumPy arrays per column, for vectorized aggregates.
+
+    Array fields are stacked into one ndarray of shape (rows, *shape), so their
+    statistics are element-wise. NULLs count as missing values.
+    """
+    OPERATIONS = ("count", "sum", "min", "max", "mean", "std")
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+        self.fields = [name for name in columns if not name.endswith((NULL_SUFFIX, OFFSETS_SUFFIX))]
+        self.row_count = len(columns[self.fields[0]]) if self.fields else 0
+        self._groups: Dict[str, tuple] = {}  # group index per field, for queries without filters
+
+    def _field(self, name: str) -> np.ndarray:
+        if name not in self.fields:
+            raise ValueError(f"Unknown field: {name}")
+        if name + OFFSETS_SUFFIX in self.columns:
+            raise ValueError(f"Field without a fixed shape: {name}")
+        return self.columns[name]
+
+    def numbers(self, name: str) -> np.ndarray:
+        """A numeric column as float64 with NaN for NULLs."""
+        values = self._field(name)
+        if values.dtype.kind not in "biuf":
+            raise ValueError(f"Field is not numeric: {name}")
+        nulls = self.columns.get(name + NULL_SUFFIX)
+        if nulls is None or values.dtype.kind == "f":
+            return values.astype(np.float64, copy=False)  # NULLs are NaN already
+        values = values.astype(np.float64)
+        values[nulls] = np.nan
+        return values
+
+    def select(self, filters: Optional[Dict[str, Any]] = None) -> np.ndarray:
+        """Row mask for field → value (or list of accepted values) filters."""
+        selected = np.ones(self.row_count, dtype=bool)
+        for name, value in (filters or {}).items():
+            values = self._field(name)
+            if values.ndim > 1:
+                raise ValueError(f"Cannot filter by array field: {name}")
+            accepted = value if isinstance(value, list) else [value]
+            nulls = self._nulls(name, values)
+            matched = np.isin(values, [v for v in accepted if v is not None]) & ~nulls
+            selected &= (matched | nulls) if None in accepted else matched
+        return selected
+
+    def _nulls(self, name: str, values: np.ndarray) -> np.ndarray:
+        """NULL rows of a scalar field: NaN in float columns, else the '<field>.null' mask."""
+        if values.dtype.kind == "f":
+            return np.isnan(values)
+        nulls = self.columns.get(name + NULL_SUFFIX)
+        return nulls if nulls is not None else np.zeros(len(values), dtype=bool)
+
+    @staticmethod
+    def _reduce(values: np.ndarray, starts: np.ndarray, operations: Sequence[str]) -> Dict[str, np.ndarray]:
+        """The operations over the row groups starting at `starts` in values sorted by group."""
+        valid = ~np.isnan(values)
+        count = np.add.reduceat(valid, starts, axis=0)
+        results = {"count": count}
+        for operation, fill, ufunc in (("min", np.inf, np.minimum), ("max", -np.inf, np.maximum)):
+            if operation in operations:
+                result = ufunc.reduceat(np.where(valid, values, fill), starts, axis=0)
+                results[operation] = np.where(count > 0, result, np.nan)
+        if {"sum", "mean", "std"} & set(operations):
+            filled = np.where(valid, values, 0.0)
+            results["sum"] = np.add.reduceat(filled, starts, axis=0)
+            with np.errstate(invalid="ignore", divide="ignore"):
+                results["mean"] = mean = results["sum"] / count
+                if "std" in operations:
+                    # Two passes: squared deviations from each group's mean, not E[x²] - E[x]²
+                    np.subtract(filled, np.repeat(mean, np.diff(np.append(starts, len(values))), axis=0),
+                                out=filled, where=valid)
+                    results["std"] = np.sqrt(np.add.reduceat(filled * filled, starts, axis=0) / count)
+        return {operation: results[operation] for operation in operations}
+
+    def aggregate(self, fields: Sequence[str], operations: Sequence[str] = ("count", "min", "max", "mean"),
+                  group_by: Optional[str] = None, filters: Optional[Dict[str, Any]] = None) -> Dict:
+        """
+        Statistics of numeric fields over the filtered rows, optionally per value of `group_by`.
+
+        :return: {'rows': n, 'aggregates': {field: {operation: value}}}, or with
+                 `group_by` {'groups': [{'key': ..., 'rows': n, 'aggregates': ...}]}.
+                 Raises ValueError for unknown fields or operations.
+        """
+        unknown = [operation for operation in operations if operation not in self.OPERATIONS]
+        if unknown:
+            raise ValueError(f"Unknown operations: {', '.join(unknown)}")
+        selected = self.select(filters) if filters else None
+        numbers = {name: self.numbers(name) for name in fields}
+
+        if group_by is None:
+            keys, order, starts = None, None, np.zeros(1, dtype=np.intp)
+            sizes = np.array([self.row_count if selected is None else np.count_nonzero(selected)])
+        else:
+            keys, order, starts, sizes = self._group_index(group_by, selected)
+
+        results = [{} for _ in range(len(sizes))]
+        if sizes.sum():
+            for name, values in numbers.items():
+                if selected is not None:
+                    values = values[selected]
+                if order is not None:
+                    values = values[order]
+                reduced = self._reduce(values, starts, operations)
+                for i, result in enumerate(results):
+                    result[name] = {operation: _plain(value[i]) for operation, value in reduced.items()}
+        else:
+            results = [{name: {operation: 0 if operation == "count" else None for operation in operations}
+                        for name in fields}]
+
+        if keys is None:
+            return {"rows": int(sizes[0]), "aggregates": results[0]}
+        return {"groups": [{"key": key, "rows": int(size), "aggregates": result}
+                           for key, size, result in zip(keys, sizes.tolist(), results)]}
+
+    def _group_index(self, name: str, selected: Optional[np.ndarray]) -> tuple:
+        """
+        Distinct values of the selected rows, the row order sorted by them, and
+        group starts and sizes. NULL rows form one last group with the key None.
+        """
+        if selected is None and name in self._groups:
+            return self._groups[name]
+        groups = self._field(name)
+        if groups.ndim > 1:
+            raise ValueError(f"Cannot group by array field: {name}")
+        nulls = self._nulls(name, groups)
+        if selected is not None:
+            groups, nulls = groups[selected], nulls[selected]
+        keys, inverse, sizes = np.unique(groups[~nulls], return_inverse=True, return_counts=True)
+        keys = keys.tolist()
+        codes = np.full(len(groups), len(keys), dtype=np.intp)
+        codes[~nulls] = inverse.reshape(-1)
+        if nulls.any():
+            keys.append(None)
+            sizes = np.append(sizes, np.count_nonzero(nulls))
+        order = np.argsort(codes, kind="stable")
+        starts = np.concatenate([[0], np.cumsum(sizes)[:-1]]).astype(np.intp)
+        if selected is None:
+            self._groups[name] = (keys, order, starts, sizes)
+        return keys, order, starts, sizes
+
+    def histogram(self, field: str, bins: int = 10, value_range: Optional[Sequence[float]] = None,
+                  filters: Optional[Dict[str, Any]] = None) -> Dict:
+        """Counts per bin of a numeric field; array fields are counted over all their elements."""
+        if not 1 <= bins <= MAX_BINS:
+            raise ValueError(f"bins must be between 1 and {MAX_BINS}")
+        values = self.numbers(field)
+        if filters:
+            values = values[self.select(filters)]
+        values = values.reshape(-1)
+        values = values[~np.isnan(values)]
+        counts, edges = np.histogram(values, bins=bins, range=tuple(value_range) if value_range else None)
+        return {"rows": int(values.size), "edges": edges.tolist(), "counts": counts.tolist()}
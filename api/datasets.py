@@ -0,0 +1,339 @@
+"""Route manifest and the served dataset snapshots built from it."""
+import json
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+from api.bundle import read_catalog
+from api.columnar import ColumnStore, load_npz, table_columns
+from api.metrics import stage_timers
+from api.snapshot import SNAPSHOT_META, Snapshot
+
+MANIFEST_FILE = Path("manifest.json")
+MANIFEST_VERSION = 1
+POOL_SIZE = 8
+
+
+def write_manifest(db_dir: Path, datasets: List[Dict]):
+    """Write the manifest atomically, so a running server never reads a partial file."""
+    manifest_path = db_dir / MANIFEST_FILE
+    tmp_path = manifest_path.with_suffix(".json.tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "datasets": datasets}, f, ensure_ascii=False, indent=2)
+    tmp_path.replace(manifest_path)
+
+
+def read_manifest(db_dir: Path) -> List[Dict]:
+    """
+    Datasets listed in the manifest whose database exists.
+
+    Entries hold the dataset name (also the route), the table, the database
+    path relative to `db_dir`, the schema path, data/schema hashes and the row count.
+    """
+    manifest_path = db_dir / MANIFEST_FILE
+    try:
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        logging.warning(f"Route manifest not found: {manifest_path} (run scripts/autoschema.py)")
+        return []
+    except json.JSONDecodeError as e:
+        logging.error(f"Invalid route manifest {manifest_path}: {e}")
+        return []
+
+    datasets = []
+    for entry in manifest.get("datasets", []):
+        if not (db_dir / entry["db_path"]).exists():
+            logging.warning(f"Database for dataset {entry['dataset']} not found: {entry['db_path']}")
+            continue
+        datasets.append(entry)
+    return datasets
+
+
+def deserialize(value):
+    """Deserialize BLOBs to Python-object"""
+    if isinstance(value, bytes):
+        try:
+            return np.frombuffer(value, dtype=np.float64).tolist()
+        except Exception:
+            return "<BLOB>"
+    return value
+
+
+class ConnectionPool:
+    """Read-only SQLite connections for one database, reused across request threads."""
+
+    def __init__(self, db_path: Path, size: int = POOL_SIZE):
+        self.db_path = db_path
+        self._idle = queue.LifoQueue(maxsize=size)
+        self._lock = threading.Lock()
+        self.closed = False
+        self.in_use = 0
+
+    @property
+    def idle(self) -> int:
+        return self._idle.qsize()
+
+    def _connect(self) -> sqlite3.Connection:
+        uri = self.db_path.resolve().as_uri() + "?mode=ro"
+        return sqlite3.connect(uri, uri=True, detect_types=sqlite3.PARSE_DECLTYPES, check_same_thread=False)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            conn = self._connect()
+        with self._lock:
+            self.in_use += 1
+        try:
+            yield conn
+        finally:
+            with self._lock:
+                self.in_use -= 1
+                if self.closed:
+                    conn.close()
+                else:
+                    try:
+                        self._idle.put_nowait(conn)
+                    except queue.Full:
+                        conn.close()
+
+    def close(self):
+        """Close idle connections; connections still in use are closed when returned."""
+        with self._lock:
+            self.closed = True
+            while not self._idle.empty():
+                self._idle.get_nowait().close()
+
+
+class Dataset:
+    """
+    Snapshot of one served dataset: its manifest entry, connection pool and row cache.
+
+    A reload replaces the whole object, so a request holding a reference
+    keeps reading from the snapshot it started with.
+    """
+
+    def __init__(self, db_dir: Path, entry: Dict):
+        self.entry = entry
+        self.name = entry["dataset"]
+        self.table = entry["table"]
+        self.pool = ConnectionPool(db_dir / entry["db_path"])
+        self.columnar_path = db_dir / entry["columnar_path"] if entry.get("columnar_path") else None
+        self.snapshot = self._open_snapshot(db_dir)
+        self._rows = None
+        self._columns = None
+        self._body = self.snapshot.body if self.snapshot is not None else None
+        self._key_field = None
+        self._by_key = None
+        self._lock = threading.Lock()
+        self.timers = stage_timers(self.name)
+
+    def _open_snapshot(self, db_dir: Path) -> Optional[Snapshot]:
+        """The mapped snapshot autoschema wrote for this manifest entry, unless missing or outdated."""
+        if not self.entry.get("snapshot_path"):
+            return None
+        try:
+            snapshot = Snapshot(db_dir / self.entry["snapshot_path"])
+        except (OSError, ValueError) as e:
+            logging.warning(f"Snapshot of {self.name} not usable: {e}")
+            return None
+        if any(snapshot.meta.get(name) != self.entry.get(name) for name in SNAPSHOT_META):
+            logging.warning(f"Snapshot of {self.name} does not match the manifest, reading the database")
+            return None
+        return snapshot
+
+    @staticmethod
+    def version(entry: Dict) -> Tuple:
+        return (entry.get("data_hash"), entry.get("schema_hash"), entry.get("row_count"),
+                entry.get("columnar_path"), entry.get("snapshot_path"), entry.get("built"))
+
+    @property
+    def cached(self) -> bool:
+        """True once rows() no longer touches the database."""
+        return self._rows is not None
+
+    def rows(self) -> List[Dict]:
+        """All rows, decoded once per snapshot."""
+        if self._rows is None:
+            with self._lock:
+                if self._rows is None and self.snapshot is not None:
+                    start = time.perf_counter()
+                    self._rows = self.snapshot.rows()
+                    self.timers["deserialize"].observe(time.perf_counter() - start)
+                elif self._rows is None:
+                    start = time.perf_counter()
+                    with self.pool.connection() as conn:
+                        connected = time.perf_counter()
+                        cursor = conn.execute(f"SELECT * FROM {self.table}")
+                        columns = [col[0] for col in cursor.description]
+                        fetched = cursor.fetchall()
+                    queried = time.perf_counter()
+                    self._rows = [{col: deserialize(val) for col, val in zip(columns, row)} for row in fetched]
+                    self.timers["connect"].observe(connected - start)
+                    self.timers["query"].observe(queried - connected)
+                    self.timers["deserialize"].observe(time.perf_counter() - queried)
+        return self._rows
+
+    @property
+    def columns_cached(self) -> bool:
+        return self._columns is not None
+
+    def column_store(self) -> ColumnStore:
+        """
+        The rows as NumPy arrays per column, loaded once per snapshot: mapped
+        from the snapshot file or the npz copy if autoschema wrote one, else
+        from the table. Array fields get their shape from the manifest's field list.
+        """
+        if self._columns is None:
+            with self._lock:
+                if self._columns is None:
+                    start = time.perf_counter()
+                    npz = self.columnar_path if self.columnar_path and self.columnar_path.suffix == ".npz" else None
+                    if self.snapshot is not None:
+                        columns = self.snapshot.columns()
+                    elif npz is not None and npz.exists():
+                        columns = load_npz(npz)
+                    else:
+                        with self.pool.connection() as conn:
+                            columns = table_columns(conn, self.table, self.entry.get("fields"))
+                    self.timers["query"].observe(time.perf_counter() - start)
+                    self._columns = ColumnStore(columns)
+        return self._columns
+
+    @property
+    def key_field(self) -> str:
+        """Primary key column, else the first column (e.g. 'symbol' or 'code')."""
+        if self._key_field is None and self.snapshot is not None:
+            self._key_field = self.snapshot.key_field
+        elif self._key_field is None:
+            with self.pool.connection() as conn:
+                columns = conn.execute(f"PRAGMA table_info({self.table})").fetchall()
+            primary = [column[1] for column in columns if column[5]]
+            self._key_field = primary[0] if primary else columns[0][1]
+        return self._key_field
+
+    def by_key(self) -> Dict[Any, Dict]:
+        """Rows by key field, built once per snapshot."""
+        if self._by_key is None:
+            self._by_key = {row.get(self.key_field): row for row in self.rows()}
+        return self._by_key
+
+    def query(self, filters: Optional[Dict[str, Any]] = None, fields: Optional[List[str]] = None,
+              keys: Optional[Iterable[Any]] = None) -> List[Dict]:
+        """
+        Rows of the cached snapshot, optionally looked up, filtered and projected.
+
+        :param filters: Field → value, or list of accepted values.
+        :param fields: Fields to return, default all.
+        :param keys: Key field values to look up (missing keys are skipped).
+        :return: Matching rows. Raises ValueError for unknown fields.
+        """
+        # Lookups in a mapped snapshot only decode the rows found
+        lookup = keys is not None and self.snapshot is not None and not self.cached
+        if lookup:
+            known, empty = set(self.snapshot.fields), self.snapshot.row_count == 0
+        else:
+            rows = self.rows()
+            known, empty = set(rows[0]) if rows else set(), not rows
+        unknown = [name for name in list(filters or {}) + list(fields or []) if not empty and name not in known]
+        if unknown:
+            raise ValueError(f"Unknown fields in {self.name}: {', '.join(unknown)}")
+
+        if lookup:
+            rows = self.snapshot.lookup(keys)
+        elif keys is not None:
+            by_key = self.by_key()
+            rows = [by_key[key] for key in keys if key in by_key]
+        for name, value in (filters or {}).items():
+            accepted = value if isinstance(value, list) else [value]
+            rows = [row for row in rows if row[name] in accepted]
+        if fields:
+            rows = [{name: row[name] for name in fields} for row in rows]
+        return rows
+
+    @property
+    def body(self) -> Optional[Union[bytes, memoryview]]:
+        """Serialized rows, once serialize() ran for this snapshot or mapped from the snapshot file."""
+        return self._body
+
+    def serialize(self) -> bytes:
+        """All rows as a JSON response body, encoded once per snapshot."""
+        if self._body is None:
+            rows = self.rows()
+            start = time.perf_counter()
+            self._body = json.dumps(rows, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+            self.timers["encode"].observe(time.perf_counter() - start)
+        return self._body
+
+    def close(self):
+        self.pool.close()
+
+
+class DatasetCatalog:
+    """
+    The datasets currently served, reloadable from the manifest without a restart.
+
+    `reload` builds new snapshots for added or changed datasets and swaps
+    the whole mapping in one assignment; unchanged datasets keep their
+    snapshot (and warm cache). With a `bundle` (api.bundle) the datasets are
+    read from its catalog and tables instead of the manifest.
+    """
+
+    def __init__(self, db_dir: Path, bundle: Optional[Path] = None):
+        self.db_dir = db_dir
+        self.bundle = bundle
+        self.datasets: Dict[str, Dataset] = {}
+        self.manifest_mtime = None
+        self._lock = threading.Lock()
+
+    def get(self, name: str) -> Optional[Dataset]:
+        return self.datasets.get(name)
+
+    def _mtime(self) -> Optional[int]:
+        try:
+            return (self.bundle or self.db_dir / MANIFEST_FILE).stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def manifest_changed(self) -> bool:
+        return self._mtime() != self.manifest_mtime
+
+    def _entries(self) -> List[Dict]:
+        if self.bundle is None:
+            return read_manifest(self.db_dir)
+        try:
+            return read_catalog(self.bundle)
+        except sqlite3.Error as e:
+            logging.error(f"Database bundle {self.bundle} not usable: {e} (run scripts/autoschema.py --bundle)")
+            return []
+
+    def reload(self) -> Dict[str, List[str]]:
+        """Swap in snapshots for changed datasets; returns the added, changed and removed names."""
+        with self._lock:
+            self.manifest_mtime = self._mtime()
+            current = self.datasets
+            datasets, changes = {}, {"added": [], "changed": [], "removed": []}
+            for entry in self._entries():
+                name = entry["dataset"]
+                old = current.get(name)
+                if old is not None and Dataset.version(old.entry) == Dataset.version(entry):
+                    datasets[name] = old
+                    continue
+                datasets[name] = Dataset(self.db_dir, entry)
+                changes["changed" if old is not None else "added"].append(name)
+            changes["removed"] = [name for name in current if name not in datasets]
+
+            self.datasets = datasets
+            for name, old in current.items():
+                if datasets.get(name) is not old:
+                    old.close()
+            return changes
@@ -0,0 +1,106 @@
+"""Bounded per-dataset executors for database work, with load shedding and coalescing."""
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_DEPTH = 32
+
+
+class Saturated(Exception):
+    """Raised when an executor already has as many pending calls as it accepts."""
+
+
+class BoundedExecutor:
+    """
+    Thread pool with a fixed number of workers and a bounded queue.
+
+    Calls beyond `workers + queue_depth` pending ones are rejected at once
+    with Saturated instead of waiting, so a burst on one dataset cannot
+    build up unbounded latency.
+    """
+
+    def __init__(self, name: str, workers: int = DEFAULT_WORKERS, queue_depth: int = DEFAULT_QUEUE_DEPTH):
+        self.name = name
+        self.workers = workers
+        self.limit = workers + queue_depth
+        self.pending = 0
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"db-{name}")
+        self._lock = threading.Lock()
+
+    async def run(self, fn: Callable, *args: Any) -> Any:
+        with self._lock:
+            if self.pending >= self.limit:
+                raise Saturated(f"Executor for {self.name} is saturated ({self.pending} pending)")
+            self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool, partial(fn, *args))
+        finally:
+            with self._lock:
+                self.pending -= 1
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+class ExecutorRegistry:
+    """
+    One BoundedExecutor per dataset, created on first use.
+
+    Limits come from the `server.executors` section of config.yaml: a
+    `default` entry and optional per-dataset entries, e.g.
+    `utilities/translations: {workers: 2, queue_depth: 8}`.
+    """
+
+    def __init__(self, config: Optional[Dict[str, Dict]] = None):
+        self.config = config or {}
+        self.executors: Dict[str, BoundedExecutor] = {}
+        self._lock = threading.Lock()
+
+    def get(self, dataset: str) -> BoundedExecutor:
+        executor = self.executors.get(dataset)
+        if executor is None:
+            with self._lock:
+                executor = self.executors.get(dataset)
+                if executor is None:
+                    limits = {**self.config.get("default", {}), **self.config.get(dataset, {})}
+                    executor = BoundedExecutor(
+                        dataset,
+                        workers=int(limits.get("workers", DEFAULT_WORKERS)),
+                        queue_depth=int(limits.get("queue_depth", DEFAULT_QUEUE_DEPTH)),
+                    )
+                    self.executors[dataset] = executor
+        return executor
+
+    async def run(self, dataset: str, fn: Callable, *args: Any) -> Any:
+        return await self.get(dataset).run(fn, *args)
+
+    def shutdown(self):
+        for executor in self.executors.values():
+            executor.shutdown()
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key: the first caller starts
+    the computation, later callers await the same result.
+
+    The key is forgotten as soon as the computation finishes, so results are
+    not cached here; the flight also completes if its first caller is cancelled.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable]) -> Any:
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(factory())
+            self._inflight[key] = future
+            future.add_done_callback(lambda _: self._inflight.pop(key, None))
+        return await asyncio.shield(future)
+
+    def __len__(self) -> int:
+        return len(self._inflight)
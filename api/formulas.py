@@ -0,0 +1,246 @@
+"""Formula evaluation: safe compilation to vectorized NumPy functions with unit checks."""
+import ast
+import json
+import sqlite3
+from fractions import Fraction
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from api.units import DIMENSION_SYMBOLS, UnitRegistry, format_dimension
+
+FORMULAS_DB = Path("physics") / "formulas.db"
+FORMULA_CACHE_SIZE = 256
+
+# Functions callable from formulas; all except abs/sqrt/cbrt need dimensionless arguments
+FUNCTIONS = {
+    "sin": np.sin, "cos": np.cos, "tan": np.tan,
+    "arcsin": np.arcsin, "arccos": np.arccos, "arctan": np.arctan,
+    "sinh": np.sinh, "cosh": np.cosh, "tanh": np.tanh,
+    "exp": np.exp, "log": np.log, "log10": np.log10, "log2": np.log2,
+    "sqrt": np.sqrt, "cbrt": np.cbrt, "abs": np.abs,
+}
+ROOT_FUNCTIONS = {"sqrt": 2, "cbrt": 3}
+CONSTANTS = {"pi": np.pi, "e": np.e}
+
+OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.Pow, ast.USub, ast.UAdd)
+ALLOWED_NODES = (ast.Expression, ast.BinOp, ast.UnaryOp, ast.Call, ast.Name, ast.Load, ast.Constant) + OPERATORS
+
+
+def _parse(expression: str, variables: Tuple[str, ...]) -> ast.Expression:
+    """Parse an expression and reject everything except arithmetic on known names."""
+    try:
+        tree = ast.parse(expression.replace("^", "**"), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid formula expression '{expression}': {e.msg}")
+
+    for node in ast.walk(tree):
+        if not isinstance(node, ALLOWED_NODES):
+            raise ValueError(f"Unsupported syntax in formula '{expression}': {type(node).__name__}")
+        if isinstance(node, ast.Constant) and (isinstance(node.value, bool) or not isinstance(node.value, (int, float))):
+            raise ValueError(f"Unsupported constant in formula '{expression}': {node.value!r}")
+        if isinstance(node, ast.Call):
+            if not isinstance(node.func, ast.Name) or node.func.id not in FUNCTIONS or node.keywords or len(node.args) != 1:
+                raise ValueError(f"Unsupported function call in formula '{expression}'")
+        if isinstance(node, ast.Name) and node.id not in variables and node.id not in FUNCTIONS and node.id not in CONSTANTS:
+            raise ValueError(f"Unknown variable in formula '{expression}': {node.id}")
+    return tree
+
+
+@lru_cache(maxsize=FORMULA_CACHE_SIZE)
+def compile_formula(expression: str, variables: Tuple[str, ...]) -> Callable[[Dict[str, np.ndarray]], np.ndarray]:
+    """
+    Compile a formula once into a vectorized function of its variables.
+
+    Only arithmetic, the whitelisted NumPy FUNCTIONS and CONSTANTS are
+    allowed, and no builtins are reachable. Results are cached (bounded LRU).
+
+    :param expression: Python-style expression, e.g. "0.5 * m * v**2" ('^' means power).
+    :param variables: The variable names the formula may reference.
+    :return: A function taking a dict of NumPy arrays (broadcast element-wise).
+    """
+    tree = _parse(expression, variables)
+    code = compile(tree, "<formula>", "eval")
+    namespace = {"__builtins__": {}, **FUNCTIONS, **CONSTANTS}
+
+    def evaluate(arrays: Dict[str, np.ndarray]) -> np.ndarray:
+        with np.errstate(all="ignore"):
+            return eval(code, namespace, dict(arrays))
+
+    return evaluate
+
+
+def _constant(node: ast.AST) -> Optional[Fraction]:
+    """Value of a constant exponent like 2, -1 or 1/3, None if not constant."""
+    if isinstance(node, ast.Constant):
+        return Fraction(node.value).limit_denominator(1000)
+    if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+        value = _constant(node.operand)
+        return None if value is None else (-value if isinstance(node.op, ast.USub) else value)
+    if isinstance(node, ast.BinOp) and isinstance(node.op, ast.Div):
+        numerator, denominator = _constant(node.left), _constant(node.right)
+        if numerator is not None and denominator:
+            return numerator / denominator
+    return None
+
+
+def _scaled(vector: Tuple[int, ...], factor: Fraction, expression: str) -> Tuple[int, ...]:
+    result = [exponent * factor for exponent in vector]
+    if any(value.denominator != 1 for value in result):
+        raise ValueError(f"Non-integral dimension in formula '{expression}'")
+    return tuple(int(value) for value in result)
+
+
+def formula_dimension(expression: str, dimensions: Dict[str, Tuple[int, ...]]) -> Tuple[int, ...]:
+    """
+    Dimension vector of a formula's result, given its variables' dimensions.
+
+    Raises ValueError when the formula adds incompatible quantities or applies
+    a transcendental function to a dimensioned argument.
+    """
+    none = (0,) * len(DIMENSION_SYMBOLS)
+    tree = _parse(expression, tuple(dimensions))
+
+    def visit(node: ast.AST) -> Tuple[int, ...]:
+        if isinstance(node, ast.Constant):
+            return none
+        if isinstance(node, ast.Name):
+            return dimensions.get(node.id, none)
+        if isinstance(node, ast.UnaryOp):
+            return visit(node.operand)
+        if isinstance(node, ast.Call):
+            name = node.func.id
+            argument = visit(node.args[0])
+            if name in ROOT_FUNCTIONS:
+                return _scaled(argument, Fraction(1, ROOT_FUNCTIONS[name]), expression)
+            if name == "abs":
+                return argument
+            if argument != none:
+                raise ValueError(f"Function '{name}' needs a dimensionless argument in '{expression}'")
+            return none
+
+        left, right = visit(node.left), visit(node.right)
+        if isinstance(node.op, (ast.Add, ast.Sub)):
+            if left != right:
+                raise ValueError(
+                    f"Cannot add {format_dimension(left)} and {format_dimension(right)} in '{expression}'"
+                )
+            return left
+        if isinstance(node.op, ast.Mult):
+            return tuple(a + b for a, b in zip(left, right))
+        if isinstance(node.op, ast.Div):
+            return tuple(a - b for a, b in zip(left, right))
+        # Power: exponents of dimensioned bases must be constant
+        if right != none:
+            raise ValueError(f"Exponent must be dimensionless in '{expression}'")
+        if left == none:
+            return none
+        exponent = _constant(node.right)
+        if exponent is None:
+            raise ValueError(f"Dimensioned base needs a constant exponent in '{expression}'")
+        return _scaled(left, exponent, expression)
+
+    return visit(tree.body)
+
+
+def check_formula(formula: Dict, registry: UnitRegistry):
+    """
+    Validate a formula entry against the SI unit data.
+
+    Variable and result units must be coherent SI units (factor 1), so the
+    compiled expression needs no scale factors, and the dimension of the
+    expression must match the result unit.
+    """
+    variables = formula.get("variables") or {}
+    if not isinstance(variables, dict):
+        raise ValueError(f"Formula '{formula.get('key')}' needs a mapping of variables to units")
+
+    dimensions = {}
+    for name, unit in list(variables.items()) + [("result", formula.get("result_unit", ""))]:
+        parsed = registry.parse_expression(str(unit))
+        if parsed.factor != 1:
+            raise ValueError(f"Unit '{unit}' of '{name}' in formula '{formula.get('key')}' is not a coherent SI unit")
+        dimensions[name] = parsed.dimension
+
+    result = dimensions.pop("result")
+    compile_formula(formula["expression"], tuple(variables))
+    actual = formula_dimension(formula["expression"], dimensions)
+    if actual != result:
+        raise ValueError(
+            f"Formula '{formula.get('key')}' has dimension {format_dimension(actual)}, "
+            f"but result unit '{formula.get('result_unit')}' is {format_dimension(result)}"
+        )
+
+
+class FormulaService:
+    """Formulas by key with unit-checked batch evaluation."""
+
+    def __init__(self, formulas: List[Dict], registry: UnitRegistry):
+        self.formulas = {formula["key"]: formula for formula in formulas}
+        self.registry = registry
+
+    def _scale(self, given: str, declared: str) -> float:
+        """Factor converting values in unit `given` to unit `declared`."""
+        source = self.registry.parse_expression(given)
+        target = self.registry.parse_expression(declared)
+        if source.dimension != target.dimension:
+            raise ValueError(f"Unit '{given}' is not compatible with '{declared}'")
+        return float(source.factor / target.factor)
+
+    def evaluate(self, key: str, inputs: Dict[str, Any], units: Optional[Dict[str, str]] = None,
+                 result_unit: Optional[str] = None) -> Dict:
+        """
+        Evaluate a formula over scalars or arrays of inputs.
+
+        Units are checked and converted once per variable, not per element.
+
+        :param key: The formula key.
+        :param inputs: Values per variable; arrays are broadcast with NumPy rules.
+        :param units: Optional units per variable, defaulting to the declared units.
+        :param result_unit: Optional unit to convert the result to.
+        :return: Dict with the result values and their unit.
+
+        Raises ValueError for non-numeric inputs and non-finite results
+        (e.g. division by zero), which JSON cannot encode.
+        """
+        formula = self.formulas[key]
+        variables = formula["variables"]
+        units = units or {}
+        missing = [name for name in variables if name not in inputs]
+        if missing:
+            raise ValueError(f"Missing inputs: {', '.join(missing)}")
+
+        arrays = {}
+        for name, declared in variables.items():
+            try:
+                values = np.asarray(inputs[name], dtype=np.float64)
+            except (TypeError, ValueError):
+                raise ValueError(f"Input '{name}' must be a number or a (nested) list of numbers")
+            given = units.get(name, declared)
+            if given != declared:
+                values = values * self._scale(given, declared)
+            arrays[name] = values
+
+        result = compile_formula(formula["expression"], tuple(variables))(arrays)  # ValueError if shapes do not broadcast
+        unit = formula["result_unit"]
+        if result_unit and result_unit != unit:
+            result = result * self._scale(unit, result_unit)
+            unit = result_unit
+        if not np.all(np.isfinite(result)):
+            raise ValueError(f"Result of '{key}' is not finite (division by zero or overflow)")
+        return {"key": key, "result": np.asarray(result).tolist(), "unit": unit}
+
+    @classmethod
+    def from_db(cls, db_dir: Path, registry: UnitRegistry) -> "FormulaService":
+        """Load the formulas dataset written by autoschema."""
+        db_path = db_dir / FORMULAS_DB
+        if not db_path.exists():
+            return cls([], registry)
+        with sqlite3.connect(db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            formulas = [dict(row) for row in conn.execute("SELECT * FROM formulas")]
+        for formula in formulas:
+            formula["variables"] = json.loads(formula["variables"] or "{}")
+        return cls(formulas, registry)
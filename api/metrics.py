@@ -0,0 +1,172 @@
+"""Prometheus text-format metrics with pre-allocated children for the request hot path."""
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Tuple
+
+# Seconds; dataset reads range from cached responses (~10 µs) to cold scans
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+STAGES = ("connect", "query", "deserialize", "encode", "total")
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+class Value:
+    """Counter or gauge sample. Updates are plain attribute writes (no locks, no allocation)."""
+    __slots__ = ("value",)
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: float = 1):
+        self.value += amount
+
+    def dec(self, amount: float = 1):
+        self.value -= amount
+
+    def set(self, value: float):
+        self.value = value
+
+
+class HistogramValue:
+    """Bucket counts in a list sized once; observe() is a bisect and two additions."""
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds: Tuple[float, ...]):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+
+class Metric:
+    """
+    A metric family. `labels(...)` creates a child once per label set;
+    callers keep the child and update it directly in the hot path.
+    """
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = label_names
+        self.children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def _child(self):
+        return Value()
+
+    def labels(self, *values: str):
+        child = self.children.get(values)
+        if child is None:
+            with self._lock:
+                child = self.children.setdefault(values, self._child())
+        return child
+
+    def _labels(self, values: Tuple[str, ...], extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in list(self.children.items()):
+            lines.append(f"{self.name}{self._labels(values)} {_format(child.value)}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+
+class Gauge(Metric):
+    kind = "gauge"
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, label_names: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, label_names)
+        self.buckets = tuple(buckets)
+
+    def _child(self):
+        return HistogramValue(self.buckets)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        for values, child in list(self.children.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{self._labels(values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(values)} {_format(child.sum)}")
+            lines.append(f"{self.name}_count{self._labels(values)} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.metrics: List[Metric] = []
+
+    def _add(self, metric: Metric) -> Metric:
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name: str, help: str, label_names: Tuple[str, ...] = ()) -> Counter:
+        return self._add(Counter(name, help, label_names))
+
+    def gauge(self, name: str, help: str, label_names: Tuple[str, ...] = ()) -> Gauge:
+        return self._add(Gauge(name, help, label_names))
+
+    def histogram(self, name: str, help: str, label_names: Tuple[str, ...] = (), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, label_names, buckets))
+
+    def render(self) -> str:
+        return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+REQUEST_SECONDS = REGISTRY.histogram(
+    "api_dataset_request_seconds", "Dataset endpoint time by stage (connect, query, deserialize, encode, total)",
+    ("dataset", "stage"))
+CACHE_REQUESTS = REGISTRY.counter(
+    "api_dataset_cache_requests_total", "Dataset requests answered from the snapshot cache (hit) or the DB (miss)",
+    ("dataset", "result"))
+CACHE_HIT_RATIO = REGISTRY.gauge("api_dataset_cache_hit_ratio", "Share of dataset requests served from cache", ("dataset",))
+RESPONSE_BYTES = REGISTRY.counter("api_dataset_response_bytes_total", "Response body bytes sent per dataset", ("dataset",))
+POOL_CONNECTIONS = REGISTRY.gauge("api_db_pool_connections", "Pooled SQLite connections by state", ("dataset", "state"))
+EXECUTOR_PENDING = REGISTRY.gauge("api_db_executor_pending", "Calls running or queued in a dataset executor", ("dataset",))
+IN_FLIGHT = REGISTRY.gauge("api_requests_in_flight", "HTTP requests currently being handled")
+
+
+def stage_timers(dataset: str) -> Dict[str, HistogramValue]:
+    """Histogram children for every stage of a dataset, bound once per dataset."""
+    return {stage: REQUEST_SECONDS.labels(dataset, stage) for stage in STAGES}
+
+
+class InFlightMiddleware:
+    """ASGI middleware counting HTTP requests in flight."""
+
+    def __init__(self, app):
+        self.app = app
+        self.gauge = IN_FLIGHT.labels()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        self.gauge.inc()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.gauge.dec()
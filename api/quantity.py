@@ -0,0 +1,148 @@
+"""Quantity arithmetic on arrays of magnitudes with one unit each."""
+from functools import reduce
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from api.units import DIMENSION_SYMBOLS, DimensionIndex, UnitExpression, UnitRegistry, parse_dimension
+
+# Coherent SI base unit per dimension symbol, used when no named unit exists
+BASE_UNITS = {"M": "kg", "L": "m", "T": "s", "I": "A", "Θ": "K", "N": "mol", "J": "cd", "D": "B"}
+
+OPERATIONS = ("mul", "div", "add", "sub")
+
+
+class Quantity:
+    """Magnitudes (any array shape) sharing a single unit."""
+
+    def __init__(self, magnitude: Any, unit: UnitExpression, calculator: "QuantityCalculator"):
+        try:
+            self.magnitude = np.asarray(magnitude, dtype=np.float64)
+        except (TypeError, ValueError):
+            raise ValueError(f"Magnitudes must be numbers or (nested) lists of numbers: {magnitude!r}")
+        self.unit = unit
+        self.calculator = calculator
+
+    @property
+    def dimension(self) -> Tuple[int, ...]:
+        return self.unit.dimension
+
+    def to_si(self) -> np.ndarray:
+        """Magnitudes in coherent SI units."""
+        factor = float(self.unit.factor)
+        return self.magnitude if factor == 1 else self.magnitude * factor
+
+    def __mul__(self, other: "Quantity") -> "Quantity":
+        return self.calculator.multiply(self, other)
+
+    def __truediv__(self, other: "Quantity") -> "Quantity":
+        return self.calculator.divide(self, other)
+
+    def __add__(self, other: "Quantity") -> "Quantity":
+        return self.calculator.add(self, other)
+
+    def __sub__(self, other: "Quantity") -> "Quantity":
+        return self.calculator.subtract(self, other)
+
+    def to_dict(self) -> Dict:
+        return {
+            "magnitude": self.magnitude.tolist(),
+            "unit": self.unit.text,
+            "dimension": self.unit.to_dict()["dimension"],
+        }
+
+
+class QuantityCalculator:
+    """
+    Multiplies, divides, adds and subtracts quantities.
+
+    Dimension vectors are combined once per operation, magnitudes with
+    vectorized NumPy. Results are expressed in coherent SI and simplified
+    through a dimension → named unit map precomputed from the dimension index
+    (e.g. N·m → J), falling back to a product of base units.
+    """
+
+    def __init__(self, registry: UnitRegistry, index: DimensionIndex):
+        self.registry = registry
+        self.named_units = {}
+        for dimension, units in index.exact.items():
+            self.named_units.setdefault(parse_dimension(dimension), units[0]["symbol"])
+
+    def quantity(self, magnitude: Any, unit: str) -> Quantity:
+        return Quantity(magnitude, self.registry.parse_expression(unit), self)
+
+    def simplify(self, dimension: Tuple[int, ...]) -> UnitExpression:
+        """Named coherent unit for a dimension vector, else a product of base units."""
+        name = self.named_units.get(dimension)
+        if name is None:
+            numerator = [self._power(symbol, p) for symbol, p in zip(DIMENSION_SYMBOLS, dimension) if p > 0]
+            denominator = [self._power(symbol, -p) for symbol, p in zip(DIMENSION_SYMBOLS, dimension) if p < 0]
+            name = "·".join(numerator) or "1"
+            if denominator:
+                name += "/" + ("·".join(denominator) if len(denominator) == 1 else f"({'·'.join(denominator)})")
+        return self.registry.parse_expression(name)
+
+    def _power(self, symbol: str, power: int) -> str:
+        return BASE_UNITS[symbol] + (f"^{power}" if power != 1 else "")
+
+    def _result(self, magnitude: np.ndarray, dimension: Tuple[int, ...]) -> Quantity:
+        return Quantity(magnitude, self.simplify(dimension), self)
+
+    def multiply(self, *quantities: Quantity) -> Quantity:
+        dimension = tuple(map(sum, zip(*(q.dimension for q in quantities))))
+        magnitude = reduce(np.multiply, (q.to_si() for q in quantities))
+        return self._result(magnitude, dimension)
+
+    def divide(self, numerator: Quantity, denominator: Quantity) -> Quantity:
+        dimension = tuple(a - b for a, b in zip(numerator.dimension, denominator.dimension))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            magnitude = numerator.to_si() / denominator.to_si()
+        return self._result(magnitude, dimension)
+
+    def _check_compatible(self, quantities: Tuple[Quantity, ...]):
+        units = [q.unit for q in quantities]
+        if any(unit.dimension != units[0].dimension for unit in units[1:]):
+            raise ValueError(f"Cannot add quantities in {', '.join(u.text for u in units)}: dimensions differ")
+
+    def add(self, *quantities: Quantity) -> Quantity:
+        self._check_compatible(quantities)
+        magnitude = reduce(np.add, (q.to_si() for q in quantities))
+        return self._result(magnitude, quantities[0].dimension)
+
+    def subtract(self, minuend: Quantity, subtrahend: Quantity) -> Quantity:
+        self._check_compatible((minuend, subtrahend))
+        return self._result(minuend.to_si() - subtrahend.to_si(), minuend.dimension)
+
+    def convert(self, quantity: Quantity, unit: str) -> Quantity:
+        """Express a quantity in another unit of the same dimension."""
+        target = self.registry.parse_expression(unit)
+        if target.dimension != quantity.dimension:
+            raise ValueError(f"Cannot convert {quantity.unit.text} to {unit}: dimensions differ")
+        return Quantity(quantity.to_si() / float(target.factor), target, self)
+
+    def evaluate(self, operation: str, operands: List[Dict], unit: Optional[str] = None) -> Quantity:
+        """
+        Apply an operation left to right over operands given as {"magnitude", "unit"} dicts.
+
+        :param operation: One of OPERATIONS.
+        :param operands: At least two operands; magnitudes broadcast with NumPy rules.
+        :param unit: Optional unit for the result instead of the simplified SI unit.
+
+        Raises ValueError for non-finite results (e.g. division by zero), which JSON cannot encode.
+        """
+        if operation not in OPERATIONS:
+            raise ValueError(f"Unknown operation: {operation}")
+        if len(operands) < 2:
+            raise ValueError("At least two operands are required")
+        quantities = [self.quantity(o["magnitude"], o["unit"]) for o in operands]
+        if operation == "mul":
+            result = self.multiply(*quantities)
+        elif operation == "add":
+            result = self.add(*quantities)
+        else:
+            step = self.divide if operation == "div" else self.subtract
+            result = reduce(step, quantities)
+        result = self.convert(result, unit) if unit else result
+        if not np.all(np.isfinite(result.magnitude)):
+            raise ValueError(f"Result of {operation} is not finite (division by zero or overflow)")
+        return result
@@ -0,0 +1,130 @@
+"""Rendering of (compound) units to LaTeX, MathML and Markdown."""
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from api.units import UNIT_INDEX_DB, UnitRegistry, read_table
+
+FORMATS = ("latex", "mathml", "markdown")
+RENDER_CACHE_SIZE = 65536
+
+# Prefix symbols that need escaping in LaTeX
+LATEX_SYMBOLS = {"µ": "\\mu ", "Ω": "\\Omega "}
+MATHRM = "\\mathrm{"
+MATHML_IDENTIFIER = re.compile(r"<mi>([^<]*)</mi>")
+
+
+class UnitRenderer:
+    """
+    Composes unit snippets into LaTeX, MathML and Markdown.
+
+    Single (prefixed) units are looked up in the table pre-rendered at ingest
+    time, compound expressions are composed once and kept in an LRU cache.
+    """
+
+    def __init__(self, registry: UnitRegistry, prerendered: Optional[Dict[str, Dict]] = None):
+        self.registry = registry
+        self.prerendered = prerendered if prerendered is not None else {}
+        self.render = lru_cache(maxsize=RENDER_CACHE_SIZE)(self._render)
+
+    def render_symbol(self, entry: Dict) -> Dict:
+        """
+        Snippets for one table entry. Unprefixed units keep the snippets from
+        the unit data, prefixed units compose the prefix with them (µ + Ω → µΩ).
+        """
+        if not entry["prefix"] or entry["symbol"] != entry["prefix"] + entry["unit"]:
+            return self._unit_snippets(entry["symbol"])  # also the gram stem of kg ("g", "mg")
+        return self._compose(entry["prefix"], self._unit_snippets(entry["unit"]))
+
+    def _unit_snippets(self, symbol: str) -> Dict:
+        unit = self.registry.units.get(symbol, {})
+        if symbol in self.registry.units and all(unit.get(fmt) for fmt in FORMATS):
+            return {fmt: unit[fmt] for fmt in FORMATS}
+        return {
+            "latex": f"\\mathrm{{{self._latex(symbol).strip()}}}",
+            "mathml": f"<mi>{symbol}</mi>",
+            "markdown": f"${symbol}$",
+        }
+
+    @staticmethod
+    def _latex(symbol: str) -> str:
+        return "".join(LATEX_SYMBOLS.get(char, char) for char in symbol)
+
+    def _compose(self, prefix: str, unit: Dict) -> Dict:
+        """Prefix snippets joined with the unit's; upright runs merge, e.g. \\mathrm{k} + \\mathrm{m} → \\mathrm{km}."""
+        latex = self._latex(prefix)
+        if unit["latex"].startswith(MATHRM):
+            latex = MATHRM + latex + unit["latex"][len(MATHRM):]
+        else:
+            latex = f"\\mathrm{{{latex.strip()}}}{unit['latex']}"
+        identifier = MATHML_IDENTIFIER.fullmatch(unit["mathml"])
+        if identifier:
+            mathml = f"<mi>{prefix}{identifier.group(1)}</mi>"
+        else:
+            mathml = f"<mrow><mi>{prefix}</mi>{unit['mathml']}</mrow>"
+        return {"latex": latex, "mathml": mathml, "markdown": f"${prefix}{unit['markdown'].strip('$')}$"}
+
+    def _term(self, snippets: Dict, power: int) -> Dict:
+        markdown = snippets["markdown"].strip("$")
+        if power == 1:
+            return {"latex": snippets["latex"], "mathml": snippets["mathml"], "markdown": markdown}
+        return {
+            "latex": f"{snippets['latex']}^{{{power}}}",
+            "mathml": f"<msup>{snippets['mathml']}<mn>{power}</mn></msup>",
+            "markdown": f"{markdown}^{{{power}}}",
+        }
+
+    def _product(self, terms: List[Dict]) -> Dict:
+        if not terms:
+            return {"latex": "1", "mathml": "<mn>1</mn>", "markdown": "1"}
+        return {
+            "latex": " \\cdot ".join(t["latex"] for t in terms),
+            "mathml": "<mo>&#x22C5;</mo>".join(t["mathml"] for t in terms),
+            "markdown": " \\cdot ".join(t["markdown"] for t in terms),
+        }
+
+    def _render(self, text: str) -> Dict:
+        """
+        Render a unit expression such as "kN·m/s²".
+
+        Terms with negative powers form the denominator of a fraction.
+        Raises ValueError for unknown units or invalid expressions.
+        """
+        if text in self.prerendered:
+            return self.prerendered[text]
+
+        expression = self.registry.parse_expression(text)
+        numerator, denominator = [], []
+        for entry, power in expression.terms:
+            snippets = self.prerendered.get(entry["symbol"]) or self.render_symbol(entry)
+            if power < 0:
+                denominator.append(self._term(snippets, -power))
+            else:
+                numerator.append(self._term(snippets, power))
+
+        top = self._product(numerator)
+        if not denominator:
+            return {
+                "latex": top["latex"],
+                "mathml": f"<mrow>{top['mathml']}</mrow>",
+                "markdown": f"${top['markdown']}$",
+            }
+        bottom = self._product(denominator)
+        if len(denominator) > 1:
+            bottom["markdown"] = f"({bottom['markdown']})"
+        return {
+            "latex": f"\\frac{{{top['latex']}}}{{{bottom['latex']}}}",
+            "mathml": f"<mfrac><mrow>{top['mathml']}</mrow><mrow>{bottom['mathml']}</mrow></mfrac>",
+            "markdown": f"${top['markdown']} / {bottom['markdown']}$",
+        }
+
+    def build_rows(self) -> List[Dict]:
+        """Pre-rendered snippets for every prefix × unit combination (aliases included)."""
+        return [dict(symbol=symbol, **self.render_symbol(entry)) for symbol, entry in self.registry.table.items()]
+
+    @classmethod
+    def from_db(cls, db_dir: Path, registry: UnitRegistry) -> "UnitRenderer":
+        """Load the renderings written by autoschema at ingest time."""
+        rows = read_table(db_dir / UNIT_INDEX_DB, "renderings")
+        return cls(registry, {row.pop("symbol"): row for row in rows})
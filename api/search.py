@@ -0,0 +1,94 @@
+"""Cross-dataset full-text search over an SQLite FTS5 index built at ingest time."""
+import re
+import sqlite3
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from api.datasets import ConnectionPool
+
+SEARCH_DB = Path("search.db")
+
+# Word index: Unicode-aware tokens, diacritics folded ("Francais" finds "Français")
+WORD_TOKENIZER = "unicode61 remove_diacritics 2"
+# Scripts written without spaces between words get a trigram index for substring matches
+UNSEGMENTED_SCRIPTS = {"Hani", "Hans", "Hant", "Jpan", "Hira", "Kana", "Kore", "Thai", "Laoo", "Khmr", "Mymr"}
+TRIGRAM_TOKENIZER = "trigram"
+
+SEARCH_TABLES = {"search_words": WORD_TOKENIZER, "search_trigram": TRIGRAM_TOKENIZER}
+SEARCH_COLUMNS = "dataset UNINDEXED, key UNINDEXED, field UNINDEXED, text"
+WORD = re.compile(r"\w+")
+
+
+def tokenizers_for(languages: Iterable[Dict]) -> Dict[str, str]:
+    """FTS5 tables to build: always the word index, plus trigrams if a language needs them."""
+    tables = {"search_words": WORD_TOKENIZER}
+    if any(language.get("script") in UNSEGMENTED_SCRIPTS for language in languages):
+        tables["search_trigram"] = TRIGRAM_TOKENIZER
+    return tables
+
+
+def create_tables(conn: sqlite3.Connection, tables: Dict[str, str]):
+    for table, tokenizer in tables.items():
+        conn.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {table} USING fts5({SEARCH_COLUMNS}, tokenize='{tokenizer}')")
+
+
+def _phrase(text: str) -> str:
+    return '"' + text.replace('"', '""') + '"'
+
+
+class SearchIndex:
+    """Ranked lookups in the word index, completed by substring hits from the trigram index."""
+
+    def __init__(self, db_dir: Path):
+        self.db_path = db_dir / SEARCH_DB
+        self.pool = ConnectionPool(self.db_path)
+
+    @property
+    def available(self) -> bool:
+        return self.db_path.exists()
+
+    def _tables(self, conn: sqlite3.Connection) -> List[str]:
+        names = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        return [table for table in SEARCH_TABLES if table in names]
+
+    def search(self, q: str, limit: int = 20, dataset: Optional[str] = None) -> List[Dict]:
+        """
+        Hits for a query, best first, at most one per (dataset, key).
+
+        Every word of the query must match (whole words before prefixes) in the word index;
+        queries of three or more characters also match inside words and CJK
+        text via the trigram index.
+        """
+        words = WORD.findall(q)
+        if not words or not self.available:
+            return []
+        queries = [
+            ("search_words", " AND ".join(_phrase(word) for word in words)),  # whole words rank first
+            ("search_words", " AND ".join(_phrase(word) + "*" for word in words)),
+        ]
+        if len(q.strip()) >= 3:
+            queries.append(("search_trigram", _phrase(q.strip())))
+
+        hits, seen = [], set()
+        with self.pool.connection() as conn:
+            tables = self._tables(conn)
+            for table, match in queries:
+                if table not in tables:
+                    continue
+                sql = f"SELECT dataset, key, field, text, bm25({table}) AS score FROM {table} WHERE {table} MATCH ?"
+                params = [match]
+                if dataset:
+                    sql += " AND dataset = ?"
+                    params.append(dataset)
+                sql += " ORDER BY score LIMIT ?"
+                params.append(limit)
+                for row in conn.execute(sql, params):
+                    if (row[0], row[1]) in seen:
+                        continue
+                    seen.add((row[0], row[1]))
+                    hits.append({"dataset": row[0], "key": row[1], "field": row[2], "text": row[3],
+                                 "score": round(-row[4], 4)})
+        return hits[:limit]
+
+    def close(self):
+        self.pool.close()
@@ -0,0 +1,183 @@
+"""
+Read-only dataset snapshots shared by all server workers through mmap.
+
+autoschema writes one file per served dataset next to its database (e.g.
+'db/physics/units/prefixes.prefixes.snap'). It holds the encoded JSON body of
+all rows, where each row starts in it, a sorted key index and the column
+arrays. Workers map the file instead of decoding the table, so the pages are
+shared through the OS page cache and a new worker only reads the header.
+
+Layout: magic, header length (uint64), JSON header, then the sections at
+64-byte aligned offsets relative to the end of the header.
+"""
+import bisect
+import json
+import mmap
+import sqlite3
+import struct
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from api.columnar import table_columns
+
+MAGIC = b"COMSNAP1"
+ALIGN = 64
+SNAPSHOT_META = ("data_hash", "schema_hash", "row_count")  # manifest values a snapshot must match
+
+
+def snapshot_path(db_path: Path, table: str) -> Path:
+    """One file per table, e.g. 'countries.countries_joined.snap' for a joined view."""
+    return db_path.with_name(f"{db_path.stem}.{table}.snap")
+
+
+def encode_row(row: Dict) -> bytes:
+    """A row as in the dataset responses of the API."""
+    return json.dumps(row, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode_key(value: Any) -> bytes:
+    """Key values are compared by their JSON encoding, so 1 and '1' stay different keys."""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def read_header(path: Path) -> Optional[Dict]:
+    """The header of a snapshot file, or None if it is missing or not a snapshot."""
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                return None
+            (length,) = struct.unpack("<Q", f.read(8))
+            return json.loads(f.read(length))
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def write_snapshot(path: Path, conn: sqlite3.Connection, table: str, meta: Dict, fields: Optional[List[Dict]] = None):
+    """
+    Write the snapshot of a table, replacing the previous file atomically.
+
+    :param meta: Stored in the header, e.g. the manifest hashes a reader checks.
+    :param fields: Field types and shapes for the column arrays, default the declared column types.
+    """
+    from api.datasets import deserialize  # api.datasets imports this module
+
+    declared = conn.execute(f"PRAGMA table_info({table})").fetchall()
+    primary = [column[1] for column in declared if column[5]]
+    key_field = primary[0] if primary else declared[0][1]  # as Dataset.key_field
+    json_columns = {column[1] for column in declared if column[2].upper() == "JSON"}
+
+    cursor = conn.execute(f"SELECT * FROM {table}")  # same row order as the API reads
+    names = [col[0] for col in cursor.description]
+    encoded, keys = [], {}
+    for index, values in enumerate(cursor):
+        # JSON columns decoded like the server's 'JSON' converter does
+        row = {name: json.loads(value) if name in json_columns and isinstance(value, str) else deserialize(value)
+               for name, value in zip(names, values)}
+        encoded.append(encode_row(row))
+        keys[encode_key(row.get(key_field))] = index  # the last row wins, like Dataset.by_key
+    body = b"[" + b",".join(encoded) + b"]"
+    row_offsets = np.cumsum([1] + [len(row) + 1 for row in encoded], dtype=np.int64)
+    del encoded
+
+    ordered = sorted(keys.items())
+    key_blob = b"".join(key for key, _ in ordered)
+    key_offsets = np.cumsum([0] + [len(key) for key, _ in ordered], dtype=np.int64)
+    key_rows = np.array([index for _, index in ordered], dtype=np.int64)
+
+    columns = table_columns(conn, table, fields)
+    sections = [("body", body), ("keys", key_blob)]
+    arrays = [("row_offsets", row_offsets), ("key_offsets", key_offsets), ("key_rows", key_rows)]
+    arrays += [(f"column:{name}", np.ascontiguousarray(values)) for name, values in columns.items()]
+
+    header = {"meta": meta, "table": table, "key_field": key_field, "fields": names,
+              "row_count": len(row_offsets) - 1, "sections": {}, "arrays": {}}
+    offset = 0
+    for name, data in sections + arrays:
+        offset = -(-offset // ALIGN) * ALIGN
+        size = data.nbytes if isinstance(data, np.ndarray) else len(data)
+        if isinstance(data, np.ndarray):
+            header["arrays"][name] = {"offset": offset, "dtype": data.dtype.str, "shape": list(data.shape)}
+        else:
+            header["sections"][name] = {"offset": offset, "length": size}
+        offset += size
+
+    header_bytes = json.dumps(header, ensure_ascii=False).encode("utf-8")
+    start = -(-(len(MAGIC) + 8 + len(header_bytes)) // ALIGN) * ALIGN
+    tmp_path = path.with_name(path.name + ".tmp")
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC + struct.pack("<Q", len(header_bytes)) + header_bytes)
+            for name, data in sections + arrays:
+                position = header["arrays"].get(name, header["sections"].get(name))["offset"]
+                f.write(b"\0" * (start + position - f.tell()))
+                f.write(data.tobytes() if isinstance(data, np.ndarray) else data)
+        tmp_path.replace(path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+class Snapshot:
+    """
+    A mapped snapshot file. The body, index and columns are views on the
+    mapping; only looked-up rows are decoded.
+    """
+
+    def __init__(self, path: Path):
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"Not a dataset snapshot: {path}")
+        (length,) = struct.unpack_from("<Q", self._mmap, len(MAGIC))
+        end = len(MAGIC) + 8 + length
+        self.header = json.loads(self._mmap[len(MAGIC) + 8:end])
+        self._start = -(-end // ALIGN) * ALIGN
+        self.meta = self.header["meta"]
+        self.fields = self.header["fields"]
+        self.key_field = self.header["key_field"]
+        self.row_count = self.header["row_count"]
+
+        view = memoryview(self._mmap)
+        self.body = self._section(view, "body")
+        self._keys = self._section(view, "keys")
+        self._row_offsets = self._array("row_offsets")
+        self._key_offsets = self._array("key_offsets")
+        self._key_rows = self._array("key_rows")
+
+    def _section(self, view: memoryview, name: str) -> memoryview:
+        section = self.header["sections"][name]
+        start = self._start + section["offset"]
+        return view[start:start + section["length"]]
+
+    def _array(self, name: str) -> np.ndarray:
+        spec = self.header["arrays"][name]
+        dtype = np.dtype(spec["dtype"])
+        count = int(np.prod(spec["shape"], dtype=np.int64))
+        array = np.frombuffer(self._mmap, dtype=dtype, count=count, offset=self._start + spec["offset"])
+        return array.reshape(spec["shape"])
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        """Column arrays (read-only views on the mapping) by name, as for ColumnStore."""
+        return {name[len("column:"):]: self._array(name) for name in self.header["arrays"] if name.startswith("column:")}
+
+    def row(self, index: int) -> Dict:
+        start, end = self._row_offsets[index], self._row_offsets[index + 1] - 1
+        return json.loads(bytes(self.body[start:end]))
+
+    def rows(self) -> List[Dict]:
+        return json.loads(bytes(self.body))
+
+    def _key(self, position: int) -> bytes:
+        return bytes(self._keys[self._key_offsets[position]:self._key_offsets[position + 1]])
+
+    def lookup(self, keys: Iterable[Any]) -> List[Dict]:
+        """Rows by key field value, by binary search in the index; missing keys are skipped."""
+        count = len(self._key_rows)
+        rows = []
+        for key in keys:
+            encoded = encode_key(key)
+            position = bisect.bisect_left(range(count), encoded, key=self._key)
+            if position < count and self._key(position) == encoded:
+                rows.append(self.row(int(self._key_rows[position])))
+        return rows
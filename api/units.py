@@ -0,0 +1,412 @@
+"""SI unit registry: prefix parsing and the precomputed prefix × unit table."""
+import logging
+import re
+import sqlite3
+from fractions import Fraction
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+SUPERSCRIPTS = str.maketrans("⁰¹²³⁴⁵⁶⁷⁸⁹⁻", "0123456789-")
+
+# Alternative spellings of prefix symbols (Greek small mu, ASCII "u" for micro)
+PREFIX_ALIASES = {"µ": ["μ", "u"]}
+
+# Units whose SI symbol already carries a prefix (kilogram is built on gram)
+PREFIXED_STEMS = {"kg": ("g", "gram", -3)}
+
+# Binary prefixes (base 2) only apply to units of information (data/physics/units/information_units_data.yaml).
+# The bit is left out: its factor to the byte (8) is not a power of a prefix base.
+INFORMATION_UNITS = {"B", "o"}
+
+# Dimension symbols in the order used by the unit data (e.g. "ML2T-2"). The seven SI base
+# dimensions, then "D" for information, so bytes only combine with other units of information.
+DIMENSION_SYMBOLS = ["M", "L", "T", "I", "Θ", "N", "J", "D"]
+DIMENSION_ALIASES = {"θ": "Θ"}
+DIMENSION_TOKEN = re.compile(r"([A-Za-zΘθ])\^?(-?\d+)?")
+
+UNIT_INDEX_DB = Path("physics") / "units" / "unit_index.db"
+
+# Tokens of compound unit expressions such as "kN·m/s²" or "J/(kg*K)"
+UNIT_TOKEN = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<open>\()
+  | (?P<close>\))
+  | (?P<div>/)
+  | (?P<power>(?:\^|\*\*)\s*\(?\s*-?\d+\s*\)?|[⁻⁰¹²³⁴⁵⁶⁷⁸⁹]+)
+  | (?P<mul>[·⋅*.×])
+  | (?P<digits>-?\d+)
+  | (?P<symbol>[^\W\d_⁰¹²³⁴⁵⁶⁷⁸⁹]+)
+""", re.VERBOSE)
+EXPRESSION_CACHE_SIZE = 4096
+MAX_UNIT_POWER = 12  # |power| of one unit in an expression, e.g. "m^12"; keeps exact factors small
+
+
+def exact_factor(entry: Dict) -> Fraction:
+    """Exact scale factor of a prefix or table entry as a rational number."""
+    return Fraction(entry["base"]) ** entry["exponent"]
+
+
+def parse_dimension(text: str) -> Tuple[int, ...]:
+    """
+    Parse a dimension string into an exponent vector over DIMENSION_SYMBOLS.
+
+    Order, repeated symbols, spaces, '^' and '·' are tolerated, so "ML2T-2",
+    "L^2 M T^-2" and "M·L²·T⁻²" are all (1, 2, -2, 0, 0, 0, 0).
+    "1" or an empty string is dimensionless.
+    """
+    normalized = text.translate(SUPERSCRIPTS)
+    for separator in (" ", "·", "*", "."):
+        normalized = normalized.replace(separator, "")
+    vector = [0] * len(DIMENSION_SYMBOLS)
+    if normalized in ("", "1"):
+        return tuple(vector)
+
+    position = 0
+    while position < len(normalized):
+        match = DIMENSION_TOKEN.match(normalized, position)
+        symbol = DIMENSION_ALIASES.get(match.group(1), match.group(1)) if match else None
+        if symbol not in DIMENSION_SYMBOLS:
+            raise ValueError(f"Invalid dimension: {text}")
+        vector[DIMENSION_SYMBOLS.index(symbol)] += int(match.group(2) or 1)
+        position = match.end()
+    return tuple(vector)
+
+
+def format_dimension(vector: Tuple[int, ...]) -> str:
+    """Canonical dimension string for an exponent vector, e.g. "ML2T-2"."""
+    parts = [
+        symbol + (str(exponent) if exponent != 1 else "")
+        for symbol, exponent in zip(DIMENSION_SYMBOLS, vector) if exponent
+    ]
+    return "".join(parts) or "1"
+
+
+class UnitExpression:
+    """
+    A parsed compound unit such as "kN·m/s²".
+
+    `terms` keeps the (table entry, power) pairs in written order, `factor`
+    is the exact scale to coherent SI units and `dimension` the exponent vector.
+    """
+
+    def __init__(self, text: str, terms: List[Tuple[Dict, int]]):
+        self.text = text
+        self.terms = terms
+        self.factor = Fraction(1)
+        dimension = [0] * len(DIMENSION_SYMBOLS)
+        for entry, power in terms:
+            self.factor *= exact_factor(entry) ** power
+            for i, exponent in enumerate(parse_dimension(entry["dimension"])):
+                dimension[i] += exponent * power
+        self.dimension = tuple(dimension)
+
+    def to_dict(self) -> Dict:
+        return {
+            "unit": self.text,
+            "terms": [{"symbol": entry["symbol"], "power": power} for entry, power in self.terms],
+            "factor": float(self.factor),
+            "dimension": format_dimension(self.dimension),
+        }
+
+
+class PrefixTrie:
+    """Character trie over prefix symbols for longest-match parsing."""
+
+    def __init__(self):
+        self.root = {}
+
+    def insert(self, symbol: str, prefix: Dict):
+        node = self.root
+        for char in symbol:
+            node = node.setdefault(char, {})
+        node[None] = prefix  # None marks the end of a complete symbol
+
+    def matches(self, text: str) -> Iterator[Tuple[Dict, int]]:
+        """
+        Yield every prefix that starts `text`, longest first.
+
+        :param text: The string to parse, e.g. "dam".
+        :return: Iterator of (prefix, length) pairs, e.g. ("da", 2), ("d", 1).
+        """
+        found = []
+        node = self.root
+        for length, char in enumerate(text, 1):
+            node = node.get(char)
+            if node is None:
+                break
+            if None in node:
+                found.append((node[None], length))
+        return reversed(found)
+
+    def longest(self, text: str) -> Optional[Tuple[Dict, int]]:
+        return next(iter(self.matches(text)), None)
+
+
+class UnitRegistry:
+    """
+    Prefixes, base and derived SI units plus every prefix × unit combination.
+
+    The combination table is computed once, so resolving a symbol like "km"
+    or "µs" is a single dict lookup.
+    """
+
+    def __init__(self, prefixes: List[Dict], units: List[Dict]):
+        self.prefixes = {p["symbol"]: p for p in prefixes if p.get("symbol")}
+        self.units = {u["symbol"]: u for u in units if u.get("symbol")}
+        self.trie = PrefixTrie()
+        for symbol, prefix in self.prefixes.items():
+            self.trie.insert(symbol, prefix)
+            for alias in PREFIX_ALIASES.get(symbol, []):
+                self.trie.insert(alias, prefix)
+        self.table = self._build_table()
+        self.parse_expression = lru_cache(maxsize=EXPRESSION_CACHE_SIZE)(self._parse_expression)
+
+    def _entry(self, symbol: str, name: str, prefix: Optional[Dict], unit: Dict, exponent_offset: int = 0) -> Optional[Dict]:
+        base, exponent = (prefix["base"], prefix["exponent"]) if prefix else (10, 0)
+        if base != 10 and exponent_offset:
+            return None  # Mixed binary/decimal factors are not meaningful
+        if base == 10:
+            exponent += exponent_offset
+        return {
+            "symbol": symbol,
+            "name_en": name,
+            "prefix": prefix["symbol"] if prefix else "",
+            "unit": unit["symbol"],
+            "base": base,
+            "exponent": exponent,
+            "factor": float(Fraction(base) ** exponent),
+            "dimension": unit.get("dimension"),
+        }
+
+    def _applies(self, prefix: Dict, unit_symbol: str) -> bool:
+        if prefix["base"] == 2:
+            return unit_symbol in INFORMATION_UNITS
+        return True
+
+    def _build_table(self) -> Dict[str, Dict]:
+        """Every unit, with and without prefix. Unprefixed units win collisions."""
+        table = {}
+        for unit in self.units.values():
+            table[unit["symbol"]] = self._entry(unit["symbol"], unit.get("name_en", ""), None, unit)
+
+        for unit in self.units.values():
+            stem, stem_name, offset = PREFIXED_STEMS.get(
+                unit["symbol"], (unit["symbol"], unit.get("name_en", ""), 0)
+            )
+            if offset:
+                table.setdefault(stem, self._entry(stem, stem_name, None, unit, offset))
+            for prefix in self.prefixes.values():
+                if not self._applies(prefix, stem):
+                    continue
+                entry = self._entry(prefix["symbol"] + stem, prefix["name_en"] + stem_name, prefix, unit, offset)
+                if entry is None:
+                    continue
+                for symbol in [prefix["symbol"]] + PREFIX_ALIASES.get(prefix["symbol"], []):
+                    table.setdefault(symbol + stem, entry)
+        return table
+
+    def resolve(self, symbol: str) -> Optional[Dict]:
+        """Resolve a (possibly prefixed) unit symbol to its table entry."""
+        return self.table.get(symbol)
+
+    def split(self, text: str) -> Optional[Tuple[Optional[Dict], Optional[Dict]]]:
+        """
+        Split `text` into (prefix, unit) using the trie.
+
+        An exact unit symbol is never split ("m" is metre, "mm" is milli-metre),
+        otherwise the longest prefix leaving a known unit wins ("dam" is deca-metre).
+        A bare prefix such as "Gi" returns (prefix, None).
+        """
+        if text in self.units:
+            return None, self.units[text]
+        for prefix, length in self.trie.matches(text):
+            rest = text[length:]
+            if not rest:
+                return prefix, None
+            if rest in self.units:
+                return prefix, self.units[rest]
+        return None
+
+    def parse(self, text: str) -> Optional[Dict]:
+        """
+        Resolve `text` via the precomputed table, falling back to the trie
+        for bare prefixes and combinations that are not tabulated.
+        """
+        entry = self.resolve(text)
+        if entry is not None:
+            return entry
+        parts = self.split(text)
+        if parts is None:
+            return None
+        prefix, unit = parts
+        if unit is None:
+            return {
+                "symbol": text,
+                "name_en": prefix["name_en"],
+                "prefix": prefix["symbol"],
+                "unit": None,
+                "base": prefix["base"],
+                "exponent": prefix["exponent"],
+                "factor": float(exact_factor(prefix)),
+                "dimension": None,
+            }
+        return self._entry(text, prefix["name_en"] + unit.get("name_en", ""), prefix, unit)
+
+    def _parse_expression(self, text: str) -> UnitExpression:
+        """
+        Parse a compound unit expression.
+
+        Supports '·', '*', '.', '×' or blanks for products, '/' for the next
+        factor only (so "kN·m/s²" is (kN·m)/s²), parentheses, and powers as
+        '^2', '**-1', superscripts or trailing digits ("m2"). "1" is dimensionless.
+        Cached per registry, so repeated units cost one lookup.
+        """
+        tokens = []
+        position = 0
+        while position < len(text):
+            match = UNIT_TOKEN.match(text, position)
+            if match is None:
+                raise ValueError(f"Invalid unit expression: {text}")
+            position = match.end()
+            if match.lastgroup != "space":
+                tokens.append((match.lastgroup, match.group()))
+
+        terms, position = self._parse_product(tokens, 0, text)
+        if position != len(tokens):
+            raise ValueError(f"Invalid unit expression: {text}")
+        expression = UnitExpression(text, terms)
+        try:
+            float(expression.factor)
+        except OverflowError:
+            raise ValueError(f"Unit factor out of range: {text}")
+        return expression
+
+    def _parse_product(self, tokens: List[Tuple[str, str]], position: int, text: str) -> Tuple[List, int]:
+        terms = []
+        sign = 1
+        expect_factor = True
+        while position < len(tokens):
+            kind, value = tokens[position]
+            if kind == "close":
+                break
+            if kind in ("mul", "div"):
+                if expect_factor:
+                    raise ValueError(f"Invalid unit expression: {text}")
+                sign = -1 if kind == "div" else 1
+                expect_factor = True
+                position += 1
+                continue
+
+            # Implicit product for adjacent factors such as "N m"
+            factor_terms, position = self._parse_factor(tokens, position, text)
+            terms.extend((entry, power * sign) for entry, power in factor_terms)
+            sign = 1
+            expect_factor = False
+        if expect_factor and terms:
+            raise ValueError(f"Invalid unit expression: {text}")
+        return terms, position
+
+    def _parse_factor(self, tokens: List[Tuple[str, str]], position: int, text: str) -> Tuple[List, int]:
+        kind, value = tokens[position]
+        if kind == "open":
+            terms, position = self._parse_product(tokens, position + 1, text)
+            if position >= len(tokens) or tokens[position][0] != "close":
+                raise ValueError(f"Invalid unit expression: {text}")
+            position += 1
+        elif kind == "symbol":
+            entry = self.parse(value)
+            if entry is None or entry["unit"] is None:
+                raise ValueError(f"Unknown unit: {value}")
+            terms = [(entry, 1)]
+            position += 1
+        elif kind == "digits" and value == "1":
+            terms = []  # Dimensionless, as in "1/s"
+            position += 1
+        else:
+            raise ValueError(f"Invalid unit expression: {text}")
+
+        if position < len(tokens) and tokens[position][0] in ("power", "digits"):
+            power = int(tokens[position][1].translate(SUPERSCRIPTS).strip("^*() "))
+            terms = [(entry, p * power) for entry, p in terms]
+            position += 1
+        if any(abs(power) > MAX_UNIT_POWER for _, power in terms):
+            raise ValueError(f"Unit powers are limited to ±{MAX_UNIT_POWER}: {text}")
+        return terms, position
+
+    @classmethod
+    def from_db(cls, db_dir: Path) -> "UnitRegistry":
+        """Load prefixes and units from the databases written by autoschema."""
+        units_dir = db_dir / "physics" / "units"
+        prefixes = read_table(units_dir / "prefixes.db", "prefixes")
+        units = []
+        for name in ("base_SI_units", "derived_SI_units", "information_units"):
+            units.extend(read_table(units_dir / f"{name}.db", name))
+        return cls(prefixes, units)
+
+
+def read_table(db_path: Path, table: str) -> List[Dict]:
+    """All rows of a table as dicts, empty if the database or table is missing."""
+    if not db_path.exists():
+        logging.warning(f"Unit database not found: {db_path}")
+        return []
+    try:
+        with sqlite3.connect(db_path) as conn:
+            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in conn.execute(f"SELECT * FROM {table}")]
+    except sqlite3.OperationalError as e:
+        logging.warning(f"Could not read {table} from {db_path}: {e}")
+        return []
+
+
+class DimensionIndex:
+    """
+    Units grouped by normalized dimension vector.
+
+    `exact` holds the coherent units (factor 1, e.g. J for ML2T-2),
+    `compatible` additionally holds every prefixed unit convertible by scale.
+    """
+
+    def __init__(self, rows: List[Dict]):
+        self.exact = {}
+        self.compatible = {}
+        for row in rows:
+            self.compatible.setdefault(row["dimension"], []).append(row)
+            if row["coherent"]:
+                self.exact.setdefault(row["dimension"], []).append(row)
+
+    def lookup(self, dimension: str, compatible: bool = False) -> Tuple[str, List[Dict]]:
+        """Units with the given dimension string (any notation parse_dimension accepts)."""
+        key = format_dimension(parse_dimension(dimension))
+        return key, (self.compatible if compatible else self.exact).get(key, [])
+
+    @staticmethod
+    def build_rows(registry: UnitRegistry) -> List[Dict]:
+        """One row per tabulated unit symbol (aliases skipped) with its canonical dimension."""
+        rows = []
+        for symbol, entry in registry.table.items():
+            if symbol != entry["symbol"] or not entry["dimension"]:
+                continue
+            try:
+                dimension = format_dimension(parse_dimension(entry["dimension"]))
+            except ValueError:
+                logging.warning(f"Skipping unit {symbol} with invalid dimension: {entry['dimension']}")
+                continue
+            rows.append({
+                "dimension": dimension,
+                "symbol": symbol,
+                "name_en": entry["name_en"],
+                "unit": entry["unit"],
+                "base": entry["base"],
+                "exponent": entry["exponent"],
+                "coherent": entry["exponent"] == 0,
+            })
+        return rows
+
+    @classmethod
+    def from_db(cls, db_dir: Path) -> "DimensionIndex":
+        """Load the index written by autoschema at ingest time."""
+        rows = read_table(db_dir / UNIT_INDEX_DB, "dimension_index")
+        for row in rows:
+            row["coherent"] = bool(row["coherent"])
+        return cls(rows)
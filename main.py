@@ -1,14 +1,53 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Query
+from fastapi import FastAPI, APIRouter, Header, HTTPException, Query
+from fastapi.responses import FileResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field
 from pathlib import Path
+from typing import Any, Dict, List, Optional
+import asyncio
+import json
+import logging
+import os
+import secrets
 import sqlite3
+import threading
+import time
 import yaml
 import numpy as np
 from contextlib import asynccontextmanager
 
+from api.columnar import FORMATS as COLUMNAR_FORMATS, MAX_BINS
+from api.datasets import DatasetCatalog
+from api.executors import ExecutorRegistry, Saturated, SingleFlight
+from api.formulas import FormulaService
+from api.metrics import (CACHE_HIT_RATIO, CACHE_REQUESTS, EXECUTOR_PENDING, POOL_CONNECTIONS, REGISTRY,
+                         RESPONSE_BYTES, InFlightMiddleware, stage_timers)
+from api.quantity import QuantityCalculator
+from api.rendering import FORMATS, UnitRenderer
+from api.search import SearchIndex
+from api.units import DimensionIndex, UnitRegistry
+
 # ---------- Configuration ----------
 BASE_DIR = Path(__file__).parent
-DATA_DIR = BASE_DIR / "data"
-DB_DIR = BASE_DIR / "db"
+DB_DIR = BASE_DIR / os.getenv("DB_DIR", "db")  # same variable as autoschema; absolute paths work too
+RELOAD_INTERVAL = float(os.getenv("RELOAD_INTERVAL", "2"))  # seconds between manifest checks, 0 disables
+DB_BUNDLE = os.getenv("DB_BUNDLE")  # serve datasets from this bundle (autoschema --bundle), relative to DB_DIR
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")  # required as X-Admin-Token header; admin endpoints are disabled without it
+
+MAX_BATCH_QUERIES = 32
+
+def load_server_config() -> Dict[str, Any]:
+    """The 'server' section of config.yaml"""
+    try:
+        with open(BASE_DIR / "config.yaml", "r", encoding="utf-8") as f:
+            return (yaml.safe_load(f) or {}).get("server") or {}
+    except FileNotFoundError:
+        return {}
+
+# Datasets the in-memory unit registry, indexes and formulas are built from
+UNIT_STATE_DATASETS = ("physics/units/", "physics/formulas")
+
+# Columns declared as JSON (e.g. formula variables) are decoded on read
+sqlite3.register_converter("JSON", json.loads)
 
 # ---------- Helper functions ----------
 def get_translation(key: str, lang: str = "en", **kwargs) -> str:
@@ -23,68 +62,372 @@ def get_translation(key: str, lang: str = "en", **kwargs) -> str:
             if row and row[0]:
                 return row[0].format(**kwargs)
             else:
-                return key  # fallback to key if no translation found
+                return key.format(**kwargs)  # fallback to key if no translation found
     except Exception:
-        return key  # fallback on any error
+        return key.format(**kwargs)  # fallback on any error
 
-def deserialize(value):
-    """Deserialize BLOBs to Python-object"""
-    if isinstance(value, bytes):
+# ---------- Column store ----------
+class AggregateQuery(BaseModel):
+    fields: List[str]  # numeric fields; VEC/MATRIX/TENSOR fields are aggregated element-wise
+    ops: List[str] = ["count", "min", "max", "mean"]  # also 'sum' and 'std'
+    group_by: Optional[str] = None  # one result per value of this field
+    filters: Dict[str, Any] = {}  # field -> value or list of values
+
+class HistogramQuery(BaseModel):
+    field: str
+    bins: int = Field(10, ge=1, le=MAX_BINS)
+    range: Optional[List[float]] = None  # [min, max], default: range of the values
+    filters: Dict[str, Any] = {}
+
+async def column_store(name: str, lang: str):
+    """The dataset's columns as NumPy arrays; loaded in the executor on first use per snapshot"""
+    dataset = app.state.datasets.get(name)
+    if dataset is None:
+        raise HTTPException(404, detail=get_translation("Unknown dataset: {dataset}", lang, dataset=name))
+    if not dataset.columns_cached:
         try:
-            return np.frombuffer(value, dtype=np.float64).tolist()
-        except Exception:
-            return "<BLOB>"
-    return value
+            await app.state.single_flight.run(
+                (dataset, "columns"), lambda: app.state.executors.run(name, dataset.column_store)
+            )
+        except Saturated:
+            detail = get_translation("Server busy, retry later", lang)
+            raise HTTPException(503, detail=detail, headers={"Retry-After": "1"})
+        except sqlite3.OperationalError as e:
+            raise HTTPException(500, detail=get_translation("DATABASE_ERROR", lang, error=str(e)))
+    return dataset.column_store()
 
-def get_db_path(data_file: Path) -> Path:
-    """DB path from YAML-file (like autoschema.py)"""
-    rel_path = data_file.relative_to(DATA_DIR)
-    db_name = data_file.stem.replace("_data", "") + ".db"
-    return DB_DIR / rel_path.parent / db_name
+async def column_query(name: str, lang: str, method: str, *args):
+    """Run a ColumnStore method in the dataset's executor, so large group-bys do not block the event loop"""
+    store = await column_store(name, lang)
+    try:
+        return await app.state.executors.run(name, getattr(store, method), *args)
+    except Saturated:
+        detail = get_translation("Server busy, retry later", lang)
+        raise HTTPException(503, detail=detail, headers={"Retry-After": "1"})
+    except ValueError as e:
+        raise HTTPException(400, detail=get_translation("Invalid query: {error}", lang, error=str(e)))
 
 # ---------- Router-generation ----------
-def create_router_for_file(data_file: Path) -> APIRouter:
+def create_router_for_dataset(name: str) -> APIRouter:
+    """Router for one dataset; the current snapshot is looked up per request, so reloads apply"""
     router = APIRouter()
-    db_path = get_db_path(data_file)
-    table_name = data_file.stem.replace("_data", "")
+    # Metric children bound once per dataset, so requests only update numbers
+    total = stage_timers(name)["total"]
+    hits, misses = CACHE_REQUESTS.labels(name, "hit"), CACHE_REQUESTS.labels(name, "miss")
+    sent = RESPONSE_BYTES.labels(name)
 
     @router.get("/")
-    def get_all(lang: str = Query("en")):
-        try:
-            with sqlite3.connect(db_path) as conn:
-                cursor = conn.execute(f"SELECT * FROM {table_name}")
-                columns = [col[0] for col in cursor.description]
-                return [
-                    {col: deserialize(val) for col, val in zip(columns, row)}
-                    for row in cursor.fetchall()
-                ]
-        except sqlite3.OperationalError as e:
-            detail = get_translation("DATABASE_ERROR", lang, error=str(e))
-            raise HTTPException(500, detail=detail)
+    async def get_all(lang: str = Query("en")):
+        start = time.perf_counter()
+        dataset = app.state.datasets.get(name)
+        if dataset is None:
+            detail = get_translation("Unknown dataset: {dataset}", lang, dataset=name)
+            raise HTTPException(404, detail=detail)
+        if dataset.body is not None:
+            hits.inc()
+        else:
+            misses.inc()
+            # Concurrent requests on a cold snapshot share one query and serialization
+            try:
+                await app.state.single_flight.run(
+                    (dataset, "all"), lambda: app.state.executors.run(name, dataset.serialize)
+                )
+            except Saturated:
+                detail = get_translation("Server busy, retry later", lang)
+                raise HTTPException(503, detail=detail, headers={"Retry-After": "1"})
+            except sqlite3.OperationalError as e:
+                detail = get_translation("DATABASE_ERROR", lang, error=str(e))
+                raise HTTPException(500, detail=detail)
+        sent.inc(len(dataset.body))
+        total.observe(time.perf_counter() - start)
+        return Response(dataset.body, media_type="application/json")
+
+    @router.get("/columnar")
+    async def get_columnar(lang: str = Query("en")):
+        """The table as npz, Arrow or Parquet file written by autoschema --columnar; supports range requests"""
+        dataset = app.state.datasets.get(name)
+        path = DB_DIR / dataset.entry["columnar_path"] if dataset and dataset.entry.get("columnar_path") else None
+        if path is None or not path.exists():
+            detail = get_translation("No columnar export for dataset: {dataset}", lang, dataset=name)
+            raise HTTPException(404, detail=detail)
+        media_type = next(media for suffix, media in COLUMNAR_FORMATS.values() if suffix == path.suffix)
+        return FileResponse(path, media_type=media_type, filename=path.name)
+
+    @router.post("/aggregate")
+    async def aggregate(body: AggregateQuery, lang: str = Query("en")):
+        """count/sum/min/max/mean/std of numeric fields, vectorized over the cached columns"""
+        return await column_query(name, lang, "aggregate", body.fields, body.ops, body.group_by, body.filters)
+
+    @router.post("/histogram")
+    async def histogram(body: HistogramQuery, lang: str = Query("en")):
+        """Counts per bin of a numeric field"""
+        return await column_query(name, lang, "histogram", body.field, body.bins, body.range, body.filters)
 
     return router
 
+# ---------- Dataset (re)loading ----------
+_reload_lock = threading.Lock()
+
+def load_unit_state(app: FastAPI):
+    """Build unit registry, indexes and formulas, then swap them in"""
+    units = UnitRegistry.from_db(DB_DIR)
+    dimensions = DimensionIndex.from_db(DB_DIR)
+    formulas = FormulaService.from_db(DB_DIR, units)
+    renderer = UnitRenderer.from_db(DB_DIR, units)
+    quantities = QuantityCalculator(units, dimensions)
+    app.state.units, app.state.dimensions, app.state.formulas = units, dimensions, formulas
+    app.state.renderer, app.state.quantities = renderer, quantities
+
+def reload_datasets(app: FastAPI) -> Dict[str, List[str]]:
+    """Swap in changed datasets from the manifest and register routes for new ones"""
+    with _reload_lock:
+        changes = app.state.datasets.reload()
+        for name in changes["added"]:
+            if name in app.state.dataset_routes:
+                continue
+            app.include_router(
+                create_router_for_dataset(name),
+                prefix=f"/{name}",  # e.g. '/physics/units/prefixes'
+                tags=[name.split("/")[0]]  # category (e.g. 'utilities')
+            )
+            app.state.dataset_routes.add(name)
+            print(f"Registered route: /{name}")
+        if changes["added"] or changes["removed"]:
+            app.openapi_schema = None  # regenerated with the new routes on next request
+
+        updated = changes["added"] + changes["changed"] + changes["removed"]
+        if updated or not hasattr(app.state, "search"):
+            # A new index object, so pooled connections never point to a replaced search.db
+            old_search = getattr(app.state, "search", None)
+            app.state.search = SearchIndex(DB_DIR)
+            if old_search is not None:
+                old_search.close()
+        if not hasattr(app.state, "units") or any(name.startswith(UNIT_STATE_DATASETS) for name in updated):
+            load_unit_state(app)
+        if any(changes.values()):
+            logging.info(f"Reloaded datasets: {changes}")
+        return changes
+
+async def watch_manifest(app: FastAPI):
+    """Reload when autoschema rewrites the manifest"""
+    while True:
+        await asyncio.sleep(RELOAD_INTERVAL)
+        if app.state.datasets.manifest_changed():
+            try:
+                await asyncio.to_thread(reload_datasets, app)
+            except Exception as e:
+                logging.error(f"Reloading datasets failed: {e}")
+
 # ---------- Lifespan event for router registration ----------
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Registration of endpoints for all YAML-files"""
-    for data_file in DATA_DIR.rglob("*_data.yaml"):
-        # Create API-path and replace backslashes by normal slashes
-        endpoint_path = str(data_file.relative_to(DATA_DIR).with_name(data_file.stem.replace("_data", "")))
-        endpoint_path = endpoint_path.replace("\\", "/")  
-
-        # Create Router and register
-        router = create_router_for_file(data_file)
-        app.include_router(
-            router,
-            prefix=f"/{endpoint_path}",
-            tags=[endpoint_path.split("/")[0]]  # category (e.g. 'utilities')
-        )
-        print(f"Registered route: /{endpoint_path}")
+    """Registration of endpoints for all datasets in the route manifest"""
+    app.state.datasets = DatasetCatalog(DB_DIR, DB_DIR / DB_BUNDLE if DB_BUNDLE else None)
+    app.state.dataset_routes = set()
+    app.state.executors = ExecutorRegistry(load_server_config().get("executors"))
+    app.state.single_flight = SingleFlight()
+    reload_datasets(app)
 
+    watcher = asyncio.create_task(watch_manifest(app)) if RELOAD_INTERVAL > 0 else None
     yield  # FastAPI requires yield in lifespan context
+    if watcher is not None:
+        watcher.cancel()
+    app.state.executors.shutdown()
 
 app = FastAPI(title="ComAPIs", version="1.0.0", lifespan=lifespan)
+app.add_middleware(InFlightMiddleware)
+
+# ---------- Admin endpoints ----------
+@app.post("/admin/reload", tags=["admin"])
+def admin_reload(x_admin_token: Optional[str] = Header(None), lang: str = Query("en")):
+    """Reload changed datasets from the manifest without restarting"""
+    if not ADMIN_TOKEN:
+        raise HTTPException(403, detail=get_translation("Admin endpoints are disabled (ADMIN_TOKEN is not set)", lang))
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, ADMIN_TOKEN):
+        raise HTTPException(403, detail=get_translation("Invalid admin token", lang))
+    return reload_datasets(app)
+
+# ---------- Metrics endpoint ----------
+@app.get("/metrics", tags=["admin"])
+def metrics():
+    """Prometheus text exposition; pool, executor and cache ratio gauges are sampled here"""
+    for name, dataset in app.state.datasets.datasets.items():
+        POOL_CONNECTIONS.labels(name, "idle").set(dataset.pool.idle)
+        POOL_CONNECTIONS.labels(name, "in_use").set(dataset.pool.in_use)
+    for name, executor in app.state.executors.executors.items():
+        EXECUTOR_PENDING.labels(name).set(executor.pending)
+    for (name, result), counter in list(CACHE_REQUESTS.children.items()):
+        if result == "hit":
+            requests = counter.value + CACHE_REQUESTS.labels(name, "miss").value
+            CACHE_HIT_RATIO.labels(name).set(counter.value / requests if requests else 0)
+    return Response(REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+# ---------- Batch endpoint ----------
+class DatasetQuery(BaseModel):
+    dataset: str  # e.g. 'utilities/countries'
+    id: Optional[str] = None  # name of the part in the response, default: dataset
+    filters: Dict[str, Any] = {}  # field -> value or list of values
+    fields: Optional[List[str]] = None  # projection, default: all fields
+    keys: Optional[List[Any]] = None  # lookup by key field (primary key or first field)
+
+class BatchRequest(BaseModel):
+    queries: List[DatasetQuery]
+    stream: bool = False  # NDJSON, one line per part as it finishes
+
+async def run_query(query: DatasetQuery, lang: str) -> Dict[str, Any]:
+    """One part of a batch; errors are reported per part instead of failing the batch"""
+    part = {"id": query.id or query.dataset, "dataset": query.dataset}
+    dataset = app.state.datasets.get(query.dataset)
+    if dataset is None:
+        detail = get_translation("Unknown dataset: {dataset}", lang, dataset=query.dataset)
+        return {**part, "status": 404, "detail": detail}
+    try:
+        # Key lookups and plain reads of a cached snapshot are cheap; scans go to the executor
+        indexed = query.keys is not None and (dataset.cached or dataset.snapshot is not None)
+        if indexed or (dataset.cached and not (query.filters or query.fields)):
+            rows = dataset.query(query.filters, query.fields, query.keys)
+        else:
+            key = (dataset, json.dumps([query.filters, query.fields, query.keys], sort_keys=True, default=str))
+            rows = await app.state.single_flight.run(key, lambda: app.state.executors.run(
+                query.dataset, dataset.query, query.filters, query.fields, query.keys
+            ))
+    except ValueError as e:
+        return {**part, "status": 400, "detail": get_translation("Invalid query: {error}", lang, error=str(e))}
+    except Saturated:
+        return {**part, "status": 503, "detail": get_translation("Server busy, retry later", lang)}
+    except sqlite3.OperationalError as e:
+        return {**part, "status": 500, "detail": get_translation("DATABASE_ERROR", lang, error=str(e))}
+    return {**part, "status": 200, "rows": rows}
+
+@app.post("/batch", tags=["batch"])
+async def batch(body: BatchRequest, lang: str = Query("en")):
+    """Run several dataset queries concurrently and return (or stream) all parts in one response"""
+    if len(body.queries) > MAX_BATCH_QUERIES:
+        detail = get_translation("Too many queries in batch (max {max})", lang, max=MAX_BATCH_QUERIES)
+        raise HTTPException(400, detail=detail)
+    tasks = [asyncio.create_task(run_query(query, lang)) for query in body.queries]
+
+    if body.stream:
+        async def parts():
+            for finished in asyncio.as_completed(tasks):
+                yield json.dumps(await finished, ensure_ascii=False) + "\n"
+        return StreamingResponse(parts(), media_type="application/x-ndjson")
+    return {"results": await asyncio.gather(*tasks)}
+
+# ---------- Search endpoint ----------
+@app.get("/search", tags=["search"])
+async def search(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    dataset: Optional[str] = Query(None),
+    lang: str = Query("en"),
+):
+    """Full-text search over all datasets; hits are ranked and carry dataset and key"""
+    try:
+        hits = await app.state.executors.run("search", app.state.search.search, q, limit, dataset)
+    except Saturated:
+        detail = get_translation("Server busy, retry later", lang)
+        raise HTTPException(503, detail=detail, headers={"Retry-After": "1"})
+    except sqlite3.OperationalError as e:
+        detail = get_translation("DATABASE_ERROR", lang, error=str(e))
+        raise HTTPException(500, detail=detail)
+    return {"query": q, "hits": hits}
+
+# ---------- Unit endpoints ----------
+@app.get("/physics/units/resolve/{symbol}", tags=["physics"])
+def resolve_unit(symbol: str, lang: str = Query("en")):
+    """Resolve a prefixed unit (e.g. 'km', 'µs') or a bare prefix (e.g. 'Gi')"""
+    entry = app.state.units.parse(symbol)
+    if entry is None:
+        detail = get_translation("Unknown unit: {symbol}", lang, symbol=symbol)
+        raise HTTPException(404, detail=detail)
+    return entry
+
+@app.get("/physics/units/resolve/{symbol}/equivalents", tags=["physics"])
+def unit_equivalents(symbol: str, compatible: bool = Query(False), lang: str = Query("en")):
+    """Units with the same dimension as a unit; compatible=true adds prefixed units"""
+    entry = app.state.units.parse(symbol)
+    if entry is None or not entry["dimension"]:
+        detail = get_translation("Unknown unit: {symbol}", lang, symbol=symbol)
+        raise HTTPException(404, detail=detail)
+    dimension, units = app.state.dimensions.lookup(entry["dimension"], compatible)
+    return {"dimension": dimension, "units": units}
+
+@app.get("/physics/units/dimensions/{dimension}", tags=["physics"])
+def units_by_dimension(dimension: str, compatible: bool = Query(False), lang: str = Query("en")):
+    """Units with a dimension such as 'ML2T-3'; compatible=true adds prefixed units"""
+    try:
+        dimension, units = app.state.dimensions.lookup(dimension, compatible)
+    except ValueError:
+        detail = get_translation("Invalid dimension: {dimension}", lang, dimension=dimension)
+        raise HTTPException(400, detail=detail)
+    return {"dimension": dimension, "units": units}
+
+def render_units(units: List[str], fmt: Optional[str], lang: str) -> Dict[str, Any]:
+    if fmt is not None and fmt not in FORMATS:
+        detail = get_translation("Unknown format: {format}", lang, format=fmt)
+        raise HTTPException(400, detail=detail)
+    rendered = {}
+    for unit in units:
+        try:
+            snippets = app.state.renderer.render(unit)
+        except ValueError as e:
+            detail = get_translation("Invalid unit expression: {error}", lang, error=str(e))
+            raise HTTPException(400, detail=detail)
+        rendered[unit] = snippets[fmt] if fmt else snippets
+    return rendered
+
+@app.get("/physics/units/render", tags=["physics"])
+def render_unit(unit: str, format: Optional[str] = Query(None), lang: str = Query("en")):
+    """Render a unit expression (e.g. 'kN·m/s²') as LaTeX, MathML and Markdown"""
+    return {"unit": unit, "rendered": render_units([unit], format, lang)[unit]}
+
+class RenderRequest(BaseModel):
+    units: List[str]
+    format: Optional[str] = None
+
+@app.post("/physics/units/render", tags=["physics"])
+def render_unit_batch(body: RenderRequest, lang: str = Query("en")):
+    """Render many unit expressions in one request"""
+    return render_units(body.units, body.format, lang)
+
+# ---------- Quantity endpoints ----------
+class QuantityOperand(BaseModel):
+    magnitude: Any  # scalar or (nested) list
+    unit: str
+
+class QuantityOperation(BaseModel):
+    operation: str  # mul, div, add or sub, applied left to right
+    operands: List[QuantityOperand]
+    unit: Optional[str] = None  # result unit, default: simplified SI unit
+
+@app.post("/physics/units/quantities", tags=["physics"])
+def calculate_quantities(body: QuantityOperation, lang: str = Query("en")):
+    """Multiply, divide, add or subtract arrays of quantities with units"""
+    operands = [operand.model_dump() for operand in body.operands]
+    try:
+        return app.state.quantities.evaluate(body.operation, operands, body.unit).to_dict()
+    except ValueError as e:
+        detail = get_translation("Invalid quantity operation: {error}", lang, error=str(e))
+        raise HTTPException(400, detail=detail)
+
+# ---------- Formula endpoints ----------
+class FormulaEvaluation(BaseModel):
+    inputs: Dict[str, Any]  # scalars or (nested) lists per variable
+    units: Dict[str, str] = {}  # optional units per variable, default: declared units
+    result_unit: Optional[str] = None
+
+@app.post("/physics/formulas/{key}/evaluate", tags=["physics"])
+def evaluate_formula(key: str, body: FormulaEvaluation, lang: str = Query("en")):
+    """Evaluate a formula over arrays of inputs with unit conversion"""
+    try:
+        return app.state.formulas.evaluate(key, body.inputs, body.units, body.result_unit)
+    except KeyError:
+        detail = get_translation("Unknown formula: {formula}", lang, formula=key)
+        raise HTTPException(404, detail=detail)
+    except (TypeError, ValueError) as e:
+        detail = get_translation("Invalid formula input: {error}", lang, error=str(e))
+        raise HTTPException(400, detail=detail)
 
 # ---------- Root-Endpoint ----------
 @app.get("/")
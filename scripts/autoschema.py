@@ -1,13 +1,31 @@
 import os, sys
+import argparse
 import hashlib
 import json
 import logging
+import queue
 import sqlite3
+import threading
+import time
 import yaml
 import csv
+import warnings
+from collections.abc import MutableMapping
+from contextlib import closing, contextmanager
+from itertools import count, islice
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import Dict, List, Any, Optional, Union
-
+from typing import Callable, Dict, Iterable, Iterator, List, Any, Optional, Tuple, Union
+
+# Make the project root importable when run as 'python scripts/autoschema.py'
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+from api.bundle import BUNDLE_FILE, PAGE_SIZE, build_bundle, bundled_versions
+from api.columnar import FORMATS as COLUMNAR_FORMATS, columnar_path, write_columnar
+from api.datasets import deserialize, write_manifest
+from api.rendering import UnitRenderer
+from api.search import SEARCH_DB, SEARCH_TABLES, create_tables, tokenizers_for
+from api.snapshot import SNAPSHOT_META, read_header, snapshot_path, write_snapshot
+from api.units import UNIT_INDEX_DB, DimensionIndex, UnitRegistry, read_table
 
 # === Logging-configuration ===
 
@@ -104,6 +122,310 @@ except ImportError:
     else:
         sys.exit(1)
 
+from api.formulas import check_formula
+
+# === StageProfiler class ===
+class StageProfiler:
+    """
+    Records wall time, CPU time, rows and bytes per file and stage of a run.
+
+    Disabled by default; `stage()` then only yields a scratch record. With
+    `dump` set to 'cprofile' or 'pyinstrument', `file()` also writes a
+    profile per processed file to `dump_dir`.
+    """
+    DUMPS = ("cprofile", "pyinstrument")
+
+    def __init__(self, enabled: bool = False, dump: Optional[str] = None, dump_dir: Optional[Path] = None):
+        self.enabled = enabled
+        self.dump = dump
+        self.dump_dir = dump_dir
+        self.files: Dict[str, Dict[str, Dict]] = {}
+        self.started = datetime.now(timezone.utc)
+        self._wall, self._cpu = time.perf_counter(), time.process_time()
+        self._lock = threading.Lock()  # stages are also timed in pipeline threads
+
+    @contextmanager
+    def stage(self, name: str, stage: str):
+        """Times a stage; set 'rows' and 'bytes' on the yielded record."""
+        record = {"rows": 0, "bytes": 0}
+        if not self.enabled:
+            yield record
+            return
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield record
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+            with self._lock:
+                totals = self.files.setdefault(str(name), {}).setdefault(
+                    stage, {"wall": 0.0, "cpu": 0.0, "calls": 0, "rows": 0, "bytes": 0})
+                totals["wall"] += wall
+                totals["cpu"] += cpu
+                totals["calls"] += 1
+                totals["rows"] += record["rows"]
+                totals["bytes"] += record["bytes"]
+
+    @contextmanager
+    def file(self, name: str):
+        """Optional cProfile/pyinstrument dump around all work on one file."""
+        if not (self.enabled and self.dump):
+            yield
+            return
+        self.dump_dir.mkdir(parents=True, exist_ok=True)
+        target = self.dump_dir / str(name).replace("/", "__")
+        if self.dump == "cprofile":
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                profiler.dump_stats(f"{target}.prof")
+        else:
+            from pyinstrument import Profiler  # optional dependency
+            profiler = Profiler()
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                Path(f"{target}.html").write_text(profiler.output_html(), encoding="utf-8")
+
+    def report(self) -> Dict:
+        stages = {}
+        for file_stages in self.files.values():
+            for stage, totals in file_stages.items():
+                summed = stages.setdefault(stage, dict.fromkeys(totals, 0))
+                for key, value in totals.items():
+                    summed[key] += value
+        return {
+            "started": self.started.isoformat(),
+            "wall": time.perf_counter() - self._wall,
+            "cpu": time.process_time() - self._cpu,
+            "stages": stages,
+            "files": {
+                name: {"wall": sum(t["wall"] for t in file_stages.values()),
+                       "cpu": sum(t["cpu"] for t in file_stages.values()),
+                       "stages": file_stages}
+                for name, file_stages in self.files.items()
+            },
+        }
+
+    def write_report(self, path: Path, top: int = 5) -> Dict:
+        """Writes the JSON report and prints the slowest files and stages."""
+        report = self.report()
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+        print(f"\nProfile ({report['wall']:.3f} s wall, {report['cpu']:.3f} s CPU) written to {path}")
+        print("Slowest files:")
+        for name, totals in sorted(report["files"].items(), key=lambda item: -item[1]["wall"])[:top]:
+            slowest = max(totals["stages"].items(), key=lambda item: item[1]["wall"])[0]
+            print(f"  {totals['wall'] * 1000:9.2f} ms  {name} (mostly {slowest})")
+        print("Stages:")
+        for stage, totals in sorted(report["stages"].items(), key=lambda item: -item[1]["wall"])[:top]:
+            print(f"  {totals['wall'] * 1000:9.2f} ms  {stage}: {totals['rows']} rows, {totals['bytes']} bytes")
+        return report
+
+class Pipeline:
+    """
+    Overlaps reading, validation and writing of one file.
+
+    `map()` pulls chunks from the source in a reader thread, converts them in
+    a pool of validator threads and yields the results in source order to the
+    caller, which is the single writer holding the SQLite connection. Queues
+    are bounded: at most `workers + 2 * queue_chunks` chunks are in flight,
+    so memory stays capped however large the file is.
+    """
+    CHUNK_ROWS = 10_000
+
+    def __init__(self, workers: int = 2, queue_chunks: int = 4):
+        self.workers = max(1, workers)
+        self.queue_chunks = max(1, queue_chunks)
+
+    def map(self, fn: Callable, chunks: Iterable) -> Iterator:
+        tasks = queue.Queue(self.queue_chunks)
+        results = queue.Queue()
+        slots = threading.Semaphore(self.workers + 2 * self.queue_chunks)
+        stop = threading.Event()
+        failures = []
+
+        def put(target: queue.Queue, item) -> bool:
+            while not stop.is_set():
+                try:
+                    target.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def read():
+            source, end = iter(chunks), object()
+            try:
+                for position in count():
+                    while not slots.acquire(timeout=0.1):  # a free slot before the next chunk is read
+                        if stop.is_set():
+                            return
+                    chunk = next(source, end)
+                    if chunk is end or not put(tasks, (position, chunk)):
+                        return
+            except BaseException as e:
+                failures.append(e)
+                stop.set()
+            finally:
+                for _ in range(self.workers):
+                    put(tasks, None)
+
+        def validate():
+            while not stop.is_set():
+                try:
+                    item = tasks.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is None:
+                    results.put(None)
+                    return
+                try:
+                    results.put((item[0], fn(item[1])))
+                except BaseException as e:
+                    failures.append(e)
+                    stop.set()
+
+        threads = [threading.Thread(target=read, name="pipeline-read", daemon=True)]
+        threads += [threading.Thread(target=validate, name=f"pipeline-validate-{i}", daemon=True)
+                    for i in range(self.workers)]
+        for thread in threads:
+            thread.start()
+        try:
+            pending, position, finished = {}, 0, 0
+            while finished < self.workers and not stop.is_set():
+                try:
+                    item = results.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                if item is None:
+                    finished += 1
+                    continue
+                pending[item[0]] = item[1]
+                while position in pending:  # validators finish out of order, the writer gets source order
+                    yield pending.pop(position)
+                    position += 1
+                    slots.release()
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+        if failures:
+            raise failures[0]
+
+class VersionStore(MutableMapping):
+    """
+    Hashes of the processed data files, one SQLite row per file.
+
+    Lookups go through the primary key and every write is a single-row
+    upsert in its own transaction, so a run neither parses nor rewrites the
+    whole store and an interrupted run keeps all entries written before.
+    Behaves like the dict that was dumped to YAML before: {path: {'data_hash', 'schema_hash'}}.
+    """
+
+    def __init__(self, path: Path, legacy_yaml: Optional[Path] = None):
+        self.path = path
+        self.legacy_yaml = legacy_yaml
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def conn(self) -> sqlite3.Connection:
+        """Opened on first use, so merely creating a processor does not create the store."""
+        if self._conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            if not self.path.exists() and self.legacy_yaml is not None and self.legacy_yaml.exists():
+                if not self.import_yaml(self.legacy_yaml):
+                    # No store file yet, so the import is retried next run; this run's versions are not kept
+                    self._conn = self._connect(":memory:")
+                    return self._conn
+            self._conn = self._connect(self.path)
+        return self._conn
+
+    @staticmethod
+    def _connect(path) -> sqlite3.Connection:
+        # Used by one thread at a time, but watch mode may run in another thread than the caller
+        conn = sqlite3.connect(path, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS versions (path TEXT PRIMARY KEY, data_hash TEXT, schema_hash TEXT, updated TEXT)"
+        )
+        return conn
+
+    def __getitem__(self, key: str) -> Dict:
+        row = self.conn.execute("SELECT data_hash, schema_hash FROM versions WHERE path = ?", (key,)).fetchone()
+        if row is None:
+            raise KeyError(key)
+        return {"data_hash": row[0], "schema_hash": row[1]}
+
+    def __setitem__(self, key: str, entry: Dict):
+        self.conn.execute(
+            "INSERT INTO versions (path, data_hash, schema_hash, updated) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(path) DO UPDATE SET data_hash = excluded.data_hash, schema_hash = excluded.schema_hash, "
+            "updated = excluded.updated",
+            (key, entry.get("data_hash"), entry.get("schema_hash"), datetime.now(timezone.utc).isoformat())
+        )
+
+    def __delitem__(self, key: str):
+        if self.conn.execute("DELETE FROM versions WHERE path = ?", (key,)).rowcount == 0:
+            raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        return (row[0] for row in self.conn.execute("SELECT path FROM versions ORDER BY path").fetchall())
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM versions").fetchone()[0]
+
+    def import_yaml(self, yaml_path: Path) -> bool:
+        """
+        Creates the store from a version file of the former YAML format. The
+        store is built in a temporary file and only renamed into place once
+        the import succeeded; returns False if the YAML file cannot be read.
+        """
+        try:
+            with open(yaml_path, "r", encoding="utf-8") as f:
+                entries = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader)) or {}
+        except yaml.YAMLError as e:
+            logging.error(get_translation("Error parsing version file: {e}", e=str(e)))
+            return False
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.unlink(missing_ok=True)
+        conn = self._connect(tmp_path)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.executemany(
+                "INSERT INTO versions (path, data_hash, schema_hash, updated) VALUES (?, ?, ?, ?)",
+                [(key, (entry or {}).get("data_hash"), (entry or {}).get("schema_hash"),
+                  datetime.now(timezone.utc).isoformat()) for key, entry in entries.items()]
+            )
+            conn.execute("COMMIT")
+            conn.close()
+            tmp_path.replace(self.path)
+        finally:
+            conn.close()
+            tmp_path.unlink(missing_ok=True)
+        logging.info(get_translation("Imported {count} version entries from {file}", count=len(entries), file=yaml_path))
+        return True
+
+    def export_yaml(self, yaml_path: Path):
+        """Writes all entries as a human-readable YAML file (written to a temporary file, then renamed)."""
+        entries = {key: self[key] for key in self}
+        tmp_path = yaml_path.with_name(yaml_path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            yaml.dump(entries, f, allow_unicode=True)
+        tmp_path.replace(yaml_path)
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
 # === DataProcessor class ===
 class DataProcessor:
     """Base class for data processing."""
@@ -122,7 +444,15 @@ class DataProcessor:
         self.schema_dir = root_dir / schema_dir
         self.db_dir = root_dir / db_dir
         self.version_file = root_dir / version_file  # Always reference the root directory
-        self.version_data = self._load_version_data()       
+        self.version_data = self._load_version_data()
+        self._pending_versions: Dict[str, Dict] = {}  # recorded once a file is processed
+        self.profiler = StageProfiler()  # replaced by an enabled profiler with --profile
+        self.pipeline: Optional[Pipeline] = None  # chunks are validated in worker threads with --pipeline
+        self._dependency_cache: Dict[Path, Tuple[int, List[str]]] = {}  # by schema path, with its mtime
+        self.columnar: Optional[str] = None  # npz, arrow or parquet copy next to each database with --columnar
+        self.snapshots = False  # mmap snapshot per served dataset for the API workers with --snapshots
+        self.bundle: Optional[Path] = None  # all datasets in one read-optimized database with --bundle
+        self.bundle_page_size = PAGE_SIZE
 
 
         # Create directories if they don't exist
@@ -133,23 +463,14 @@ class DataProcessor:
         self.db_dir.mkdir(parents=True, exist_ok=True)
         print(f"Database directory created or exists: {self.db_dir}")
 
-    def _load_version_data(self) -> Dict:
-        """Load version control data."""
-        if self.version_file.exists():
-            try:
-                with open(self.version_file, "r", encoding="utf-8") as f:
-                    return yaml.safe_load(f) or {}
-            except FileNotFoundError:
-                logging.error(get_translation("Version control file not found: {file}", file=self.version_file))
-            except yaml.YAMLError as e:
-                logging.error(get_translation("Error parsing version file: {e}", e=str(e)))
-            except Exception as e:
-                logging.error(get_translation("Unexpected error reading version file: {e}", e=str(e)))
-        return {}
-
-    def _save_version_data(self):
-        with open(self.version_file, "w", encoding="utf-8") as f:
-            yaml.dump(self.version_data, f, allow_unicode=True)
+    def _load_version_data(self) -> VersionStore:
+        """
+        Opens the version store next to the version file, e.g. '.version_control.db'
+        for '.version_control.yaml'. A YAML version file is imported on first use.
+        """
+        if self.version_file.suffix in (".yaml", ".yml"):
+            return VersionStore(self.version_file.with_suffix(".db"), legacy_yaml=self.version_file)
+        return VersionStore(self.version_file)
 
     def find_data_files(self) -> List[Path]:
         """Find all supported data files."""
@@ -158,23 +479,177 @@ class DataProcessor:
             files.extend(self.data_dir.rglob(f"*{suffix}"))
         return files
 
-    def process_all(self):
-        """Process all data files."""
+    def process_all(self, only: Optional[Iterable[Path]] = None):
+        """
+        Process all data files. With `only`, just these files and the datasets
+        depending on them are checked; the others are not hashed.
+        """
+        self._reset_caches()
+        only = set(only) if only is not None else None
         files = self.find_data_files()
         #print("Files found for processing:")
         for file in files:
             print(f"  - {file}")  # Debug: Print all files to be processed
+        dependencies = {data_path: self._dependencies(data_path) for data_path in files}
+        processed = []
+        for data_path in self._order_by_dependencies(files, dependencies):
+            # Dependent datasets are re-validated when a dataset they depend on changed
+            changed_dependencies = set(dependencies[data_path]) & {self._dataset_name(p) for p in processed}
+            if only is not None and data_path not in only and not changed_dependencies:
+                continue
+            if self._needs_processing(data_path) or changed_dependencies:
+                with self.profiler.file(self._profile_name(data_path)):
+                    self._process_file(data_path)
+                processed.append(data_path)
+                # Recorded only once the file was written; a failed file keeps its old hash and is retried
+                key = self._profile_name(data_path)
+                if key in self._pending_versions:
+                    self.version_data[key] = self._pending_versions.pop(key)
+        with self.profiler.stage("<indexes>", "build_indexes"):
+            self.build_indexes(processed)
+        self.export_columnar(files, processed)
+        with self.profiler.stage("<manifest>", "write_manifest"):
+            self.write_manifest(files)
+
+    def _reset_caches(self):
+        """Drops what earlier runs cached from the datasets, which may have changed since."""
+        self._referenced_cache = {}
+        self._pending_versions.clear()  # hashes of files a failed run did not write
+
+    # --- Watch mode ---
+    def watch(self, interval: float = 1.0, debounce: float = 0.5, stop: Optional[threading.Event] = None):
+        """
+        Processes everything once, then polls data/ and schemas/ every `interval`
+        seconds and reprocesses the files that changed, until `stop` is set.
+        A change is handled once the files were unchanged for `debounce` seconds,
+        so a burst of saves leads to one run.
+        """
+        stop = stop or threading.Event()
+        self.process_all()
+        known = self._snapshot()
+        logging.info(get_translation("Watching {data} and {schemas} for changes",
+                                     data=self.data_dir, schemas=self.schema_dir))
+        while not stop.wait(interval):
+            current = self._snapshot()
+            if current == known:
+                continue
+            while not stop.wait(debounce):
+                settled = self._snapshot()
+                if settled == current:
+                    break
+                current = settled
+            if stop.is_set():
+                break
+            changed = {path for path in known.keys() | current.keys() if known.get(path) != current.get(path)}
+            known = current
+            try:
+                self.process_changes(changed)
+            except Exception as e:
+                # A broken edit must not end the watcher; the file is processed again once it changes
+                logging.error(get_translation("Error processing changes: {error}", error=e))
+
+    def _snapshot(self) -> Dict[Path, Tuple[int, int]]:
+        """Modification time and size of every data and schema file."""
+        paths = self.find_data_files() + list(self.schema_dir.rglob("*_schema.*"))
+        snapshot = {}
+        for path in paths:
+            try:
+                stat = path.stat()
+            except FileNotFoundError:  # deleted while listing
+                continue
+            snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def process_changes(self, changed: Iterable[Path]):
+        """Reprocesses the data files behind changed data or schema files, and the datasets depending on them."""
+        by_schema = {self._data_to_schema_path(p): p for p in self.find_data_files()}
+        affected = set()
+        for path in changed:
+            if path in by_schema:
+                affected.add(by_schema[path])
+            elif path.is_relative_to(self.data_dir) and not path.exists():
+                # Deleted; the manifest and search index drop it, a re-added file is processed again
+                self.version_data.pop(self._profile_name(path), None)
+            elif path.is_relative_to(self.data_dir):
+                affected.add(path)
+        logging.info(get_translation("Changed files: {paths}", paths=", ".join(sorted(str(p) for p in changed))))
+        self.process_all(only=affected)
+
+    def _profile_name(self, data_path: Path) -> str:
+        return str(data_path.relative_to(self.data_dir)).replace("\\", "/")
+
+    def _map_chunks(self, fn: Callable, chunks: Iterable) -> Iterator:
+        """`fn` over the chunks, in the pipeline's threads if enabled; results come in source order."""
+        return self.pipeline.map(fn, chunks) if self.pipeline is not None else map(fn, chunks)
+
+    def _dataset_name(self, data_path: Path) -> str:
+        """Dataset name as used in schemas and routes, e.g. 'physics/units/prefixes'."""
+        relative_path = data_path.relative_to(self.data_dir)
+        return str(relative_path.with_name(relative_path.stem.replace("_data", ""))).replace("\\", "/")
+
+    def _dependencies(self, data_path: Path) -> List[str]:
+        """Datasets listed in the schema's 'metadata.depends_on' or referenced by foreign keys."""
+        schema_path = self._data_to_schema_path(data_path)
+        if not schema_path.exists():
+            return []
+        # Cached by modification time, so watch mode does not parse every schema on each change
+        mtime = schema_path.stat().st_mtime_ns
+        cached = self._dependency_cache.get(schema_path)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        schema = self._load_schema(schema_path) or {}
+        referenced = [f["foreign_key"]["dataset"] for f in schema.get("fields", []) if f.get("foreign_key")]
+        dependencies = schema.get("metadata", {}).get("depends_on", []) + referenced
+        self._dependency_cache[schema_path] = (mtime, dependencies)
+        return dependencies
+
+    def _order_by_dependencies(self, files: List[Path], dependencies: Dict[Path, List[str]]) -> List[Path]:
+        """Orders files so that every dataset is processed after the datasets it depends on."""
+        by_name = {self._dataset_name(data_path): data_path for data_path in files}
+        ordered = []
+
+        def visit(data_path: Path, stack: tuple):
+            if data_path in ordered:
+                return
+            if data_path in stack:
+                raise ValueError(get_translation("Circular dataset dependency: {path}", path=data_path))
+            for name in dependencies[data_path]:
+                if name in by_name:
+                    visit(by_name[name], stack + (data_path,))
+            ordered.append(data_path)
+
         for data_path in files:
-            if self._needs_processing(data_path):
-                self._process_file(data_path)
-        self._save_version_data()
+            visit(data_path, ())
+        return ordered
+
+    def build_indexes(self, processed: List[Path]):
+        """Hook for derived indexes built after the datasets are written."""
+        pass
+
+    def export_columnar(self, files: List[Path], processed: List[Path]):
+        """Hook for the columnar copies written next to the databases."""
+        pass
+
+    def write_manifest(self, files: List[Path]):
+        """Hook for the route manifest written after all datasets are processed."""
+        pass
+
+    def export_snapshots(self, datasets: List[Dict]):
+        """Hook for the snapshots of the datasets listed in the manifest."""
+        pass
+
+    def export_bundle(self, datasets: List[Dict]):
+        """Hook for the database bundle of the datasets listed in the manifest."""
+        pass
 
     def _needs_processing(self, data_path: Path) -> bool:
         """Check, if file has to be processed."""
-        data_hash = self._file_hash(data_path)
         schema_path = self._data_to_schema_path(data_path)
         schema_exists = schema_path.exists()
-        schema_hash = self._file_hash(schema_path) if schema_exists else None
+        with self.profiler.stage(self._profile_name(data_path), "hash") as record:
+            data_hash = self._file_hash(data_path)
+            schema_hash = self._file_hash(schema_path) if schema_exists else None
+            record["bytes"] = data_path.stat().st_size + (schema_path.stat().st_size if schema_exists else 0)
 
         key = str(data_path.relative_to(self.data_dir)).replace("\\", "/")
         version_entry = self.version_data.get(key, {})
@@ -182,9 +657,11 @@ class DataProcessor:
         # Debugging-output
         print(f"Checking {data_path.name}: Schema exists: {schema_exists}, hash match: {version_entry.get('data_hash') == data_hash}")
 
-        # Force processing if schema is missing or hashes differ
-        if not schema_exists or version_entry.get('data_hash') != data_hash or version_entry.get('schema_hash') != schema_hash:
-            self.version_data[key] = {'data_hash': data_hash, 'schema_hash': schema_hash}
+        # Force processing if schema or database is missing or hashes differ
+        db_exists = self._data_to_db_path(data_path).exists()
+        if not schema_exists or not db_exists or version_entry.get('data_hash') != data_hash or version_entry.get('schema_hash') != schema_hash:
+            # Recorded after the file was processed, so a failed run processes it again
+            self._pending_versions[key] = {'data_hash': data_hash, 'schema_hash': schema_hash}
             return True
         return False
 
@@ -310,58 +787,771 @@ class SchemaHandler(DataProcessor):
 # === DatabaseHandler class ===
 class DatabaseHandler(DataProcessor):
     """Handling of databases."""
+    MIGRATION_BATCH_ROWS = 10_000
+
     def create_table(self, schema: Dict, db_path: Path):
-        """Defines a table according schema."""
-        # Ordner für die DB-Datei erstellen
-        db_path.parent.mkdir(parents=True, exist_ok=True) 
+        """
+        Defines a table according schema, or migrates the existing table to it.
 
-        with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
+        New columns are added in place and indexes (fields with 'index: true')
+        are created or dropped. Changed or removed columns and primary keys
+        rebuild the table through a shadow copy that is swapped in atomically.
+        """
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        table = schema["table"]
 
-            columns = []
-            for field in schema["fields"]:
-                col_def = f"{field['name']} {field['type']}"
-                if field.get("primary_key"):
-                    col_def += " PRIMARY KEY"
-                columns.append(col_def)
+        conn = sqlite3.connect(db_path, isolation_level=None)
+        try:
+            live = self._live_columns(conn, table)
+            if not live:
+                conn.execute(f"CREATE TABLE IF NOT EXISTS {table} ({', '.join(self._column_defs(schema))})")
+            else:
+                self._migrate_table(conn, schema, live)
+            self._sync_indexes(conn, schema)
+        finally:
+            conn.close()
 
-            create_sql = f"CREATE TABLE IF NOT EXISTS {schema['table']} ({', '.join(columns)})"
-            cursor.execute(create_sql)
-            conn.commit()
+    def _column_defs(self, schema: Dict) -> List[str]:
+        columns = []
+        for field in schema["fields"]:
+            col_def = f"{field['name']} {field['type']}"
+            if field.get("primary_key"):
+                col_def += " PRIMARY KEY"
+            columns.append(col_def)
+        return columns
+
+    def _live_columns(self, conn: sqlite3.Connection, table: str) -> Dict[str, Tuple[str, bool]]:
+        """Declared type and primary key flag per column of the table in the database."""
+        return {row[1]: (row[2], bool(row[5])) for row in conn.execute(f"PRAGMA table_info({table})")}
+
+    def _migrate_table(self, conn: sqlite3.Connection, schema: Dict, live: Dict[str, Tuple[str, bool]]):
+        """Applies the difference between the live table and the schema at the lowest cost."""
+        table = schema["table"]
+        wanted = {field["name"]: (field["type"], bool(field.get("primary_key"))) for field in schema["fields"]}
+        added = [field for field in schema["fields"] if field["name"] not in live]
+        changed = [name for name in wanted if name in live and live[name] != wanted[name]]
+        removed = [name for name in live if name not in wanted]
+        if not (added or changed or removed):
+            return
+
+        if not changed and not removed and not any(field.get("primary_key") for field in added):
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for field in added:
+                    conn.execute(f"ALTER TABLE {table} ADD COLUMN {field['name']} {field['type']}")
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            logging.info(get_translation(
+                "Added columns to {table}: {columns}", table=table, columns=", ".join(f["name"] for f in added)
+            ))
+            return
+
+        self._rebuild_table(conn, schema, [name for name in wanted if name in live])
+        logging.info(get_translation(
+            "Rebuilt table {table} (changed: {changed}; removed: {removed}; added: {added})", table=table,
+            changed=", ".join(changed) or "-", removed=", ".join(removed) or "-",
+            added=", ".join(f["name"] for f in added) or "-"
+        ))
+
+    def _rebuild_table(self, conn: sqlite3.Connection, schema: Dict, kept: List[str]):
+        """
+        Copies the kept columns into a shadow table in batches, each committed
+        on its own, then swaps it in with one transaction. Readers see the old
+        table until the swap; values take the new column types by affinity.
+        """
+        table, shadow = schema["table"], f"{schema['table']}__migration"
+        conn.execute(f"DROP TABLE IF EXISTS {shadow}")
+        conn.execute(f"CREATE TABLE {shadow} ({', '.join(self._column_defs(schema))})")
+        columns = ", ".join(kept)
+        last = 0
+        while kept:
+            upper = conn.execute(
+                f"SELECT max(rowid) FROM (SELECT rowid FROM {table} WHERE rowid > ? ORDER BY rowid LIMIT ?)",
+                (last, self.MIGRATION_BATCH_ROWS)
+            ).fetchone()[0]
+            if upper is None:
+                break
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                f"INSERT OR REPLACE INTO {shadow} ({columns}) SELECT {columns} FROM {table} "
+                f"WHERE rowid > ? AND rowid <= ? ORDER BY rowid", (last, upper)
+            )
+            conn.execute("COMMIT")
+            last = upper
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(f"DROP TABLE {table}")
+            conn.execute(f"ALTER TABLE {shadow} RENAME TO {table}")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _sync_indexes(self, conn: sqlite3.Connection, schema: Dict):
+        """Creates the indexes of fields marked 'index: true' and drops those no longer marked."""
+        table = schema["table"]
+        wanted = {f"idx_{table}_{field['name']}": field["name"] for field in schema["fields"] if field.get("index")}
+        live = {row[0] for row in conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = ? AND name LIKE ?", (table, f"idx_{table}_%")
+        )}
+        for name in live - wanted.keys():
+            conn.execute(f"DROP INDEX {name}")
+        for name, column in wanted.items():
+            if name not in live:
+                conn.execute(f"CREATE INDEX {name} ON {table} ({column})")
 
     def insert_data(self, data: List[Dict], schema: Dict, db_path: Path):
         """Insert data in table."""
         with sqlite3.connect(db_path) as conn:
-            cursor = conn.cursor()
-
-            # Konvertiere Tensoren zu NumPy-Arrays
-            processed_data = []
-            for entry in data:
-                processed_entry = {}
-                for field in schema["fields"]:
-                    value = entry.get(field["name"])
-                    if field["type"] in ["VEC", "MATRIX", "TENSOR", "QUATERNION"]:
-                        # Validierung vor Serialisierung
-                        processed_entry[field["name"]] = np.array(value).tobytes()
-                    else:
-                        processed_entry[field["name"]] = value
-                processed_data.append(processed_entry)
-                
-            field_names = [f["name"] for f in schema["fields"]]
-            placeholders = ", ".join(["?"] * len(field_names))
-            insert_sql = f"INSERT OR REPLACE INTO {schema['table']} ({', '.join(field_names)}) VALUES ({placeholders})"
-
-            # Batch-Insert für Performance
-            entries = []
-            for processed_entry in processed_data:
-                entries.append([processed_entry.get(name) for name in field_names])
-            
-            cursor.executemany(insert_sql, entries)
+            # Replace the previous contents in the same transaction, so readers see old or new rows
+            conn.execute(f"DELETE FROM {schema['table']}")
+            conn.executemany(self._insert_sql(schema), self._insert_rows(data, schema))
             conn.commit()
 
+    def _write_chunks(self, name: str, data_path: Path, schema: Dict, results: Iterable) -> int:
+        """
+        Replaces the table's rows with the converted chunks in one transaction
+        and returns the number of rows written. `results` yields (rows, errors)
+        with errors as (entry, message) pairs. Without a valid row the
+        database is left as it was.
+        """
+        db_path = self._data_to_db_path(data_path)
+        existed = db_path.exists()
+        self.create_table(schema, db_path)
+        insert_sql = self._insert_sql(schema)
+        written, rejected = 0, []
+        with closing(sqlite3.connect(db_path)) as conn, conn:
+            # Readers see the old or the new rows, never a mix
+            conn.execute(f"DELETE FROM {schema['table']}")
+            for rows, errors in results:
+                for entry, error in errors:
+                    logging.error(get_translation(
+                        "Validation error in file {path}, entry {entry}: {error}",
+                        path=data_path, entry=entry, error=error
+                    ))
+                rejected.extend(errors)
+                with self.profiler.stage(name, "insert") as record:
+                    conn.executemany(insert_sql, rows)
+                    record["rows"] = len(rows)
+                written += len(rows)
+            if not written:
+                conn.rollback()
+
+        if rejected:
+            print(f"\nValidation errors found in {data_path}:")
+            for entry, error in rejected:
+                print(f"  Entry: {entry}\n    Error: {error}")
+        if not written:
+            if not existed:
+                db_path.unlink()
+            logging.warning(get_translation("No valid entries to insert for {path}", path=data_path))
+        return written
+
+    def _insert_sql(self, schema: Dict) -> str:
+        field_names = [f["name"] for f in schema["fields"]]
+        placeholders = ", ".join(["?"] * len(field_names))
+        return f"INSERT OR REPLACE INTO {schema['table']} ({', '.join(field_names)}) VALUES ({placeholders})"
+
+    def _insert_rows(self, data: List[Dict], schema: Dict) -> List[list]:
+        """Entries as parameter rows in field order; tensors become float64 bytes, JSON becomes text."""
+        rows = []
+        for entry in data:
+            row = []
+            for field in schema["fields"]:
+                value = entry.get(field["name"])
+                if field["type"] in ["VEC", "MATRIX", "TENSOR", "QUATERNION"] and value is not None:
+                    # float64 like every reader (api.datasets.deserialize), also for integer input
+                    row.append(np.asarray(value, dtype=np.float64).tobytes())
+                elif field["type"] == "JSON" and value is not None:
+                    row.append(json.dumps(value, ensure_ascii=False))
+                else:
+                    row.append(value)
+            rows.append(row)
+        return rows
+
+# === IndexHandler class ===
+class IndexHandler(DataProcessor):
+    """Builds derived indexes across datasets at ingest time."""
+    UNIT_DATASETS = "physics/units/"
+
+    def build_indexes(self, processed: List[Path]):
+        """Rebuild the unit index if a unit dataset changed or the index is missing."""
+        keys = [str(p.relative_to(self.data_dir)).replace("\\", "/") for p in processed]
+        unit_index_path = self.db_dir / UNIT_INDEX_DB
+        if not unit_index_path.exists() or any(k.startswith(self.UNIT_DATASETS) for k in keys):
+            self.build_unit_index(unit_index_path)
+        self.build_search_index(self.db_dir / SEARCH_DB, processed)
+
+    def build_unit_index(self, db_path: Path):
+        """Index all (prefixed) units by their normalized dimension vector and pre-render them."""
+        registry = UnitRegistry.from_db(self.db_dir)
+        rows = DimensionIndex.build_rows(registry)
+        self._replace_table(db_path, "dimension_index", [
+            "dimension TEXT", "symbol TEXT PRIMARY KEY", "name_en TEXT", "unit TEXT",
+            "base INTEGER", "exponent INTEGER", "coherent BOOLEAN"
+        ], rows, indexes=["dimension"])
+        logging.info(get_translation("Built dimension index with {count} units", count=len(rows)))
+
+        renderings = UnitRenderer(registry).build_rows()
+        self._replace_table(db_path, "renderings", [
+            "symbol TEXT PRIMARY KEY", "latex TEXT", "mathml TEXT", "markdown TEXT"
+        ], renderings)
+        logging.info(get_translation("Pre-rendered {count} units", count=len(renderings)))
+
+    def build_search_index(self, db_path: Path, processed: List[Path]):
+        """
+        Updates the full-text index for the processed datasets only.
+
+        Every TEXT column is indexed with the dataset and key (primary key, else
+        first field) of its row. The whole index is rebuilt when it is missing
+        or the languages require different tokenizers.
+        """
+        files = self.find_data_files()
+        languages_path = self.db_dir / "utilities" / "languages.db"
+        languages = read_table(languages_path, "languages") if languages_path.exists() else []
+        tables = tokenizers_for(languages)
+
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(db_path, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute("CREATE TABLE IF NOT EXISTS search_meta (name TEXT PRIMARY KEY, value TEXT)")
+            stored = conn.execute("SELECT value FROM search_meta WHERE name = 'tokenizers'").fetchone()
+            if stored is None or stored[0] != json.dumps(tables, sort_keys=True):
+                for table in SEARCH_TABLES:
+                    conn.execute(f"DROP TABLE IF EXISTS {table}")
+                conn.execute("INSERT OR REPLACE INTO search_meta VALUES ('tokenizers', ?)", (json.dumps(tables, sort_keys=True),))
+                processed = files
+            create_tables(conn, tables)
+
+            # Drop entries of changed and deleted datasets, then index the changed ones
+            current = {self._dataset_name(p) for p in files}
+            changed = {self._dataset_name(p) for p in processed}
+            for table in tables:
+                indexed = {row[0] for row in conn.execute(f"SELECT DISTINCT dataset FROM {table}")}
+                for name in (indexed - current) | (indexed & changed):
+                    conn.execute(f"DELETE FROM {table} WHERE dataset = ?", (name,))
+
+            count = 0
+            for data_path in processed:
+                entries = self._search_entries(data_path)
+                for table in tables:
+                    conn.executemany(f"INSERT INTO {table} (dataset, key, field, text) VALUES (?, ?, ?, ?)", entries)
+                count += len(entries)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+        if processed:
+            logging.info(get_translation("Indexed {count} text values for search", count=count))
+
+    def _search_entries(self, data_path: Path) -> List[tuple]:
+        """(dataset, key, field, text) for every non-empty TEXT value of a dataset."""
+        db_path = self._data_to_db_path(data_path)
+        schema_path = self._data_to_schema_path(data_path)
+        if not db_path.exists() or not schema_path.exists():
+            return []
+        schema = self._load_schema(schema_path)
+        fields = schema.get("fields", [])
+        if not fields:
+            return []
+        key_field = next((f["name"] for f in fields if f.get("primary_key")), fields[0]["name"])
+        text_fields = [f["name"] for f in fields if f["type"] == "TEXT"]
+
+        name = self._dataset_name(data_path)
+        entries = []
+        for row in read_table(db_path, schema["table"]):
+            for field in text_fields:
+                if row.get(field):
+                    entries.append((name, row.get(key_field), field, row[field]))
+        return entries
+
+    def _replace_table(self, db_path: Path, table: str, columns: List[str], rows: List[Dict], indexes: List[str] = ()):
+        """(Re)creates a derived table in one transaction, so readers never see it half-built."""
+        db_path.parent.mkdir(parents=True, exist_ok=True)
+        names = [column.split()[0] for column in columns]
+        insert_sql = f"INSERT INTO {table} ({', '.join(names)}) VALUES ({', '.join(['?'] * len(names))})"
+
+        conn = sqlite3.connect(db_path, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+            conn.execute(f"CREATE TABLE {table} ({', '.join(columns)})")
+            for column in indexes:
+                conn.execute(f"CREATE INDEX idx_{table}_{column} ON {table} ({column})")
+            conn.executemany(insert_sql, [[row.get(name) for name in names] for row in rows])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+# === ManifestHandler class ===
+class ManifestHandler(DataProcessor):
+    """Writes the route manifest the API server registers its endpoints from."""
+
+    def write_manifest(self, files: List[Path]):
+        """Lists every dataset with a database, its schema, hashes and row count."""
+        datasets = []
+        for data_path in sorted(files):
+            db_path = self._data_to_db_path(data_path)
+            schema_path = self._data_to_schema_path(data_path)
+            if not db_path.exists() or not schema_path.exists():
+                continue
+            schema = self._load_schema(schema_path)
+            try:
+                with sqlite3.connect(db_path) as conn:
+                    row_count = conn.execute(f"SELECT COUNT(*) FROM {schema['table']}").fetchone()[0]
+            except sqlite3.OperationalError as e:
+                logging.warning(get_translation("Skipping {path} in manifest: {error}", path=data_path, error=str(e)))
+                continue
+
+            key = str(data_path.relative_to(self.data_dir)).replace("\\", "/")
+            version_entry = self.version_data.get(key, {})
+            columnar = next((path for path in (columnar_path(db_path, fmt) for fmt in COLUMNAR_FORMATS)
+                             if path.exists()), None)
+            datasets.append({
+                "dataset": self._dataset_name(data_path),
+                "table": schema["table"],
+                "db_path": str(db_path.relative_to(self.db_dir)).replace("\\", "/"),
+                "schema": str(schema_path.relative_to(self.schema_dir)).replace("\\", "/"),
+                "data_hash": version_entry.get("data_hash") or self._file_hash(data_path),
+                "schema_hash": version_entry.get("schema_hash") or self._file_hash(schema_path),
+                "row_count": row_count,
+                "private": schema.get("metadata", {}).get("private", False),
+                "columnar_path": str(columnar.relative_to(self.db_dir)).replace("\\", "/") if columnar else None,
+                "fields": [{"name": f["name"], "type": f["type"], "type_params": f.get("type_params") or []}
+                           for f in schema["fields"]],
+            })
+            if self.foreign_keys(schema):
+                datasets.append(self._view_manifest_entry(data_path, schema, datasets[-1]))
+        self.export_snapshots(datasets)
+        write_manifest(self.db_dir, datasets)
+        self.export_bundle(datasets)
+        logging.info(get_translation("Wrote route manifest with {count} datasets", count=len(datasets)))
+
+# === JoinHandler class ===
+class JoinHandler(DataProcessor):
+    """
+    Materializes joined views along foreign keys declared in schemas, e.g.
+
+        - name: languages
+          type: TEXT
+          foreign_key: {dataset: utilities/languages, field: code, separator: ","}
+
+    The view '<table>_joined' replaces each foreign key value by the full
+    referenced records (JSON) and is served as '<dataset>/joined'.
+    """
+    JOINED_VIEW = "joined"
+
+    def foreign_keys(self, schema: Dict) -> List[Dict]:
+        return [field for field in schema.get("fields", []) if field.get("foreign_key")]
+
+    def _split_reference(self, value: Any, foreign_key: Dict) -> List[str]:
+        if value is None or value == "":
+            return []
+        separator = foreign_key.get("separator")
+        return [v.strip() for v in str(value).split(separator) if v.strip()] if separator else [str(value)]
+
+    def _referenced_rows(self, foreign_key: Dict) -> Dict[str, Dict]:
+        """Rows of the referenced dataset by key, read once per processed file."""
+        if getattr(self, "_referenced_cache", None) is None:
+            self._referenced_cache = {}
+        cache = self._referenced_cache
+        name = foreign_key["dataset"]
+        if name not in cache:
+            data_path = next((p for p in self.find_data_files() if self._dataset_name(p) == name), None)
+            if data_path is None:
+                raise ValueError(get_translation("Referenced dataset not found: {dataset}", dataset=name))
+            schema = self._load_schema(self._data_to_schema_path(data_path))
+            rows = read_table(self._data_to_db_path(data_path), schema["table"])
+            cache[name] = {
+                str(row[foreign_key["field"]]): {k: deserialize(v) for k, v in row.items()} for row in rows
+            }
+        return cache[name]
+
+    def validate_foreign_keys(self, entry: Dict, schema: Dict):
+        """Every foreign key value must exist in the referenced dataset."""
+        for field in self.foreign_keys(schema):
+            foreign_key = field["foreign_key"]
+            referenced = self._referenced_rows(foreign_key)
+            missing = [v for v in self._split_reference(entry.get(field["name"]), foreign_key) if v not in referenced]
+            if missing:
+                raise ValueError(get_translation(
+                    "Field '{field}' references unknown {dataset} values: {values}",
+                    field=field["name"], dataset=foreign_key["dataset"], values=", ".join(missing)
+                ))
+
+    def build_joined_view(self, schema: Dict, db_path: Path):
+        """(Re)creates the joined view of a dataset, or drops it if no foreign keys are declared."""
+        table = f"{schema['table']}_{self.JOINED_VIEW}"
+        foreign_keys = self.foreign_keys(schema)
+        if not foreign_keys:
+            with sqlite3.connect(db_path) as conn:
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+            return
+
+        rows = read_table(db_path, schema["table"])
+        for field in foreign_keys:
+            foreign_key = field["foreign_key"]
+            referenced = self._referenced_rows(foreign_key)
+            for row in rows:
+                values = self._split_reference(row.get(field["name"]), foreign_key)
+                row[field["name"]] = json.dumps([referenced[v] for v in values if v in referenced], ensure_ascii=False)
+
+        columns = []
+        for field in schema["fields"]:
+            column = f"{field['name']} {'JSON' if field.get('foreign_key') else field['type']}"
+            columns.append(column + (" PRIMARY KEY" if field.get("primary_key") else ""))
+        self._replace_table(db_path, table, columns, rows)
+        logging.info(get_translation("Built joined view {table} with {count} rows", table=table, count=len(rows)))
+
+    def _view_manifest_entry(self, data_path: Path, schema: Dict, dataset_entry: Dict) -> Dict:
+        """Manifest entry of the joined view; its hash covers the materialized rows."""
+        table = f"{schema['table']}_{self.JOINED_VIEW}"
+        rows = read_table(self._data_to_db_path(data_path), table)
+        content = json.dumps(rows, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8")
+        return dict(
+            dataset_entry,
+            dataset=f"{dataset_entry['dataset']}/{self.JOINED_VIEW}",
+            table=table,
+            data_hash=hashlib.sha256(content).hexdigest(),
+            row_count=len(rows),
+            columnar_path=None,  # only the table itself is exported
+            fields=None,  # column types are read from the view
+        )
+
+# === ColumnarHandler class ===
+class ColumnarHandler(DataProcessor):
+    """Writes a columnar copy of each table next to its database, served to bulk readers as a file."""
+
+    def export_columnar(self, files: List[Path], processed: List[Path]):
+        """
+        Writes the copy in the selected format for processed files and files without one.
+        Without a format, copies of processed files are removed, as they are outdated.
+        """
+        for data_path in files:
+            db_path = self._data_to_db_path(data_path)
+            schema_path = self._data_to_schema_path(data_path)
+            if not db_path.exists() or not schema_path.exists():
+                continue
+            for fmt in COLUMNAR_FORMATS:
+                if fmt != self.columnar and (self.columnar or data_path in processed):
+                    columnar_path(db_path, fmt).unlink(missing_ok=True)
+            if self.columnar is None:
+                continue
+            target = columnar_path(db_path, self.columnar)
+            if data_path not in processed and target.exists():
+                continue
+            name = self._profile_name(data_path)
+            try:
+                with self.profiler.stage(name, "columnar") as record:
+                    write_columnar(db_path, self._load_schema(schema_path), self.columnar)
+                    record["bytes"] = target.stat().st_size
+            except (sqlite3.Error, ValueError, OSError) as e:
+                target.unlink(missing_ok=True)
+                logging.error(get_translation("Columnar export of {path} failed: {error}", path=data_path, error=str(e)))
+
+# === SnapshotHandler class ===
+class SnapshotHandler(DataProcessor):
+    """Writes the mmap snapshots (api.snapshot) the API workers share instead of each decoding the tables."""
+
+    def export_snapshots(self, datasets: List[Dict]):
+        """
+        Writes a snapshot for every manifest entry whose snapshot is missing or
+        was built from other hashes, and lists it as 'snapshot_path'.
+        Without --snapshots, existing snapshots are removed, as they would go stale.
+        """
+        for entry in datasets:
+            db_path = self.db_dir / entry["db_path"]
+            path = snapshot_path(db_path, entry["table"])
+            if not self.snapshots:
+                path.unlink(missing_ok=True)
+                continue
+            meta = {name: entry[name] for name in SNAPSHOT_META}
+            header = read_header(path)
+            if header is None or header.get("meta") != meta:
+                try:
+                    with self.profiler.stage(entry["dataset"], "snapshot") as record:
+                        with closing(sqlite3.connect(db_path)) as conn:
+                            write_snapshot(path, conn, entry["table"], meta, entry.get("fields"))
+                        record["bytes"] = path.stat().st_size
+                except (sqlite3.Error, ValueError, OSError) as e:
+                    logging.error(get_translation("Snapshot of {dataset} failed: {error}",
+                                                  dataset=entry["dataset"], error=str(e)))
+                    continue
+            entry["snapshot_path"] = str(path.relative_to(self.db_dir)).replace("\\", "/")
+
+# === BundleHandler class ===
+class BundleHandler(DataProcessor):
+    """Merges the served datasets into one vacuumed, analyzed database (api.bundle)."""
+
+    def export_bundle(self, datasets: List[Dict]):
+        """Rebuilds the bundle if a dataset was added, removed or changed since it was built."""
+        if self.bundle is None:
+            return
+        current = {entry["dataset"]: (entry["data_hash"], entry["schema_hash"], entry["row_count"]) for entry in datasets}
+        if bundled_versions(self.bundle) == current:
+            return
+        schemas = {}
+        for entry in datasets:
+            schema_path = self.schema_dir / entry["schema"]
+            if not entry["dataset"].endswith(f"/{self.JOINED_VIEW}") and schema_path.exists():
+                schemas[entry["dataset"]] = self._load_schema(schema_path)
+        try:
+            with self.profiler.stage("<bundle>", "build_bundle") as record:
+                build_bundle(self.bundle, self.db_dir, datasets, schemas, self.bundle_page_size)
+                record["bytes"] = self.bundle.stat().st_size
+        except (sqlite3.Error, OSError) as e:
+            logging.error(get_translation("Building the bundle failed: {error}", error=str(e)))
+            return
+        logging.info(get_translation("Bundled {count} datasets into {path}", count=len(datasets), path=self.bundle))
+
+# === FormulaHandler class ===
+class FormulaHandler(DataProcessor):
+    """Checks datasets of type 'formulas' against the SI unit data."""
+
+    def validate_formula(self, entry: Dict):
+        """Validates expression safety, variable units and dimensional consistency."""
+        if getattr(self, "_unit_registry", None) is None:
+            # Loaded on first use, after the unit datasets this one depends on are written
+            self._unit_registry = UnitRegistry.from_db(self.db_dir)
+        check_formula(entry, self._unit_registry)
+
+    def _reset_caches(self):
+        super()._reset_caches()
+        self._unit_registry = None  # the unit datasets may have changed
+
+# === CsvHandler class ===
+class CsvHandler(DataProcessor):
+    """
+    Typed CSV ingestion: rows are read in chunks, each column is converted to
+    its schema type with one NumPy call and rows go to executemany as tuples.
+
+    Array cells (VEC, MATRIX, TENSOR, QUATERNION) hold the flattened numbers,
+    with or without brackets, separated by ',', ';' or spaces, e.g.
+    "[[1, 0], [0, 1]]" or "1;0;0;1". Without a schema file, array columns are
+    only recognised in JSON notation. Empty cells are NULL except in TEXT columns.
+    """
+    CSV_CHUNK_ROWS = 50_000
+    CSV_SAMPLE_ROWS = 1_000  # cells per column used to infer a schema
+    ARRAY_TYPES = ("VEC", "MATRIX", "TENSOR", "QUATERNION")
+    NUMBER_SEPARATORS = str.maketrans("[](),;", "      ")
+
+    def _read_csv_chunks(self, path: Path, chunk_rows: Optional[int] = None) -> Iterator[Tuple[List[str], List[tuple]]]:
+        """Yields (header, columns) per chunk; columns are tuples of the raw cells."""
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return
+            width = len(header)
+            while rows := list(islice(reader, chunk_rows or self.CSV_CHUNK_ROWS)):
+                if any(len(row) != width for row in rows):
+                    rows = [(row + [""] * width)[:width] for row in rows]
+                yield header, list(zip(*rows))
+
+    def _infer_csv_field(self, name: str, cells: tuple) -> Dict:
+        """Field definition for a CSV column, inferred from a sample of its first chunk."""
+        field = {"name": name, "type": "TEXT", "type_params": []}
+        values = np.array([cell for cell in cells[:self.CSV_SAMPLE_ROWS] if cell != ""])
+        if not values.size:
+            return field
+        # Codes like '007' stay TEXT
+        if (np.char.startswith(values, "0") & ~np.char.startswith(values, "0.") & (np.char.str_len(values) > 1)).any():
+            return field
+        for field_type, dtype in (("INTEGER", np.int64), ("REAL", np.float64)):
+            try:
+                values.astype(dtype)
+            except (ValueError, OverflowError):
+                continue
+            return {**field, "type": field_type}
+        if values[0].lstrip().startswith("["):
+            try:
+                value = json.loads(values[0])
+            except ValueError:
+                return field
+            if isinstance(value, list) and value:
+                field_type = self._infer_type(value)
+                return {**field, "type": field_type, "type_params": self._infer_type_params(value, field_type)}
+        return field
+
+    def _csv_schema(self, data_path: Path, first: Optional[Tuple[List[str], List[tuple]]]) -> Dict:
+        """Loads the existing schema or infers one from the first chunk."""
+        schema_path = self._data_to_schema_path(data_path)
+        if schema_path.exists():
+            return self._load_schema(schema_path)
+        if first is None:
+            raise ValueError(get_translation("no data to create schemas"))
+        header, columns = first
+        schema = {
+            "table": data_path.stem.replace("_data", ""),
+            "fields": [self._infer_csv_field(name, cells) for name, cells in zip(header, columns)],
+            "metadata": {"private": False}
+        }
+        self._save_schema(schema, schema_path)
+        return schema
+
+    def _convert_csv_column(self, cells: tuple, field: Dict) -> Tuple[list, Dict[int, str]]:
+        """Values of one column in the field's type, and errors by row for cells that do not convert."""
+        field_type = field.get("type")
+        if field_type == "TEXT":
+            text = "".join(cells)
+            if any(c in text for c in ("\x00", "\x1a", "\x1b")) or \
+                    not text.replace("\r", "").replace("\n", "").replace("\t", "").isprintable():
+                return self._convert_csv_cells(cells, field)
+            return list(cells), {}
+
+        if field_type in ("INT", "INTEGER", "REAL"):
+            raw = np.array(cells)
+            empty = raw == ""
+            try:
+                values = np.where(empty, "0", raw).astype(np.float64 if field_type == "REAL" else np.int64).tolist()
+            except (ValueError, OverflowError):
+                return self._convert_csv_cells(cells, field)
+            for index in np.flatnonzero(empty):
+                values[index] = None
+            return values, {}
+
+        params = field.get("type_params") or ([4] if field_type == "QUATERNION" else [])
+        if field_type in self.ARRAY_TYPES and params:
+            size = int(np.prod(params))
+            # 'inf' after every cell: a cell with too few or too many numbers shifts the markers
+            text = (" inf ".join(cells) + " inf").translate(self.NUMBER_SEPARATORS)
+            with warnings.catch_warnings():
+                warnings.simplefilter("error")
+                try:
+                    flat = np.fromstring(text, dtype=np.float64, sep=" ")
+                except (ValueError, DeprecationWarning):
+                    return self._convert_csv_cells(cells, field)
+            if flat.size != len(cells) * (size + 1):
+                return self._convert_csv_cells(cells, field)
+            arrays = flat.reshape(len(cells), size + 1)
+            if not np.isposinf(arrays[:, -1]).all():
+                return self._convert_csv_cells(cells, field)
+            data = np.ascontiguousarray(arrays[:, :-1]).tobytes()
+            step = size * 8
+            return [data[i * step:(i + 1) * step] for i in range(len(cells))], {}
+
+        return self._convert_csv_cells(cells, field)
+
+    def _convert_csv_cells(self, cells: tuple, field: Dict) -> Tuple[list, Dict[int, str]]:
+        """Cell by cell conversion, for columns with empty, malformed or unusual values."""
+        values, errors = [], {}
+        for index, cell in enumerate(cells):
+            try:
+                values.append(self._convert_csv_cell(cell, field))
+            except ValueError as e:
+                values.append(None)
+                errors[index] = str(e)
+        return values, errors
+
+    def _convert_csv_cell(self, cell: str, field: Dict) -> Any:
+        field_type = field.get("type")
+        if cell == "" and field_type != "TEXT":
+            return None
+        try:
+            if field_type in ("INT", "INTEGER"):
+                value = int(cell)
+            elif field_type == "REAL":
+                value = float(cell)
+            elif field_type == "BOOLEAN":
+                value = {"true": True, "1": True, "false": False, "0": False}[cell.strip().lower()]
+            elif field_type == "JSON":
+                value = json.loads(cell)
+            elif field_type in self.ARRAY_TYPES:
+                numbers = np.array(cell.translate(self.NUMBER_SEPARATORS).split(), dtype=np.float64)
+                params = field.get("type_params") or []
+                value = (numbers.reshape(params) if len(params) > 1 else numbers).tolist()
+            else:
+                value = cell
+        except (ValueError, KeyError):
+            raise ValueError(get_translation(
+                "Invalid {ftype} value in field '{field}': {value}", ftype=field_type, field=field["name"], value=repr(cell)
+            ))
+        Validator.validate_entry({field["name"]: value}, {"fields": [field]})
+        if field_type in self.ARRAY_TYPES:
+            return np.asarray(value, dtype=np.float64).tobytes()
+        if field_type == "JSON":
+            return json.dumps(value, ensure_ascii=False)
+        return value
+
+    def _convert_csv_chunk(self, header: List[str], columns: List[tuple], schema: Dict) -> Tuple[List[tuple], Dict[int, str]]:
+        """Rows of a chunk in schema field order, without the invalid ones, and the errors by row."""
+        position = {name: index for index, name in enumerate(header)}
+        count = len(columns[0]) if columns else 0
+        converted, errors = [], {}
+        for field in schema["fields"]:
+            index = position.get(field["name"])
+            values, field_errors = self._convert_csv_column(columns[index], field) if index is not None else ([None] * count, {})
+            if field.get("foreign_key"):
+                for row, value in enumerate(values):
+                    try:
+                        self.validate_foreign_keys({field["name"]: value}, {"fields": [field]})
+                    except ValueError as e:
+                        field_errors.setdefault(row, str(e))
+            for row, error in field_errors.items():
+                errors.setdefault(row, error)
+            converted.append(values)
+
+        rows = list(zip(*converted))
+        if schema.get("metadata", {}).get("dataset_type"):
+            names = [field["name"] for field in schema["fields"]]
+            for row, values in enumerate(rows):
+                try:
+                    self._validate_dataset_type(dict(zip(names, values)), schema)
+                except ValueError as e:
+                    errors.setdefault(row, str(e))
+        if errors:
+            rows = [values for row, values in enumerate(rows) if row not in errors]
+        return rows, errors
+
+    def _process_csv(self, data_path: Path):
+        """
+        Streams a CSV file into its table chunk by chunk in one transaction.
+        Invalid rows are logged and skipped; if none is valid, the table keeps its rows.
+        """
+        name = self._profile_name(data_path)
+        chunks = self._read_csv_chunks(data_path)
+        with self.profiler.stage(name, "load") as record:
+            first = next(chunks, None)
+            record["bytes"] = data_path.stat().st_size
+        with self.profiler.stage(name, "schema"):
+            schema = self._csv_schema(data_path, first)
+        self._referenced_cache = {}
+
+        def numbered():
+            """Chunks with the number of rows before them, for error messages."""
+            offset, chunk = 0, first
+            while chunk is not None:
+                yield offset, chunk
+                offset += len(chunk[1][0]) if chunk[1] else 0
+                with self.profiler.stage(name, "load"):
+                    chunk = next(chunks, None)
+
+        def convert(item):
+            offset, (header, columns) = item
+            with self.profiler.stage(name, "validate") as record:
+                rows, errors = self._convert_csv_chunk(header, columns, schema)
+                record["rows"] = len(columns[0]) if columns else 0
+            return rows, [(f"row {offset + row + 1}", error) for row, error in sorted(errors.items())]
+
+        if self._write_chunks(name, data_path, schema, self._map_chunks(convert, numbered())):
+            with self.profiler.stage(name, "join"):
+                self.build_joined_view(schema, self._data_to_db_path(data_path))
+
 # === Validator class ===
 class Validator:
     """Validates data against schemas."""
+    SQLITE_INT_MIN = -2**63
+    SQLITE_INT_MAX = 2**63 - 1
+
     @staticmethod
     def validate_entry(entry: Dict, schema: Dict):
         """
@@ -402,26 +1592,14 @@ class Validator:
                             value=repr(value)
                         ))
 
-                    # Check printable characters while allowing valid escaped sequences
-                    try:
-                        decoded_value = value.encode('utf-8').decode('unicode_escape')
-                        if not decoded_value.isprintable():
-                            logging.error(get_translation(
-                                "Field '{field}' contains non-printable characters: {value}",
-                                field=field["name"],
-                                value=repr(value)
-                            ))
-                            raise ValueError(get_translation(
-                                "Invalid TEXT value in field '{field}': {value}",
-                                field=field["name"],
-                                value=repr(value)
-                            ))
-                    except UnicodeDecodeError as e:
+                    # Check printable characters, line breaks and tabs are allowed in multi-line text.
+                    # Non-ASCII text (e.g. 'Θ', 'Français', '中文') is valid as is.
+                    printable_value = value.replace("\r", "").replace("\n", "").replace("\t", "")
+                    if not printable_value.isprintable():
                         logging.error(get_translation(
-                            "Field '{field}' contains invalid Unicode: {value}, Error: {error}",
+                            "Field '{field}' contains non-printable characters: {value}",
                             field=field["name"],
-                            value=repr(value),
-                            error=str(e)
+                            value=repr(value)
                         ))
                         raise ValueError(get_translation(
                             "Invalid TEXT value in field '{field}': {value}",
@@ -448,6 +1626,22 @@ class Validator:
                         value=repr(value)
                     ))
 
+                # SQLite stores INTEGER as signed 64 bit, larger ints fail on insert
+                if isinstance(value, int) and not Validator.SQLITE_INT_MIN <= value <= Validator.SQLITE_INT_MAX:
+                    raise ValueError(get_translation(
+                        "Value in field '{field}' exceeds the SQLite INTEGER range: {value}",
+                        field=field["name"],
+                        value=repr(value)
+                    ))
+
+            # --- JSON validation ---
+            if field_type == "JSON" and value is not None and not isinstance(value, (dict, list)):
+                raise ValueError(get_translation(
+                    "Invalid JSON value in field '{field}': {value}",
+                    field=field["name"],
+                    value=repr(value)
+                ))
+
             # Handle other types (VECTOR, MATRIX, etc.)
             if field_type == "VEC":
                 Validator._validate_vector(value, type_params)
@@ -515,7 +1709,8 @@ class Validator:
         #     raise ValueError("Quaternion muss Einheitsnorm haben")
 
 # === class AutoSchemaDB ===
-class AutoSchemaDB(SchemaHandler, DatabaseHandler):
+class AutoSchemaDB(SchemaHandler, DatabaseHandler, IndexHandler, ManifestHandler, JoinHandler, FormulaHandler,
+                   CsvHandler, ColumnarHandler, SnapshotHandler, BundleHandler):
     """Main class for automatic schema and DB generation."""
 
     def __init__(self, *args, **kwargs):
@@ -527,42 +1722,24 @@ class AutoSchemaDB(SchemaHandler, DatabaseHandler):
         """Processing single file."""
         logging.info(get_translation("Processing file: {path}", path=data_path))
 
+        name = self._profile_name(data_path)
         try:
-            data = self._load_data(data_path)
-            schema = self._get_or_create_schema(data_path, data)
-
-            validation_errors = []
-            valid_entries = []
-            for entry in data:
-                try:
-                    self.validator.validate_entry(entry, schema)
-                    valid_entries.append(entry)
-                except ValueError as ve:
-                    logging.error(get_translation(
-                        "Validation error in file {path}, entry {entry}: {error}",
-                        path=data_path,
-                        entry=entry,
-                        error=str(ve)
-                    ))
-                    validation_errors.append((entry, str(ve)))
-                    # Continue to next entry
-
-            if validation_errors:
-                print(f"\nValidation errors found in {data_path}:")
-                for entry, error in validation_errors:
-                    print(f"  Entry: {entry}\n    Error: {error}")
-                # Optionally, skip DB update if there are errors:
-                # return
-
-            # Proceed with valid entries only
-            if valid_entries:
-                db_path = self._data_to_db_path(data_path)
-                self.create_table(schema, db_path)
-                self.insert_data(valid_entries, schema, db_path)
-            else:
-                logging.warning(get_translation(
-                    "No valid entries to insert for {path}", path=data_path
-                ))
+            if data_path.suffix.lower() == ".csv":
+                self._process_csv(data_path)
+                return
+            with self.profiler.stage(name, "load") as record:
+                data = self._load_data(data_path)
+                record["rows"], record["bytes"] = len(data), data_path.stat().st_size
+            with self.profiler.stage(name, "schema"):
+                schema = self._get_or_create_schema(data_path, data)
+            self._referenced_cache = {}
+
+            size = Pipeline.CHUNK_ROWS
+            chunks = (data[i:i + size] for i in range(0, len(data), size))
+            results = self._map_chunks(lambda entries: self._validate_chunk(name, entries, schema), chunks)
+            if self._write_chunks(name, data_path, schema, results):
+                with self.profiler.stage(name, "join"):
+                    self.build_joined_view(schema, self._data_to_db_path(data_path))
 
         except Exception as e:
             logging.error(get_translation(
@@ -572,7 +1749,28 @@ class AutoSchemaDB(SchemaHandler, DatabaseHandler):
             ))
             raise
 
-    
+    def _validate_chunk(self, name: str, entries: List[Dict], schema: Dict) -> Tuple[List[list], List[Tuple[Any, str]]]:
+        """Valid entries of a chunk as insert rows, and the rejected entries with their errors."""
+        valid, errors = [], []
+        with self.profiler.stage(name, "validate") as record:
+            for entry in entries:
+                try:
+                    self.validator.validate_entry(entry, schema)
+                    self._validate_dataset_type(entry, schema)
+                    self.validate_foreign_keys(entry, schema)
+                    valid.append(entry)
+                except ValueError as ve:
+                    errors.append((entry, str(ve)))
+            rows = self._insert_rows(valid, schema)
+            record["rows"] = len(entries)
+        return rows, errors
+
+    def _validate_dataset_type(self, entry: Dict, schema: Dict):
+        """Extra checks for typed datasets, selected by the schema's 'metadata.dataset_type'."""
+        dataset_type = schema.get("metadata", {}).get("dataset_type")
+        if dataset_type == "formulas":
+            self.validate_formula(entry)
+
     def _load_data(self, data_path: Path) -> List[Dict]:
         """Loads data from various file formats."""
         suffix = data_path.suffix.lower()
@@ -586,7 +1784,8 @@ class AutoSchemaDB(SchemaHandler, DatabaseHandler):
 
     def _load_yaml(self, path: Path) -> List[Dict]:
         with open(path, 'r', encoding='utf-8') as f:
-            data = yaml.safe_load(f)
+            # The libyaml loader parses many times faster where PyYAML was built with it
+            data = yaml.load(f, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
             return self._unwrap_nested_data(data)
 
     def _load_json(self, path: Path) -> List[Dict]:
@@ -655,6 +1854,8 @@ class AutoSchemaDB(SchemaHandler, DatabaseHandler):
         schema_path = self.schema_dir / relative_path.with_name(
             relative_path.name.replace("_data", "_schema")
         )
+        if schema_path.suffix.lower() == ".csv":
+            schema_path = schema_path.with_suffix(".yaml")  # schemas are nested, CSV cannot hold them
         schema_path.parent.mkdir(parents=True, exist_ok=True)  # Create subdirectories
         # print(f"Schema path generated: {schema_path}")
         return schema_path
@@ -684,11 +1885,72 @@ class AutoSchemaDB(SchemaHandler, DatabaseHandler):
     def _save_schema(self, schema: Dict, schema_path: Path):
         schema_path.parent.mkdir(parents=True, exist_ok=True)
         with open(schema_path, 'w', encoding='utf-8') as f:
-            yaml.dump(schema, f, allow_unicode=True)
+            if schema_path.suffix in ['.yaml', '.yml']:
+                yaml.dump(schema, f, allow_unicode=True)
+            else:
+                json.dump(schema, f, ensure_ascii=False, indent=2)  # read back by _load_schema as JSON
 
 # === Main function call ===
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate schemas and SQLite databases from the data files.")
+    parser.add_argument("--profile", nargs="?", const="", metavar="REPORT",
+                        help="record time, rows and bytes per file and stage; JSON report (default: <db_dir>/profile.json)")
+    parser.add_argument("--profile-dump", choices=StageProfiler.DUMPS,
+                        help="profile and also write a cProfile (.prof) or pyinstrument (.html) dump per file")
+    parser.add_argument("--pipeline", nargs="?", type=int, const=2, metavar="WORKERS",
+                        help="read, validate (in WORKERS threads, default 2) and write each file's chunks concurrently")
+    parser.add_argument("--queue-chunks", type=int, default=4,
+                        help="chunks each pipeline queue holds, caps memory (default: 4)")
+    parser.add_argument("--watch", nargs="?", type=float, const=1.0, metavar="SECONDS",
+                        help="keep running and reprocess changed data and schema files, polling every SECONDS (default 1)")
+    parser.add_argument("--debounce", type=float, default=0.5,
+                        help="seconds files must stay unchanged before a watch run starts (default: 0.5)")
+    parser.add_argument("--columnar", nargs="?", const="npz", choices=tuple(COLUMNAR_FORMATS),
+                        help="also write each table as npz (default), arrow or parquet next to its database")
+    parser.add_argument("--snapshots", action="store_true",
+                        help="also write an mmap snapshot per dataset that all API workers share")
+    parser.add_argument("--bundle", nargs="?", const="", metavar="PATH",
+                        help="also merge all datasets into one read-optimized database (default: <db_dir>/bundle.db)")
+    parser.add_argument("--bundle-page-size", type=int, default=PAGE_SIZE,
+                        help=f"page size of the bundle in bytes (default: {PAGE_SIZE})")
+    parser.add_argument("--export-versions", nargs="?", const="", metavar="YAML",
+                        help="write the version store as YAML (default: the version file) and exit")
+    args = parser.parse_args()
+    profile = args.profile is not None or args.profile_dump is not None
+    if args.profile_dump == "pyinstrument":
+        try:
+            import pyinstrument  # noqa: F401
+        except ImportError:
+            parser.error("--profile-dump pyinstrument needs 'pip install pyinstrument'")
+    if args.columnar in ("arrow", "parquet"):
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            parser.error(f"--columnar {args.columnar} needs 'pip install pyarrow'")
+
     processor = AutoSchemaDB()
-    processor.process_all()
+    if args.export_versions is not None:
+        target = Path(args.export_versions) if args.export_versions else processor.version_file.with_suffix(".yaml")
+        processor.version_data.export_yaml(target)
+        print(f"Exported {len(processor.version_data)} version entries to {target}")
+        sys.exit(0)
+    processor.columnar = args.columnar
+    processor.snapshots = args.snapshots
+    if args.bundle is not None:
+        processor.bundle = Path(args.bundle) if args.bundle else processor.db_dir / BUNDLE_FILE
+        processor.bundle_page_size = args.bundle_page_size
+    if args.pipeline:
+        processor.pipeline = Pipeline(workers=args.pipeline, queue_chunks=args.queue_chunks)
+    if profile:
+        processor.profiler = StageProfiler(enabled=True, dump=args.profile_dump, dump_dir=processor.db_dir / "profile")
+    if args.watch is not None:
+        try:
+            processor.watch(interval=args.watch, debounce=args.debounce)
+        except KeyboardInterrupt:
+            logging.info("Watch mode stopped")
+    else:
+        processor.process_all()
+    if profile:
+        processor.profiler.write_report(Path(args.profile) if args.profile else processor.db_dir / "profile.json")
     logging.info("Processing finished!")
\ No newline at end of file
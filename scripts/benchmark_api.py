@@ -0,0 +1,284 @@
+r"""
+HTTP load benchmark for the generated dataset endpoints.
+
+Generates a synthetic dataset (scripts/benchmark_data.py), builds it with
+AutoSchemaDB into a temporary directory, starts main:app on it and measures
+throughput and p50/p99 latency for full reads, key lookups, filters and
+streamed batches. Results are compared against a stored JSON baseline.
+
+    python scripts/benchmark_api.py --rows 100000 --concurrency 32 --requests 2000
+    python scripts/benchmark_api.py --save-baseline   # record a new baseline
+
+By default the app runs under uvicorn over real HTTP; `--transport asgi`
+calls it in-process instead (no sockets, useful where uvicorn is missing).
+Exits with 1 if a scenario regressed by more than --max-regression.
+"""
+
+# === benchmark_api.py ===
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import httpx
+import numpy as np
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from benchmark_data import CATEGORIES, generate_rows, keys, write_dataset  # noqa: E402
+
+DATASET = "bench/items"
+BASELINE_FILE = ROOT_DIR / "scripts" / "benchmarks" / "api_baseline.json"
+LOOKUP_KEYS = 10
+
+
+# === Dataset ===
+def build_dataset(root: Path, rows: int, fmt: str = "json"):
+    """Write the synthetic data file and run AutoSchemaDB on it; returns the db directory."""
+    from autoschema import AutoSchemaDB
+
+    write_dataset(root / "data" / DATASET, generate_rows(rows), fmt)
+    processor = AutoSchemaDB(data_dir=str(root / "data"), schema_dir=str(root / "schemas"),
+                             db_dir=str(root / "db"), version_file=str(root / "version.yaml"))
+    processor.process_all()
+    return processor.db_dir
+
+
+# === Server ===
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+@asynccontextmanager
+async def http_client(db_dir: Path, timeout: float = 60):
+    """Run main:app under uvicorn in a subprocess and yield a client for it."""
+    port = _free_port()
+    env = {**os.environ, "DB_DIR": str(db_dir), "RELOAD_INTERVAL": "0"}
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=ROOT_DIR, env=env)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=timeout) as client:
+            deadline = time.monotonic() + timeout
+            while True:
+                if server.poll() is not None:
+                    raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+                try:
+                    if (await client.get("/metrics")).status_code == 200:
+                        break
+                except httpx.TransportError:
+                    pass
+                if time.monotonic() > deadline:
+                    raise RuntimeError("uvicorn did not start in time")
+                await asyncio.sleep(0.1)
+            yield client
+    finally:
+        server.terminate()
+        server.wait()
+
+
+@asynccontextmanager
+async def asgi_client(db_dir: Path, timeout: float = 60):
+    """Run main:app in this process and yield a client that calls it without sockets."""
+    os.environ["DB_DIR"] = str(db_dir)
+    os.environ["RELOAD_INTERVAL"] = "0"
+    import main
+
+    async with main.lifespan(main.app):
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=timeout) as client:
+            yield client
+
+
+TRANSPORTS = {"http": http_client, "asgi": asgi_client}
+
+
+# === Scenarios ===
+def scenarios(rows: int, seed: int = 0) -> Dict[str, Callable[[httpx.AsyncClient], Awaitable[int]]]:
+    """Request functions by scenario name; each returns the number of response bytes."""
+    rng = random.Random(seed)
+    all_keys = keys(rows)
+
+    def lookup_query():
+        return {"dataset": DATASET, "id": "lookup", "keys": rng.sample(all_keys, min(LOOKUP_KEYS, rows))}
+
+    def filter_query():
+        category = f"category-{rng.randrange(CATEGORIES):02d}"
+        return {"dataset": DATASET, "id": "filter", "filters": {"category": category},
+                "fields": ["key", "value", "vec"]}
+
+    async def send(client, method, url, **kwargs) -> int:
+        response = await client.request(method, url, **kwargs)
+        response.raise_for_status()
+        return len(response.content)
+
+    async def full(client):
+        return await send(client, "GET", f"/{DATASET}/")
+
+    async def lookup(client):
+        return await send(client, "POST", "/batch", json={"queries": [lookup_query()]})
+
+    async def filtered(client):
+        return await send(client, "POST", "/batch", json={"queries": [filter_query()]})
+
+    async def stream(client):
+        size = 0
+        body = {"stream": True, "queries": [lookup_query(), filter_query(), {"dataset": DATASET, "fields": ["key"]}]}
+        async with client.stream("POST", "/batch", json=body) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                size += len(line)
+        return size
+
+    return {"full": full, "lookup": lookup, "filter": filtered, "stream": stream}
+
+
+async def run_scenario(client: httpx.AsyncClient, request: Callable, requests: int, concurrency: int,
+                       warmup: int = 10) -> Dict:
+    """Send `requests` requests from `concurrency` workers; warm-up requests are not measured."""
+    for _ in range(warmup):
+        await request(client)
+
+    latencies: List[float] = []
+    errors, sent = 0, 0
+    size = 0
+
+    async def worker():
+        nonlocal errors, sent, size
+        while sent < requests:
+            sent += 1
+            start = time.perf_counter()
+            try:
+                size += await request(client)
+            except httpx.HTTPError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    ms = np.array(latencies) * 1000 if latencies else np.zeros(1)
+    return {
+        "requests": requests,
+        "errors": errors,
+        "seconds": round(elapsed, 4),
+        "throughput": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(float(np.percentile(ms, 50)), 3),
+        "p99_ms": round(float(np.percentile(ms, 99)), 3),
+        "mean_bytes": round(size / max(len(latencies), 1)),
+    }
+
+
+# === Baselines ===
+def compare(results: Dict, baseline: Dict, max_regression: float) -> List[str]:
+    """Regressions of throughput (lower) or p99 latency (higher) beyond the allowed fraction."""
+    regressions = []
+    for name, current in results["scenarios"].items():
+        reference = baseline.get("scenarios", {}).get(name)
+        if reference is None:
+            continue
+        if current["throughput"] < reference["throughput"] * (1 - max_regression):
+            regressions.append(f"{name}: throughput {current['throughput']}/s < baseline {reference['throughput']}/s")
+        if current["p99_ms"] > reference["p99_ms"] * (1 + max_regression):
+            regressions.append(f"{name}: p99 {current['p99_ms']} ms > baseline {reference['p99_ms']} ms")
+        if current["errors"] > reference["errors"]:
+            regressions.append(f"{name}: {current['errors']} errors (baseline {reference['errors']})")
+    return regressions
+
+
+def comparable(results: Dict, baseline: Dict) -> bool:
+    """Baselines only apply to runs with the same dataset size, load and transport."""
+    keys_ = ("rows", "concurrency", "requests", "transport")
+    return all(results["meta"].get(k) == baseline.get("meta", {}).get(k) for k in keys_)
+
+
+def print_table(results: Dict, baseline: Optional[Dict]):
+    print(f"{'scenario':<10} {'req/s':>10} {'p50 ms':>10} {'p99 ms':>10} {'errors':>7} {'base req/s':>11} {'base p99':>10}")
+    for name, r in results["scenarios"].items():
+        b = (baseline or {}).get("scenarios", {}).get(name, {})
+        print(f"{name:<10} {r['throughput']:>10} {r['p50_ms']:>10} {r['p99_ms']:>10} {r['errors']:>7} "
+              f"{b.get('throughput', '-'):>11} {b.get('p99_ms', '-'):>10}")
+
+
+async def benchmark(args) -> Dict:
+    with tempfile.TemporaryDirectory(prefix="comapis-bench-") as tmp:
+        start = time.perf_counter()
+        db_dir = build_dataset(Path(tmp), args.rows, args.format)
+        build_seconds = time.perf_counter() - start
+
+        results = {
+            "meta": {
+                "rows": args.rows, "concurrency": args.concurrency, "requests": args.requests,
+                "transport": args.transport, "format": args.format,
+                "python": platform.python_version(), "platform": platform.platform(),
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "build_seconds": round(build_seconds, 3),
+            },
+            "scenarios": {},
+        }
+        async with TRANSPORTS[args.transport](db_dir) as client:
+            for name, request in scenarios(args.rows).items():
+                if args.scenario and name not in args.scenario:
+                    continue
+                results["scenarios"][name] = await run_scenario(
+                    client, request, args.requests, args.concurrency, args.warmup)
+        return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the generated dataset endpoints.")
+    parser.add_argument("--rows", type=int, default=10_000, help="rows in the synthetic dataset")
+    parser.add_argument("--format", choices=("json", "yaml", "csv"), default="json", help="data file format")
+    parser.add_argument("--concurrency", type=int, default=16, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per scenario")
+    parser.add_argument("--warmup", type=int, default=10, help="unmeasured requests per scenario")
+    parser.add_argument("--scenario", action="append", choices=("full", "lookup", "filter", "stream"),
+                        help="run only these scenarios (repeatable)")
+    parser.add_argument("--transport", choices=tuple(TRANSPORTS), default="http",
+                        help="http: uvicorn subprocess, asgi: in-process without sockets")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="allowed throughput/p99 regression as a fraction (default: 0.2)")
+    parser.add_argument("--output", type=Path, help="also write the results to this JSON file")
+    args = parser.parse_args()
+    if args.transport == "http":
+        try:
+            import uvicorn  # noqa: F401
+        except ImportError:
+            parser.error("--transport http needs uvicorn (pip install -r requirements.txt), or use --transport asgi")
+
+    results = asyncio.run(benchmark(args))
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else None
+    if baseline is not None and not comparable(results, baseline):
+        print(f"Baseline {args.baseline} was recorded with {baseline.get('meta')}; not comparing.")
+        baseline = None
+    print_table(results, baseline)
+
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Saved baseline to {args.baseline}")
+    elif baseline is not None:
+        regressions = compare(results, baseline, args.max_regression)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        sys.exit(1 if regressions else 0)
@@ -0,0 +1,68 @@
+r"""
+Synthetic datasets for the benchmark scripts.
+
+Rows mix every field type AutoSchemaDB infers: TEXT, INTEGER, REAL, VEC,
+MATRIX, TENSOR and QUATERNION. Generation is seeded, so runs are comparable.
+"""
+
+# === benchmark_data.py ===
+import csv
+import json
+import random
+from pathlib import Path
+from typing import Dict, Iterator, List
+
+import yaml
+
+CATEGORIES = 16
+FORMATS = ("yaml", "json", "csv")
+
+
+def generate_rows(count: int, seed: int = 0) -> Iterator[Dict]:
+    """Rows with a unique 'key', a 'category' for filters and one column per field type."""
+    rng = random.Random(seed)
+    for i in range(count):
+        yield {
+            "key": f"item-{i:08d}",
+            "name": f"Item {i} {rng.choice(['alpha', 'beta', 'gamma', 'Größe', '数据'])}",
+            "category": f"category-{i % CATEGORIES:02d}",
+            "count": rng.randrange(1_000_000),
+            "value": rng.random() * 1000,
+            "vec": [rng.random() for _ in range(3)],
+            "matrix": [[rng.random() for _ in range(2)] for _ in range(2)],
+            "tensor": [[[rng.random() for _ in range(2)] for _ in range(2)] for _ in range(2)],
+            "quaternion": [1.0, 0.0, 0.0, 0.0],
+        }
+
+
+def keys(count: int) -> List[str]:
+    return [f"item-{i:08d}" for i in range(count)]
+
+
+def write_dataset(path: Path, rows: Iterator[Dict], fmt: str) -> Path:
+    """
+    Write rows as '<path>_data.<fmt>' in the layout AutoSchemaDB reads.
+
+    YAML is wrapped in a 'data' key like the real datasets, JSON is a plain
+    list and CSV stores list columns as JSON text.
+    """
+    target = path.with_name(f"{path.name}_data.{fmt}")
+    target.parent.mkdir(parents=True, exist_ok=True)
+    with open(target, "w", encoding="utf-8", newline="") as f:
+        if fmt == "yaml":
+            yaml.safe_dump({"data": list(rows)}, f, allow_unicode=True, sort_keys=False)
+        elif fmt == "json":
+            f.write("[")
+            for i, row in enumerate(rows):
+                f.write(("," if i else "") + json.dumps(row, ensure_ascii=False))
+            f.write("]")
+        elif fmt == "csv":
+            writer = None
+            for row in rows:
+                if writer is None:
+                    writer = csv.DictWriter(f, fieldnames=list(row))
+                    writer.writeheader()
+                writer.writerow({k: json.dumps(v) if isinstance(v, list) else v for k, v in row.items()})
+        else:
+            raise ValueError(f"Unknown format: {fmt}")
+    return target
@@ -0,0 +1,197 @@
+r"""
+Ingestion micro-benchmark for the AutoSchemaDB stages.
+
+Generates synthetic YAML, JSON and CSV files (scripts/benchmark_data.py) and
+times each stage on its own: _load_data, generate_schema,
+Validator.validate_entry, create_table and insert_data, plus the chunked
+CSV path (_process_csv) as a whole. Peak Python memory
+per stage is measured in a second run under tracemalloc, so tracing does not
+distort the timings. Results are compared against a stored JSON baseline.
+
+    python scripts/benchmark_ingest.py                           # 10k rows, all formats
+    python scripts/benchmark_ingest.py --rows 1M --format csv --repeat 3
+    python scripts/benchmark_ingest.py --rows 10k --rows 1M --save-baseline
+
+The loaders keep a whole file in memory, so 10M rows need tens of GB.
+Exits with 1 if a stage regressed by more than --max-regression.
+"""
+
+# === benchmark_ingest.py ===
+import argparse
+import gc
+import json
+import logging
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from autoschema import AutoSchemaDB, Pipeline  # noqa: E402
+from benchmark_data import FORMATS, generate_rows, write_dataset  # noqa: E402
+
+BASELINE_FILE = Path(__file__).resolve().parent / "benchmarks" / "ingest_baseline.json"
+STAGES = ("load", "schema", "validate", "create_table", "insert", "csv_typed")
+SIZES = {"k": 1_000, "M": 1_000_000}
+
+
+def parse_rows(value: str) -> int:
+    """Row counts like '10000', '10k' or '1M'."""
+    suffix = value[-1:]
+    if suffix in SIZES:
+        return int(float(value[:-1]) * SIZES[suffix])
+    return int(value)
+
+
+def measure(fn: Callable, repeat: int = 1, memory: bool = True) -> Tuple[object, Dict]:
+    """Best wall time of `repeat` calls, then peak traced memory of one more call."""
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - start)
+    stats = {"seconds": round(best, 6)}
+    if memory:
+        del result
+        gc.collect()
+        tracemalloc.start()
+        try:
+            result = fn()
+            stats["peak_mb"] = round(tracemalloc.get_traced_memory()[1] / 2**20, 3)
+        finally:
+            tracemalloc.stop()
+    return result, stats
+
+
+def validate(processor: AutoSchemaDB, data: List[Dict], schema: Dict) -> int:
+    """Validate every entry like _process_file does; returns the number of invalid entries."""
+    invalid = 0
+    for entry in data:
+        try:
+            processor.validator.validate_entry(entry, schema)
+        except ValueError:
+            invalid += 1
+    return invalid
+
+
+def process_csv(processor: AutoSchemaDB, data_path: Path, db_path: Path):
+    """
+    _process_csv on a fresh database, so neither the string-typed table of the
+    create_table/insert stages nor the previous repeat turns it into a migration.
+    """
+    db_path.unlink(missing_ok=True)
+    processor._process_csv(data_path)
+
+
+def bench_file(root: Path, fmt: str, rows: int, repeat: int, memory: bool, workers: int = 0) -> Dict:
+    """Write one synthetic file and time every stage on it."""
+    data_path = write_dataset(root / "data" / fmt / "items", generate_rows(rows), fmt)
+    processor = AutoSchemaDB(data_dir=str(root / "data"), schema_dir=str(root / "schemas"),
+                             db_dir=str(root / "db"), version_file=str(root / "version.yaml"))
+    if workers:
+        processor.pipeline = Pipeline(workers=workers)
+    db_path = processor._data_to_db_path(data_path)
+    run = {"rows": rows, "bytes": data_path.stat().st_size, "stages": {}}
+    stages = run["stages"]
+
+    data, stages["load"] = measure(lambda: processor._load_data(data_path), repeat, memory)
+    schema, stages["schema"] = measure(lambda: processor.generate_schema(data, data_path), repeat, memory)
+    invalid, stages["validate"] = measure(lambda: validate(processor, data, schema), repeat, memory)
+    stages["validate"]["invalid"] = invalid
+    _, stages["create_table"] = measure(lambda: processor.create_table(schema, db_path), repeat, memory)
+    _, stages["insert"] = measure(lambda: processor.insert_data(data, schema, db_path), repeat, memory)
+    if fmt == "csv":
+        # The chunked path AutoSchemaDB takes for CSV files: load, convert and insert in one pass
+        del data
+        _, stages["csv_typed"] = measure(lambda: process_csv(processor, data_path, db_path), repeat, memory)
+    for stats in stages.values():
+        stats["rows_per_second"] = round(rows / stats["seconds"]) if stats["seconds"] else None
+    run["types"] = {field["name"]: field["type"] for field in schema["fields"]}
+    return run
+
+
+# === Baselines ===
+def compare(results: Dict, baseline: Dict, max_regression: float, min_seconds: float) -> List[str]:
+    """
+    Stages slower or using more peak memory than the baseline by more than
+    the allowed fraction. Stages faster than `min_seconds` in the baseline
+    are too noisy to compare by time.
+    """
+    regressions = []
+    for name, run in results["runs"].items():
+        reference = baseline.get("runs", {}).get(name)
+        if reference is None:
+            continue
+        for stage, current in run["stages"].items():
+            base = reference["stages"].get(stage)
+            if base is None:
+                continue
+            if base["seconds"] >= min_seconds and current["seconds"] > base["seconds"] * (1 + max_regression):
+                regressions.append(f"{name} {stage}: {current['seconds']} s > baseline {base['seconds']} s")
+            if "peak_mb" in current and "peak_mb" in base and current["peak_mb"] > base["peak_mb"] * (1 + max_regression):
+                regressions.append(f"{name} {stage}: peak {current['peak_mb']} MB > baseline {base['peak_mb']} MB")
+    return regressions
+
+
+def print_table(results: Dict, baseline: Dict):
+    print(f"{'run':<14} {'stage':<13} {'seconds':>10} {'rows/s':>12} {'peak MB':>9} {'base s':>10} {'base MB':>9}")
+    for name, run in results["runs"].items():
+        reference = baseline.get("runs", {}).get(name, {}).get("stages", {})
+        for stage, stats in run["stages"].items():
+            base = reference.get(stage, {})
+            print(f"{name:<14} {stage:<13} {stats['seconds']:>10} {str(stats['rows_per_second']):>12} "
+                  f"{stats.get('peak_mb', '-'):>9} {base.get('seconds', '-'):>10} {base.get('peak_mb', '-'):>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time every AutoSchemaDB ingestion stage on synthetic data.")
+    parser.add_argument("--rows", action="append", type=parse_rows,
+                        help="rows per file, e.g. 10k, 1M, 10M (repeatable, default: 10k)")
+    parser.add_argument("--format", action="append", choices=FORMATS, help="file formats (repeatable, default: all)")
+    parser.add_argument("--repeat", type=int, default=1, help="timed runs per stage, the best one counts")
+    parser.add_argument("--pipeline", type=int, default=0, metavar="WORKERS",
+                        help="run csv_typed through the pipeline with this many validator threads")
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc run per stage")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE, help="baseline JSON to compare against")
+    parser.add_argument("--save-baseline", action="store_true", help="store this run as the new baseline")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="allowed time/memory regression per stage as a fraction (default: 0.2)")
+    parser.add_argument("--min-seconds", type=float, default=0.01,
+                        help="do not compare times of stages faster than this in the baseline")
+    parser.add_argument("--output", type=Path, help="also write the results to this JSON file")
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)  # autoschema logs every file at INFO
+
+    results = {
+        "meta": {
+            "repeat": args.repeat, "memory": not args.no_memory, "pipeline": args.pipeline,
+            "python": platform.python_version(), "platform": platform.platform(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+        },
+        "runs": {},
+    }
+    for rows in args.rows or [10_000]:
+        for fmt in args.format or FORMATS:
+            with tempfile.TemporaryDirectory(prefix="comapis-ingest-") as tmp:
+                results["runs"][f"{fmt}/{rows}"] = bench_file(Path(tmp), fmt, rows, args.repeat, not args.no_memory,
+                                                               args.pipeline)
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8")) if args.baseline.exists() else {}
+    print_table(results, baseline)
+    if args.output:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+    if args.save_baseline:
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(results, indent=2), encoding="utf-8")
+        print(f"Saved baseline to {args.baseline}")
+    elif baseline:
+        regressions = compare(results, baseline, args.max_regression, args.min_seconds)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        sys.exit(1 if regressions else 0)
@@ -8,7 +8,13 @@ import os
 import unittest
 import logging
 import sqlite3
-from scripts.autoschema import SchemaHandler, AutoSchemaDB, Validator
+import json
+import tempfile
+import threading
+import numpy as np
+from api.datasets import deserialize, read_manifest
+from api.search import SearchIndex
+from scripts.autoschema import SchemaHandler, AutoSchemaDB, Pipeline, StageProfiler, Validator, VersionStore
 
 # === General setting for logging ===
 
@@ -24,6 +30,19 @@ class BaseTest(unittest.TestCase):
         self.base_dir = Path(__file__).resolve().parent.parent
         print(f"Base directory set to: {self.base_dir}")
 
+    def make_root(self) -> Path:
+        """A temporary project root, removed after the test."""
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        return Path(tmp.name)
+
+    def make_processor(self, root: Path) -> AutoSchemaDB:
+        """AutoSchemaDB on data/, schemas/ and db/ below `root`; its version store is closed after the test."""
+        processor = AutoSchemaDB(data_dir=root / "data", schema_dir=root / "schemas", db_dir=root / "db",
+                                 version_file=root / "version.yaml")
+        self.addCleanup(processor.version_data.close)
+        return processor
+
         
         
 # === Test Schema Handler ===
@@ -98,6 +117,25 @@ class TestValidator(BaseTest):
         with self.assertRaises(ValueError):
             self.validator.validate_entry(invalid_entry, schema)
 
+    def test_validate_non_ascii_text(self):
+        """Test if 'validate_entry' accepts printable non-ASCII text."""
+        schema = {
+            "fields": [{"name": "text_field", "type": "TEXT", "type_params": []}]
+        }
+        for value in ("Θ", "Français", "中文", "\\mathrm{K}", "line 1\nline 2"):
+            self.assertIsNone(self.validator.validate_entry({"text_field": value}, schema))
+        with self.assertRaises(ValueError):
+            self.validator.validate_entry({"text_field": "bell\x07"}, schema)
+
+    def test_validate_integer_range(self):
+        """Test if 'validate_entry' rejects integers SQLite cannot store."""
+        schema = {
+            "fields": [{"name": "int_field", "type": "INTEGER", "type_params": []}]
+        }
+        self.assertIsNone(self.validator.validate_entry({"int_field": 10 ** 18}, schema))
+        with self.assertRaises(ValueError):
+            self.validator.validate_entry({"int_field": 10 ** 30}, schema)
+
 # === Test Unwrap Nested Data ===
 class TestUnwrapNestedData(BaseTest):
     """Unit tests for the '_unwrap_nested_data' method in AutoSchemaDB."""
@@ -197,7 +235,468 @@ class TestAutoSchema(BaseTest):
         db_path = self.processor._data_to_db_path(data_path)
         self.assertEqual(db_path, expected_db_path)
         
-                    
+
+# === Test route manifest ===
+class TestManifest(BaseTest):
+    """Test cases for the route manifest and search index written by AutoSchemaDB."""
+
+    def setUp(self):
+        """Process a small dataset in a temporary directory."""
+        super().setUp()
+        root = self.make_root()
+        (root / "data" / "demo").mkdir(parents=True)
+        (root / "data" / "demo" / "colors_data.yaml").write_text(
+            "data:\n  - {name: red, rgb: [255, 0, 0]}\n  - {name: green, rgb: [0, 255, 0]}\n", encoding="utf-8"
+        )
+        self.data_path = root / "data" / "demo" / "colors_data.yaml"
+        self.db_dir = root / "db"
+        self.processor = self.make_processor(root)
+        self.processor.process_all()
+
+    def test_manifest_entry(self):
+        """Test if the manifest lists dataset, table, paths, hashes and row count."""
+        datasets = read_manifest(self.db_dir)
+        self.assertEqual(len(datasets), 1)
+        entry = datasets[0]
+        self.assertEqual(entry["dataset"], "demo/colors")
+        self.assertEqual(entry["table"], "colors")
+        self.assertEqual(entry["db_path"], "demo/colors.db")
+        self.assertEqual(entry["schema"], "demo/colors_schema.yaml")
+        self.assertEqual(entry["row_count"], 2)
+        self.assertEqual(len(entry["data_hash"]), 64)
+
+    def test_manifest_skips_missing_database(self):
+        """Test if datasets whose database is gone are not served."""
+        (self.db_dir / "demo" / "colors.db").unlink()
+        self.assertEqual(read_manifest(self.db_dir), [])
+
+    def test_profile_report(self):
+        """Test if the profiler records time, rows and bytes per file and stage."""
+        self.data_path.write_text("data:\n  - {name: blue, rgb: [0, 0, 255]}\n", encoding="utf-8")
+        self.processor.profiler = StageProfiler(enabled=True)
+        self.processor.process_all()
+        report = self.processor.profiler.write_report(self.db_dir / "profile.json")
+        stages = report["files"]["demo/colors_data.yaml"]["stages"]
+        self.assertTrue({"hash", "load", "schema", "validate", "insert"} <= set(stages))
+        self.assertEqual(stages["load"]["rows"], 1)
+        self.assertGreater(stages["load"]["bytes"], 0)
+        self.assertTrue((self.db_dir / "profile.json").exists())
+
+    def test_search_index_updated_incrementally(self):
+        """Test if TEXT values are searchable and replaced when the dataset changes."""
+        index = SearchIndex(self.db_dir)
+        self.assertEqual([(h["dataset"], h["key"]) for h in index.search("green")], [("demo/colors", "green")])
+        self.data_path.write_text("data:\n  - {name: blue, rgb: [0, 0, 255]}\n", encoding="utf-8")
+        self.processor.process_all()
+        self.assertEqual(index.search("green"), [])
+        self.assertEqual(index.search("blue")[0]["key"], "blue")
+        index.close()
+
+# === Test schema migration ===
+class TestSchemaMigration(BaseTest):
+    """Test cases for migrating existing tables when their schema changes."""
+
+    def setUp(self):
+        super().setUp()
+        root = self.make_root()
+        self.processor = self.make_processor(root)
+        self.db_path = root / "db/demo/items.db"
+        self.processor.create_table(self.schema(("code", "TEXT"), ("size", "TEXT")), self.db_path)
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executemany("INSERT INTO items VALUES (?, ?)", [("a", "12"), ("b", "7")])
+
+    def schema(self, *fields, **options):
+        return {"table": "items", "fields": [{"name": name, "type": ftype, "type_params": [], **options.get(name, {})}
+                                             for name, ftype in fields]}
+
+    def columns(self):
+        with sqlite3.connect(self.db_path) as conn:
+            return [(row[1], row[2]) for row in conn.execute("PRAGMA table_info(items)")]
+
+    def query(self, sql):
+        with sqlite3.connect(self.db_path) as conn:
+            return conn.execute(sql).fetchall()
+
+    def test_add_column_and_index_in_place(self):
+        """Test if new columns are added without copying rows and marked fields get an index."""
+        rowids = self.query("SELECT rowid, code FROM items")
+        schema = self.schema(("code", "TEXT"), ("size", "TEXT"), ("weight", "REAL"), code={"index": True})
+        self.processor.create_table(schema, self.db_path)
+        self.assertEqual(self.columns(), [("code", "TEXT"), ("size", "TEXT"), ("weight", "REAL")])
+        self.assertEqual(self.query("SELECT rowid, code FROM items"), rowids)
+        indexes = [row[0] for row in self.query("SELECT name FROM sqlite_master WHERE type = 'index'")]
+        self.assertEqual(indexes, ["idx_items_code"])
+
+        self.processor.create_table(self.schema(("code", "TEXT"), ("size", "TEXT"), ("weight", "REAL")), self.db_path)
+        self.assertEqual(self.query("SELECT name FROM sqlite_master WHERE type = 'index'"), [])
+
+    def test_type_change_rebuilds_table(self):
+        """Test if a type or primary key change rebuilds the table with the rows converted."""
+        self.processor.MIGRATION_BATCH_ROWS = 1
+        schema = self.schema(("code", "TEXT"), ("size", "INTEGER"), code={"primary_key": True})
+        self.processor.create_table(schema, self.db_path)
+        self.assertEqual(self.columns(), [("code", "TEXT"), ("size", "INTEGER")])
+        self.assertEqual(self.query("SELECT code, size FROM items ORDER BY code"), [("a", 12), ("b", 7)])
+        tables = [row[0] for row in self.query("SELECT name FROM sqlite_master WHERE type = 'table'")]
+        self.assertEqual(tables, ["items"])
+
+# === Test version store ===
+class TestVersionStore(BaseTest):
+    """Test cases for the SQLite version store."""
+
+    def setUp(self):
+        super().setUp()
+        self.root = self.make_root()
+
+    def test_import_upsert_export(self):
+        """Test if a YAML version file is imported once, entries are upserted and exported as YAML."""
+        legacy = self.root / "versions.yaml"
+        legacy.write_text("demo/a_data.yaml: {data_hash: d1, schema_hash: s1}\n", encoding="utf-8")
+        store = VersionStore(self.root / "versions.db", legacy_yaml=legacy)
+        self.assertEqual(store["demo/a_data.yaml"], {"data_hash": "d1", "schema_hash": "s1"})
+        store["demo/a_data.yaml"] = {"data_hash": "d2", "schema_hash": "s1"}
+        store["demo/b_data.yaml"] = {"data_hash": "d3", "schema_hash": None}
+        store.close()
+
+        legacy.write_text("demo/c_data.yaml: {data_hash: x, schema_hash: y}\n", encoding="utf-8")
+        store = VersionStore(self.root / "versions.db", legacy_yaml=legacy)  # existing store, no re-import
+        self.assertEqual(list(store), ["demo/a_data.yaml", "demo/b_data.yaml"])
+        self.assertEqual(store.get("demo/a_data.yaml")["data_hash"], "d2")
+        self.assertEqual(store.get("demo/missing.yaml", {}), {})
+        store.export_yaml(self.root / "export.yaml")
+        store.close()
+        exported = (self.root / "export.yaml").read_text(encoding="utf-8")
+        self.assertIn("d2", exported)
+        self.assertIn("demo/b_data.yaml", exported)
+
+    def test_broken_yaml_import_retried(self):
+        """Test if no store file is created from an unreadable YAML file, so the import is retried."""
+        legacy = self.root / "versions.yaml"
+        legacy.write_text("demo/a_data.yaml: {data_hash: [\n", encoding="utf-8")
+        store = VersionStore(self.root / "versions.db", legacy_yaml=legacy)
+        store["demo/b_data.yaml"] = {"data_hash": "d1", "schema_hash": None}
+        store.close()
+        self.assertFalse((self.root / "versions.db").exists())
+
+        legacy.write_text("demo/a_data.yaml: {data_hash: d0, schema_hash: s0}\n", encoding="utf-8")
+        store = VersionStore(self.root / "versions.db", legacy_yaml=legacy)
+        self.assertEqual(list(store), ["demo/a_data.yaml"])
+        store.close()
+
+    def test_failed_file_not_recorded(self):
+        """Test if a file whose processing failed is processed again on the next run."""
+        (self.root / "data/demo").mkdir(parents=True)
+        (self.root / "data/demo/colors_data.yaml").write_text("data:\n  - {name: red}\n", encoding="utf-8")
+        processor = self.make_processor(self.root)
+
+        def fail(data_path):
+            raise RuntimeError("interrupted")
+
+        processor._process_file = fail
+        with self.assertRaises(RuntimeError):
+            processor.process_all()
+        self.assertNotIn("demo/colors_data.yaml", processor.version_data)
+        del processor._process_file
+        processor.process_all()
+        self.assertIn("demo/colors_data.yaml", processor.version_data)
+        self.assertTrue((self.root / "version.db").exists())
+
+# === Test Pipeline ===
+class TestPipeline(BaseTest):
+    """Test cases for the reader/validator/writer pipeline."""
+
+    def test_source_order_and_bound(self):
+        """Test if results keep the source order and in-flight chunks stay bounded."""
+        pipeline = Pipeline(workers=4, queue_chunks=2)
+        read = []
+
+        def chunks():
+            for i in range(50):
+                read.append(i)
+                yield i
+
+        results = []
+        for result in pipeline.map(lambda i: i * 2, chunks()):
+            self.assertLessEqual(len(read) - len(results), 4 + 2 * 2)
+            results.append(result)
+        self.assertEqual(results, [i * 2 for i in range(50)])
+
+    def test_errors_propagate(self):
+        """Test if an error in a validator thread stops the pipeline and reaches the writer."""
+        def fail(i):
+            if i == 3:
+                raise ValueError("bad chunk")
+            return i
+
+        with self.assertRaises(ValueError):
+            list(Pipeline(workers=2).map(fail, iter(range(100))))
+
+# === Test joined views ===
+class TestJoinedViews(BaseTest):
+    """Test cases for foreign keys and materialized joined views."""
+
+    def setUp(self):
+        """Process a dataset referencing another one through a foreign key."""
+        super().setUp()
+        root = self.make_root()
+        for folder in ("data/demo", "schemas/demo"):
+            (root / folder).mkdir(parents=True)
+        (root / "data/demo/languages_data.yaml").write_text(
+            "data:\n  - {code: de, name_native: Deutsch}\n  - {code: fr, name_native: Français}\n", encoding="utf-8"
+        )
+        (root / "data/demo/countries_data.yaml").write_text(
+            "data:\n  - {iso2: CH, languages: 'de,fr'}\n  - {iso2: XX, languages: xx}\n", encoding="utf-8"
+        )
+        (root / "schemas/demo/countries_schema.yaml").write_text(
+            "table: countries\nmetadata: {private: false}\nfields:\n"
+            "- {name: iso2, type: TEXT, type_params: [], primary_key: true}\n"
+            "- name: languages\n  type: TEXT\n  type_params: []\n"
+            "  foreign_key: {dataset: demo/languages, field: code, separator: ','}\n",
+            encoding="utf-8"
+        )
+        self.db_dir = root / "db"
+        self.processor = self.make_processor(root)
+        self.processor.process_all()
+
+    def test_joined_view(self):
+        """Test if foreign key values are replaced by the referenced records."""
+        with sqlite3.connect(self.db_dir / "demo/countries.db") as conn:
+            rows = conn.execute("SELECT iso2, languages FROM countries_joined").fetchall()
+        self.assertEqual(len(rows), 1)  # XX references an unknown language and is rejected
+        self.assertEqual(rows[0][0], "CH")
+        self.assertEqual([lang["name_native"] for lang in json.loads(rows[0][1])], ["Deutsch", "Français"])
+
+    def test_joined_view_in_manifest(self):
+        """Test if the joined view is listed as its own dataset."""
+        entries = {entry["dataset"]: entry for entry in read_manifest(self.db_dir)}
+        self.assertEqual(entries["demo/countries/joined"]["table"], "countries_joined")
+        self.assertEqual(entries["demo/countries/joined"]["row_count"], 1)
+
+# === Test CsvHandler ===
+class TestCsvIngestion(BaseTest):
+    """Test cases for typed, chunked CSV ingestion."""
+
+    def setUp(self):
+        super().setUp()
+        self.root = self.make_root()
+        (self.root / "data/demo").mkdir(parents=True)
+        self.processor = self.make_processor(self.root)
+        self.processor.CSV_CHUNK_ROWS = 2  # several chunks per file
+
+    def process(self, text: str):
+        data_path = self.root / "data/demo/points_data.csv"
+        data_path.write_text(text, encoding="utf-8")
+        self.processor._process_file(data_path)
+        with sqlite3.connect(self.root / "db/demo/points.db") as conn:
+            return conn.execute("SELECT * FROM points").fetchall()
+
+    def test_inferred_types(self):
+        """Test if numbers and JSON arrays are stored typed, and codes with leading zeros as TEXT."""
+        rows = self.process(
+            'code,count,weight,position,rotation\n'
+            '007,1,0.5,"[1, 2, 3]","[[1, 0], [0, 1]]"\n'
+            '010,2,,"[4, 5, 6]","[[0, 1], [1, 0]]"\n'
+            '012,3,2,"[7, 8, 9]","[[1, 1], [1, 1]]"\n'
+        )
+        schema = self.processor._load_schema(self.root / "schemas/demo/points_schema.yaml")
+        self.assertEqual([field["type"] for field in schema["fields"]], ["TEXT", "INTEGER", "REAL", "VEC", "MATRIX"])
+        self.assertEqual(schema["fields"][4]["type_params"], [2, 2])
+        self.assertEqual([row[:3] for row in rows], [("007", 1, 0.5), ("010", 2, None), ("012", 3, 2.0)])
+        self.assertEqual(deserialize(rows[2][3]), [7.0, 8.0, 9.0])
+        self.assertEqual(deserialize(rows[0][4]), [1.0, 0.0, 0.0, 1.0])
+
+    def test_pipelined(self):
+        """Test if the pipeline writes the same rows, in file order, as sequential processing."""
+        text = "id,name\n" + "".join(f"{i % 7},n{i}\n" for i in range(20)) + "x,bad\n"
+        sequential = self.process(text)
+        self.processor.pipeline = Pipeline(workers=3, queue_chunks=1)
+        self.assertEqual(self.process(text), sequential)
+        self.assertEqual(len(sequential), 20)  # no primary key, 'x' is rejected
+
+    def test_delimited_cells_with_schema(self):
+        """Test if delimited array cells are parsed and malformed rows are skipped."""
+        (self.root / "schemas/demo").mkdir(parents=True)
+        (self.root / "schemas/demo/points_schema.yaml").write_text(
+            "table: points\nmetadata: {private: false}\nfields:\n"
+            "- {name: id, type: INTEGER, type_params: [], primary_key: true}\n"
+            "- {name: position, type: VEC, type_params: [3]}\n",
+            encoding="utf-8"
+        )
+        rows = self.process("id,position\n1,1;2;3\n2,4 5\nthree,1;1;1\n4,(0.5; 0; -1e-3)\n")
+        self.assertEqual([row[0] for row in rows], [1, 4])
+        self.assertEqual(deserialize(rows[1][1]), [0.5, 0.0, -0.001])
+
+# === Test ColumnarHandler ===
+class TestColumnarExport(BaseTest):
+    """Test cases for the columnar copies next to the databases."""
+
+    def setUp(self):
+        super().setUp()
+        self.root = self.make_root()
+        (self.root / "data/demo").mkdir(parents=True)
+        (self.root / "data/demo/bodies_data.yaml").write_text(
+            "data:\n"
+            "  - {name: a, mass: 1.5, count: 2, position: [1, 2, 3], inertia: [[1, 0], [0, 1]], path: [1, 2]}\n"
+            "  - {name: b, count: null, position: [4, 5, 6], inertia: [[2, 0], [0, 2]], path: [3, 4, 5]}\n",
+            encoding="utf-8"
+        )
+        (self.root / "schemas/demo").mkdir(parents=True)
+        (self.root / "schemas/demo/bodies_schema.yaml").write_text(
+            "table: bodies\nmetadata: {private: false}\nfields:\n"
+            "- {name: name, type: TEXT, type_params: []}\n"
+            "- {name: mass, type: REAL, type_params: []}\n"
+            "- {name: count, type: INTEGER, type_params: []}\n"
+            "- {name: position, type: VEC, type_params: [3]}\n"
+            "- {name: inertia, type: MATRIX, type_params: [2, 2]}\n"
+            "- {name: path, type: TENSOR, type_params: []}\n",
+            encoding="utf-8"
+        )
+        self.processor = self.make_processor(self.root)
+
+    def test_typed_columns(self):
+        """Test if tensors become fixed-shape float64 columns and NULLs are NaN or masked."""
+        self.processor.columnar = "npz"
+        self.processor.process_all()
+        with np.load(self.root / "db/demo/bodies.npz") as columns:
+            self.assertEqual(columns["position"].shape, (2, 3))
+            self.assertEqual(columns["inertia"].tolist(), [[[1, 0], [0, 1]], [[2, 0], [0, 2]]])
+            self.assertEqual(columns["count"].dtype, np.int64)
+            self.assertEqual(columns["count.null"].tolist(), [False, True])
+            self.assertTrue(np.isnan(columns["mass"][1]))
+            self.assertEqual(columns["name"].tolist(), ["a", "b"])
+            # No shape in the schema and cells of different sizes
+            self.assertEqual(columns["path"].tolist(), [1, 2, 3, 4, 5])
+            self.assertEqual(columns["path.offsets"].tolist(), [0, 2, 5])
+        manifest = read_manifest(self.root / "db")
+        self.assertEqual(manifest[0]["columnar_path"], "demo/bodies.npz")
+
+    def test_outdated_copy_removed(self):
+        """Test if a reprocessed file without --columnar loses its outdated copy."""
+        self.processor.columnar = "npz"
+        self.processor.process_all()
+        self.processor.columnar = None
+        (self.root / "data/demo/bodies_data.yaml").write_text(
+            "data:\n  - {name: c, mass: 1.0, count: 1, position: [0, 0, 0], inertia: [[1, 0], [0, 1]], path: [1, 2]}\n",
+            encoding="utf-8"
+        )
+        self.processor.process_all()
+        self.assertFalse((self.root / "db/demo/bodies.npz").exists())
+        self.assertIsNone(read_manifest(self.root / "db")[0]["columnar_path"])
+
+# === Test watch mode ===
+class TestWatchMode(BaseTest):
+    """Test cases for incremental rebuilds in watch mode."""
+
+    def setUp(self):
+        super().setUp()
+        self.root = self.make_root()
+        (self.root / "data/demo").mkdir(parents=True)
+        self.colors = self.root / "data/demo/colors_data.yaml"
+        self.shapes = self.root / "data/demo/shapes_data.yaml"
+        self.colors.write_text("data:\n  - {name: red}\n", encoding="utf-8")
+        self.shapes.write_text("data:\n  - {name: circle}\n", encoding="utf-8")
+        self.processor = self.make_processor(self.root)
+        self.processed = []
+        process_file = self.processor._process_file
+
+        def record(data_path):
+            self.processed.append(data_path.name)
+            process_file(data_path)
+
+        self.processor._process_file = record
+
+    def test_only_changed_files(self):
+        """Test if only changed files are reprocessed and deleted ones are forgotten."""
+        self.processor.process_all()
+        self.processed.clear()
+        self.colors.write_text("data:\n  - {name: red}\n  - {name: blue}\n", encoding="utf-8")
+        self.processor.process_changes({self.colors})
+        self.assertEqual(self.processed, ["colors_data.yaml"])
+        with sqlite3.connect(self.root / "db/demo/colors.db") as conn:
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM colors").fetchone()[0], 2)
+
+        self.shapes.unlink()
+        self.processor.process_changes({self.shapes})
+        self.assertNotIn("demo/shapes_data.yaml", self.processor.version_data)
+        self.assertEqual([e["dataset"] for e in read_manifest(self.root / "db")], ["demo/colors"])
+
+    def test_failed_file_not_recorded(self):
+        """Test if a file that failed keeps its old hash when another file is processed later."""
+        self.processor.process_all()
+        recorded = self.processor.version_data["demo/colors_data.yaml"]
+        self.colors.write_text("data: [unclosed\n", encoding="utf-8")
+        with self.assertRaises(Exception):
+            self.processor.process_changes({self.colors})
+        self.shapes.write_text("data:\n  - {name: square}\n", encoding="utf-8")
+        self.processor.process_changes({self.shapes})
+        self.assertEqual(self.processor.version_data["demo/colors_data.yaml"], recorded)
+        self.assertTrue(self.processor._needs_processing(self.colors))
+
+    def test_burst_is_debounced(self):
+        """Test if a burst of edits is handled in one run once the files are quiet."""
+        runs, watching, done, stop = [], threading.Event(), threading.Event(), threading.Event()
+        snapshot = self.processor._snapshot
+
+        def first_snapshot():
+            result = snapshot()
+            watching.set()
+            return result
+
+        def process_changes(changed):
+            runs.append(changed)
+            done.set()
+
+        self.processor._snapshot = first_snapshot
+        self.processor.process_changes = process_changes
+        watcher = threading.Thread(target=self.processor.watch, kwargs={"interval": 0.05, "debounce": 0.3, "stop": stop})
+        watcher.start()
+        try:
+            self.assertTrue(watching.wait(30))  # initial run done, files known
+            self.colors.write_text("data:\n  - {name: green}\n", encoding="utf-8")
+            self.colors.write_text("data:\n  - {name: yellow}\n", encoding="utf-8")
+            self.assertTrue(done.wait(5))
+        finally:
+            stop.set()
+            watcher.join()
+        self.assertEqual(runs, [{self.colors}])
+
+# === Test BundleHandler ===
+class TestBundleExport(BaseTest):
+    """Test cases for the consolidated read-only database."""
+
+    def setUp(self):
+        super().setUp()
+        self.root = self.make_root()
+        (self.root / "data/demo").mkdir(parents=True)
+        self.colors = self.root / "data/demo/colors_data.yaml"
+        self.colors.write_text("data:\n  - {name: red}\n  - {name: blue}\n", encoding="utf-8")
+        (self.root / "data/demo/shapes_data.yaml").write_text("data:\n  - {name: circle}\n", encoding="utf-8")
+        self.processor = self.make_processor(self.root)
+        self.processor.bundle = self.root / "db/bundle.db"
+
+    def test_bundle_matches_manifest(self):
+        """Test if the bundle holds every dataset of the manifest with its schema and statistics."""
+        self.processor.process_all()
+        with sqlite3.connect(self.processor.bundle) as conn:
+            catalog = conn.execute("SELECT dataset, table_name, row_count, schema FROM catalog").fetchall()
+            self.assertEqual([row[:3] for row in catalog], [("demo/colors", "demo__colors", 2),
+                                                            ("demo/shapes", "demo__shapes", 1)])
+            self.assertEqual(json.loads(catalog[0][3])["table"], "colors")
+            self.assertEqual(conn.execute("SELECT name FROM demo__colors").fetchall(), [("red",), ("blue",)])
+            self.assertEqual(conn.execute("PRAGMA page_size").fetchone()[0], self.processor.bundle_page_size)
+            self.assertTrue(conn.execute("SELECT COUNT(*) FROM sqlite_stat1").fetchone()[0])
+
+    def test_rebuilt_only_on_change(self):
+        """Test if an unchanged run keeps the bundle and a changed file rebuilds it."""
+        self.processor.process_all()
+        built = self.processor.bundle.stat().st_mtime_ns
+        self.processor.process_all()
+        self.assertEqual(self.processor.bundle.stat().st_mtime_ns, built)
+        self.colors.write_text("data:\n  - {name: green}\n", encoding="utf-8")
+        self.processor.process_all()
+        with sqlite3.connect(self.processor.bundle) as conn:
+            self.assertEqual(conn.execute("SELECT name FROM demo__colors").fetchall(), [("green",)])
+
 # === Run Tests ===
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
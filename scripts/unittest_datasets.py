@@ -0,0 +1,263 @@
+# === unittest_datasets.py ===
+import json
+import unittest
+import sqlite3
+import tempfile
+from pathlib import Path
+from typing import Optional
+import numpy as np
+from api.bundle import attach, build_bundle
+from api.columnar import MAX_BINS, ColumnStore
+from api.datasets import DatasetCatalog, write_manifest
+from api.snapshot import snapshot_path, write_snapshot
+
+
+def make_dataset(db_dir: Path, name: str, rows: list, data_hash: str) -> dict:
+    """Write a one-column dataset and return its manifest entry."""
+    db_path = db_dir / f"{name}.db"
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(f"DROP TABLE IF EXISTS {name}")
+        conn.execute(f"CREATE TABLE {name} (code TEXT)")
+        conn.executemany(f"INSERT INTO {name} VALUES (?)", [(row,) for row in rows])
+    return {"dataset": f"demo/{name}", "table": name, "db_path": f"{name}.db",
+            "data_hash": data_hash, "schema_hash": "s", "row_count": len(rows)}
+
+
+class DatasetTest(unittest.TestCase):
+    """Base test class with a temporary 'db_dir', removed after each test."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.db_dir = Path(tmp.name)
+
+    def make_catalog(self, bundle: Optional[Path] = None) -> DatasetCatalog:
+        """A catalog of 'db_dir' whose datasets are closed after the test."""
+        catalog = DatasetCatalog(self.db_dir, bundle)
+
+        def close():
+            for dataset in catalog.datasets.values():
+                dataset.close()
+
+        self.addCleanup(close)
+        return catalog
+
+
+# === Test DatasetCatalog ===
+class TestDatasetCatalog(DatasetTest):
+    def setUp(self):
+        super().setUp()
+        write_manifest(self.db_dir, [make_dataset(self.db_dir, "colors", ["red"], "a")])
+        self.catalog = self.make_catalog()
+        self.catalog.reload()
+
+    def test_rows_cached_per_snapshot(self):
+        """Test if rows are read once and served from the snapshot afterwards."""
+        dataset = self.catalog.get("demo/colors")
+        self.assertEqual(dataset.rows(), [{"code": "red"}])
+        self.assertIs(dataset.rows(), dataset.rows())
+        self.assertIsNone(dataset.body)
+        self.assertEqual(dataset.serialize(), b'[{"code":"red"}]')
+        self.assertIs(dataset.serialize(), dataset.body)
+
+    def test_query(self):
+        """Test if lookups, filters and projections apply to the cached rows."""
+        write_manifest(self.db_dir, [make_dataset(self.db_dir, "colors", ["red", "green", "blue"], "b")])
+        self.catalog.reload()
+        dataset = self.catalog.get("demo/colors")
+        self.assertEqual(dataset.key_field, "code")
+        self.assertEqual(dataset.query(keys=["blue", "pink", "red"]), [{"code": "blue"}, {"code": "red"}])
+        self.assertEqual(dataset.query(filters={"code": ["green", "blue"]}, fields=["code"]),
+                         [{"code": "green"}, {"code": "blue"}])
+        with self.assertRaises(ValueError):
+            dataset.query(fields=["name"])
+
+    def test_reload_swaps_changed_dataset(self):
+        """Test if a changed dataset gets a new snapshot while the old one keeps its rows."""
+        old = self.catalog.get("demo/colors")
+        old.rows()
+        write_manifest(self.db_dir, [
+            make_dataset(self.db_dir, "colors", ["red", "green"], "b"),
+            make_dataset(self.db_dir, "shapes", ["circle"], "c"),
+        ])
+        self.assertTrue(self.catalog.manifest_changed())
+        changes = self.catalog.reload()
+        self.assertEqual(changes, {"added": ["demo/shapes"], "changed": ["demo/colors"], "removed": []})
+        self.assertEqual(len(self.catalog.get("demo/colors").rows()), 2)
+        self.assertEqual(old.rows(), [{"code": "red"}])  # in-flight readers finish on the old snapshot
+        self.assertTrue(old.pool.closed)
+
+    def test_reload_keeps_unchanged_dataset(self):
+        """Test if unchanged datasets keep their snapshot and removed ones are reported."""
+        dataset = self.catalog.get("demo/colors")
+        self.assertEqual(self.catalog.reload(), {"added": [], "changed": [], "removed": []})
+        self.assertIs(self.catalog.get("demo/colors"), dataset)
+        write_manifest(self.db_dir, [])
+        self.assertEqual(self.catalog.reload()["removed"], ["demo/colors"])
+        self.assertIsNone(self.catalog.get("demo/colors"))
+
+
+# === Test ColumnStore ===
+class TestColumnStore(DatasetTest):
+    def setUp(self):
+        super().setUp()
+        with sqlite3.connect(self.db_dir / "bodies.db") as conn:
+            conn.execute("CREATE TABLE bodies (name TEXT, kind TEXT, mass REAL, count INTEGER, position VEC)")
+            conn.executemany("INSERT INTO bodies VALUES (?, ?, ?, ?, ?)", [
+                (name, kind, mass, count, np.asarray(position, dtype=np.float64).tobytes())
+                for name, kind, mass, count, position in [
+                    ("a", "star", 2.0, 1, [0, 0, 0]), ("b", "planet", 1.0, None, [1, 2, 3]),
+                    ("c", "star", None, 3, [2, 4, 6]), ("d", "planet", 3.0, 4, [3, 6, 9]),
+                ]
+            ])
+        entry = {"dataset": "demo/bodies", "table": "bodies", "db_path": "bodies.db", "data_hash": "a",
+                 "schema_hash": "s", "row_count": 4,
+                 "fields": [{"name": "name", "type": "TEXT"}, {"name": "kind", "type": "TEXT"},
+                            {"name": "mass", "type": "REAL"}, {"name": "count", "type": "INTEGER"},
+                            {"name": "position", "type": "VEC", "type_params": [3]}]}
+        write_manifest(self.db_dir, [entry])
+        self.catalog = self.make_catalog()
+        self.catalog.reload()
+
+    def test_loaded_once_per_snapshot(self):
+        """Test if columns are typed, array fields stacked and the store kept for the snapshot."""
+        dataset = self.catalog.get("demo/bodies")
+        self.assertFalse(dataset.columns_cached)
+        store = dataset.column_store()
+        self.assertIs(dataset.column_store(), store)
+        self.assertEqual(store.columns["position"].shape, (4, 3))
+        self.assertEqual(store.columns["count"].dtype, np.int64)
+
+    def test_aggregate(self):
+        """Test if NULLs are skipped, array fields aggregate element-wise and groups are split by key."""
+        store = self.catalog.get("demo/bodies").column_store()
+        result = store.aggregate(["mass", "count", "position"], ["count", "min", "max", "mean", "std"])
+        self.assertEqual(result["rows"], 4)
+        self.assertEqual(result["aggregates"]["mass"]["count"], 3)
+        self.assertEqual(result["aggregates"]["mass"]["mean"], 2.0)
+        self.assertEqual(result["aggregates"]["count"]["min"], 1.0)
+        self.assertEqual(result["aggregates"]["position"]["max"], [3.0, 6.0, 9.0])
+        np.testing.assert_allclose(result["aggregates"]["position"]["std"], np.std([[0, 0, 0], [1, 2, 3], [2, 4, 6], [3, 6, 9]], axis=0))
+
+        grouped = store.aggregate(["mass", "position"], ["mean"], group_by="kind")
+        self.assertEqual([group["key"] for group in grouped["groups"]], ["planet", "star"])
+        self.assertEqual(grouped["groups"][0]["aggregates"]["position"]["mean"], [2.0, 4.0, 6.0])
+        self.assertEqual(grouped["groups"][1]["aggregates"]["mass"]["mean"], 2.0)
+
+        filtered = store.aggregate(["mass"], ["sum", "max"], filters={"count": None})
+        self.assertEqual(filtered, {"rows": 1, "aggregates": {"mass": {"sum": 1.0, "max": 1.0}}})
+        empty = store.aggregate(["mass"], ["count", "mean"], filters={"kind": "moon"})
+        self.assertEqual(empty["aggregates"]["mass"], {"count": 0, "mean": None})
+        with self.assertRaises(ValueError):
+            store.aggregate(["name"])
+        with self.assertRaises(ValueError):
+            store.aggregate(["mass"], ["median"])
+
+    def test_group_by_nullable_field(self):
+        """Test if NULLs of a REAL or INTEGER group field form one JSON-encodable group with the key None."""
+        store = self.catalog.get("demo/bodies").column_store()
+        by_mass = store.aggregate(["count"], ["count"], group_by="mass")
+        self.assertEqual([(group["key"], group["rows"]) for group in by_mass["groups"]],
+                         [(1.0, 1), (2.0, 1), (3.0, 1), (None, 1)])
+        json.dumps(by_mass, allow_nan=False)
+        by_count = store.aggregate(["mass"], ["count"], group_by="count")
+        self.assertEqual([group["key"] for group in by_count["groups"]], [1, 3, 4, None])
+        self.assertEqual(by_count["groups"][-1]["aggregates"]["mass"], {"count": 1})
+
+    def test_group_by_text_with_nulls(self):
+        """Test if NULL text values do not merge into the group of empty strings."""
+        store = ColumnStore({"g": np.array(["x", "", "", "x"]), "g.null": np.array([False, True, False, False]),
+                             "v": np.array([1.0, 2.0, 3.0, 4.0])})
+        groups = store.aggregate(["v"], ["sum"], group_by="g", filters={"v": [2.0, 3.0, 4.0]})["groups"]
+        self.assertEqual([(group["key"], group["aggregates"]["v"]["sum"]) for group in groups],
+                         [("", 3.0), ("x", 4.0), (None, 2.0)])
+
+    def test_histogram(self):
+        """Test if histograms count all elements of array fields."""
+        store = ColumnStore({"v": np.array([[0.0, 1.0], [2.0, 3.0]])})
+        self.assertEqual(store.histogram("v", bins=2), {"rows": 4, "edges": [0.0, 1.5, 3.0], "counts": [2, 2]})
+        for bins in (0, MAX_BINS + 1, 10 ** 9):
+            with self.assertRaises(ValueError, msg=bins):
+                store.histogram("v", bins=bins)
+
+
+# === Test Snapshot ===
+class TestSnapshot(DatasetTest):
+    def setUp(self):
+        super().setUp()
+        self.entry = make_dataset(self.db_dir, "colors", ["red", "green", "blue"], "a")
+
+    def load(self, meta: dict):
+        path = snapshot_path(self.db_dir / "colors.db", "colors")
+        with sqlite3.connect(self.db_dir / "colors.db") as conn:
+            write_snapshot(path, conn, "colors", meta)
+        write_manifest(self.db_dir, [{**self.entry, "snapshot_path": path.name}])
+        catalog = self.make_catalog()
+        catalog.reload()
+        return catalog.get("demo/colors")
+
+    def test_served_from_snapshot(self):
+        """Test if body, lookups and columns come from the mapped file without decoding all rows."""
+        dataset = self.load({"data_hash": "a", "schema_hash": "s", "row_count": 3})
+        self.assertIsNotNone(dataset.snapshot)
+        self.assertEqual(bytes(dataset.body), b'[{"code":"red"},{"code":"green"},{"code":"blue"}]')
+        self.assertEqual(dataset.query(keys=["blue", "pink", "red"]), [{"code": "blue"}, {"code": "red"}])
+        self.assertFalse(dataset.cached)
+        self.assertEqual(dataset.column_store().columns["code"].tolist(), ["red", "green", "blue"])
+        with self.assertRaises(ValueError):
+            dataset.query(keys=["red"], fields=["name"])
+        self.assertEqual(dataset.query(filters={"code": "green"}), [{"code": "green"}])
+
+    def test_outdated_snapshot_ignored(self):
+        """Test if a snapshot built from other hashes than the manifest's is not used."""
+        dataset = self.load({"data_hash": "old", "schema_hash": "s", "row_count": 3})
+        self.assertIsNone(dataset.snapshot)
+        self.assertEqual(len(dataset.rows()), 3)
+
+
+# === Test bundle ===
+class TestBundle(DatasetTest):
+    def setUp(self):
+        super().setUp()
+        self.entries = [make_dataset(self.db_dir, "colors", ["red", "green"], "a"),
+                        make_dataset(self.db_dir, "shapes", ["circle"], "b")]
+        with sqlite3.connect(self.db_dir / "colors.db") as conn:
+            conn.execute("CREATE INDEX idx_colors_code ON colors (code)")
+        self.bundle = build_bundle(self.db_dir / "bundle.db", self.db_dir, self.entries,
+                                   {"demo/colors": {"table": "colors"}}, page_size=8192)
+
+    def test_tables_indexes_and_statistics(self):
+        """Test if the bundle holds every table with its indexes, statistics, page size and catalog."""
+        with sqlite3.connect(self.bundle) as conn:
+            self.assertEqual(conn.execute("PRAGMA page_size").fetchone()[0], 8192)
+            self.assertEqual(conn.execute("SELECT code FROM demo__colors").fetchall(), [("red",), ("green",)])
+            self.assertEqual(conn.execute("PRAGMA index_list(demo__colors)").fetchall()[0][1], "idx_demo__colors_code")
+            self.assertIn(("demo__colors",), conn.execute("SELECT tbl FROM sqlite_stat1").fetchall())
+            self.assertEqual(conn.execute("SELECT dataset, source_table, schema FROM catalog").fetchall(),
+                             [("demo/colors", "colors", '{"table": "colors"}'), ("demo/shapes", "shapes", None)])
+
+    def test_attach_read_only(self):
+        """Test if the bundle can be attached to another connection but not written through it."""
+        conn = sqlite3.connect(":memory:", uri=True)
+        try:
+            attach(conn, self.bundle)
+            self.assertEqual(conn.execute("SELECT COUNT(*) FROM bundle.demo__shapes").fetchone()[0], 1)
+            with self.assertRaises(sqlite3.OperationalError):
+                conn.execute("DELETE FROM bundle.demo__shapes")
+        finally:
+            conn.close()
+
+    def test_served_from_bundle(self):
+        """Test if the catalog serves the datasets from the bundle without the per-dataset files."""
+        (self.db_dir / "colors.db").unlink()
+        catalog = self.make_catalog(self.bundle)
+        self.assertEqual(catalog.reload()["added"], ["demo/colors", "demo/shapes"])
+        dataset = catalog.get("demo/colors")
+        self.assertEqual(dataset.query(keys=["green"]), [{"code": "green"}])
+        self.assertEqual(dataset.entry["row_count"], 2)
+        self.assertEqual(catalog.reload(), {"added": [], "changed": [], "removed": []})
+
+
+# === Run Tests ===
+if __name__ == "__main__":
+    unittest.main()
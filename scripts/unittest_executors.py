@@ -0,0 +1,84 @@
+# === unittest_executors.py ===
+import asyncio
+import threading
+import unittest
+from api.executors import BoundedExecutor, ExecutorRegistry, Saturated, SingleFlight
+
+
+# === Test BoundedExecutor ===
+class TestBoundedExecutor(unittest.TestCase):
+    def test_rejects_when_saturated(self):
+        """Test if calls beyond workers + queue depth are rejected immediately."""
+        executor = BoundedExecutor("demo", workers=1, queue_depth=1)
+        release = threading.Event()
+
+        async def scenario():
+            running = [asyncio.create_task(executor.run(release.wait)) for _ in range(2)]
+            await asyncio.sleep(0.05)
+            with self.assertRaises(Saturated):
+                await executor.run(lambda: None)
+            release.set()
+            await asyncio.gather(*running)
+            return await executor.run(lambda: "done")
+
+        try:
+            self.assertEqual(asyncio.run(scenario()), "done")
+            self.assertEqual(executor.pending, 0)
+        finally:
+            executor.shutdown()
+
+
+# === Test ExecutorRegistry ===
+class TestExecutorRegistry(unittest.TestCase):
+    def test_limits_from_config(self):
+        """Test if per-dataset limits override the defaults."""
+        registry = ExecutorRegistry({"default": {"workers": 3}, "utilities/countries": {"queue_depth": 0}})
+        try:
+            self.assertEqual(registry.get("utilities/countries").limit, 3)
+            self.assertEqual(registry.get("utilities/languages").limit, 3 + 32)
+            self.assertIs(registry.get("utilities/languages"), registry.get("utilities/languages"))
+        finally:
+            registry.shutdown()
+
+
+# === Test SingleFlight ===
+class TestSingleFlight(unittest.TestCase):
+    def test_coalesces_concurrent_calls(self):
+        """Test if concurrent callers with the same key share one computation."""
+        flight = SingleFlight()
+        calls = []
+
+        async def compute(key):
+            calls.append(key)
+            await asyncio.sleep(0.01)
+            return key.upper()
+
+        async def scenario():
+            results = await asyncio.gather(
+                *[flight.run("a", lambda: compute("a")) for _ in range(50)], flight.run("b", lambda: compute("b"))
+            )
+            await asyncio.sleep(0)  # let the done callbacks run
+            return results
+
+        results = asyncio.run(scenario())
+        self.assertEqual(results, ["A"] * 50 + ["B"])
+        self.assertEqual(calls, ["a", "b"])
+        self.assertEqual(len(flight), 0)
+
+    def test_shares_exceptions(self):
+        """Test if a failing computation raises in every waiting caller."""
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise ValueError("boom")
+
+        async def scenario():
+            return await asyncio.gather(*[flight.run("k", fail) for _ in range(3)], return_exceptions=True)
+
+        self.assertTrue(all(isinstance(result, ValueError) for result in asyncio.run(scenario())))
+
+
+# === Run Tests ===
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+# === unittest_formulas.py ===
+import unittest
+import numpy as np
+from api.formulas import FormulaService, check_formula, compile_formula, formula_dimension
+from api.units import UnitRegistry, parse_dimension
+from scripts.unittest_units import PREFIXES, UNITS
+
+KINETIC_ENERGY = {
+    "key": "kinetic_energy",
+    "expression": "0.5 * m * v**2",
+    "result_unit": "J",
+    "variables": {"m": "kg", "v": "m/s"},
+}
+
+POWER = {
+    "key": "power",
+    "expression": "E / t",
+    "result_unit": "J/s",
+    "variables": {"E": "J", "t": "s"},
+}
+
+
+# === Test formula compilation ===
+class TestCompileFormula(unittest.TestCase):
+    def test_vectorized_evaluation(self):
+        """Test if a compiled formula evaluates element-wise over arrays."""
+        evaluate = compile_formula("0.5 * m * v**2", ("m", "v"))
+        result = evaluate({"m": np.array([1.0, 2.0]), "v": np.array([2.0, 3.0])})
+        np.testing.assert_allclose(result, [2.0, 9.0])
+
+    def test_compiled_once(self):
+        """Test if repeated compilation is served from the LRU cache."""
+        self.assertIs(compile_formula("a + b", ("a", "b")), compile_formula("a + b", ("a", "b")))
+
+    def test_rejects_unsafe_expressions(self):
+        """Test if anything beyond arithmetic and whitelisted functions is rejected."""
+        for expression in ("__import__('os')", "m.__class__", "(lambda: 1)()", "open('x')", "m if v else 1", "'a'"):
+            with self.assertRaises(ValueError, msg=expression):
+                compile_formula(expression, ("m", "v"))
+
+    def test_rejects_unknown_variables(self):
+        """Test if names that are not variables, functions or constants are rejected."""
+        with self.assertRaises(ValueError):
+            compile_formula("m * c", ("m",))
+
+
+# === Test dimensional analysis ===
+class TestFormulaDimension(unittest.TestCase):
+    def test_dimension_of_expression(self):
+        """Test if the result dimension is derived from the variables."""
+        dimensions = {"l": parse_dimension("L"), "g": parse_dimension("LT-2")}
+        self.assertEqual(formula_dimension("2 * pi * sqrt(l / g)", dimensions), parse_dimension("T"))
+
+    def test_incompatible_addition(self):
+        """Test if adding different dimensions raises a ValueError."""
+        dimensions = {"l": parse_dimension("L"), "t": parse_dimension("T")}
+        with self.assertRaises(ValueError):
+            formula_dimension("l + t", dimensions)
+
+    def test_function_needs_dimensionless_argument(self):
+        """Test if transcendental functions reject dimensioned arguments."""
+        with self.assertRaises(ValueError):
+            formula_dimension("sin(l)", {"l": parse_dimension("L")})
+
+
+# === Test FormulaService ===
+class TestFormulaService(unittest.TestCase):
+    def setUp(self):
+        self.registry = UnitRegistry(PREFIXES, UNITS)
+        self.service = FormulaService([KINETIC_ENERGY], self.registry)
+
+    def test_check_formula(self):
+        """Test if a consistent formula passes and a wrong result unit fails."""
+        self.assertIsNone(check_formula(KINETIC_ENERGY, self.registry))
+        with self.assertRaises(ValueError):
+            check_formula(dict(KINETIC_ENERGY, result_unit="N"), self.registry)
+
+    def test_evaluate_with_unit_conversion(self):
+        """Test if input and result units are converted once per batch."""
+        result = self.service.evaluate(
+            "kinetic_energy", {"m": [1000, 2000], "v": 1}, units={"m": "g", "v": "km/s"}, result_unit="kJ"
+        )
+        self.assertEqual(result["unit"], "kJ")
+        np.testing.assert_allclose(result["result"], [500.0, 1000.0])
+
+    def test_evaluate_incompatible_unit(self):
+        """Test if inputs in units of another dimension are rejected."""
+        with self.assertRaises(ValueError):
+            self.service.evaluate("kinetic_energy", {"m": 1, "v": 1}, units={"v": "s"})
+
+    def test_evaluate_non_numeric_input(self):
+        """Test if inputs that are not numbers raise a ValueError instead of a TypeError."""
+        for value in ({"a": 1}, "abc", None):
+            with self.assertRaises(ValueError, msg=repr(value)):
+                self.service.evaluate("kinetic_energy", {"m": value, "v": 1})
+
+    def test_evaluate_division_by_zero(self):
+        """Test if a non-finite result raises a ValueError, as JSON cannot encode it."""
+        service = FormulaService([POWER], self.registry)
+        np.testing.assert_allclose(service.evaluate("power", {"E": 10, "t": 2})["result"], 5.0)
+        with self.assertRaises(ValueError):
+            service.evaluate("power", {"E": [10, 10], "t": [2, 0]})
+
+
+# === Run Tests ===
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+# === unittest_metrics.py ===
+import unittest
+from api.metrics import MetricsRegistry
+
+
+# === Test metrics exposition ===
+class TestMetrics(unittest.TestCase):
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_histogram_buckets_are_cumulative(self):
+        """Test if histogram buckets, sum and count render in Prometheus text format."""
+        histogram = self.registry.histogram("latency_seconds", "Latency", ("dataset",), buckets=(0.1, 1.0))
+        child = histogram.labels("demo")
+        self.assertIs(child, histogram.labels("demo"))  # children are created once
+        for value in (0.05, 0.5, 5.0):
+            child.observe(value)
+        text = self.registry.render()
+        self.assertIn('latency_seconds_bucket{dataset="demo",le="0.1"} 1', text)
+        self.assertIn('latency_seconds_bucket{dataset="demo",le="1.0"} 2', text)
+        self.assertIn('latency_seconds_bucket{dataset="demo",le="+Inf"} 3', text)
+        self.assertIn('latency_seconds_sum{dataset="demo"} 5.55', text)
+        self.assertIn('latency_seconds_count{dataset="demo"} 3', text)
+        self.assertIn("# TYPE latency_seconds histogram", text)
+
+    def test_counter_and_gauge(self):
+        """Test if counters, gauges and escaped label values render."""
+        counter = self.registry.counter("requests_total", "Requests", ("dataset",))
+        gauge = self.registry.gauge("in_flight", "In flight")
+        counter.labels('a"b').inc(3)
+        gauge.labels().inc()
+        gauge.labels().dec()
+        text = self.registry.render()
+        self.assertIn('requests_total{dataset="a\\"b"} 3', text)
+        self.assertIn("in_flight 0", text)
+
+
+# === Run Tests ===
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+# === unittest_search.py ===
+import unittest
+import sqlite3
+import tempfile
+from pathlib import Path
+from api.search import SEARCH_DB, SearchIndex, create_tables, tokenizers_for
+
+ENTRIES = [
+    ("physics/units/prefixes", "k", "name_en", "kilo"),
+    ("physics/units/base_SI_units", "kg", "name_en", "kilogram"),
+    ("utilities/languages", "fr", "name_native", "Français"),
+    ("utilities/languages", "zh", "name_native", "中文"),
+    ("utilities/translations", "DATABASE_ERROR", "zh", "数据错误"),
+]
+
+
+# === Test SearchIndex ===
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        db_dir = Path(self.tmp.name)
+        tables = tokenizers_for([{"code": "en", "script": "Latn"}, {"code": "zh", "script": "Hans"}])
+        with sqlite3.connect(db_dir / SEARCH_DB) as conn:
+            create_tables(conn, tables)
+            for table in tables:
+                conn.executemany(f"INSERT INTO {table} (dataset, key, field, text) VALUES (?, ?, ?, ?)", ENTRIES)
+        self.index = SearchIndex(db_dir)
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp.cleanup()
+
+    def test_tokenizers_from_languages(self):
+        """Test if the trigram index is only built for languages written without spaces."""
+        self.assertNotIn("search_trigram", tokenizers_for([{"code": "de", "script": "Latn"}]))
+        self.assertIn("search_trigram", tokenizers_for([{"code": "zh", "script": "Hans"}]))
+
+    def test_whole_word_ranks_first(self):
+        """Test if an exact word match ranks above prefix matches."""
+        hits = self.index.search("kilo")
+        self.assertEqual([(h["dataset"], h["key"]) for h in hits],
+                         [("physics/units/prefixes", "k"), ("physics/units/base_SI_units", "kg")])
+
+    def test_diacritics_and_cjk(self):
+        """Test if diacritics are folded and CJK text is found by substring."""
+        self.assertEqual(self.index.search("francais")[0]["key"], "fr")
+        self.assertEqual(self.index.search("中文")[0]["key"], "zh")
+        self.assertEqual(self.index.search("数据错")[0]["key"], "DATABASE_ERROR")
+
+    def test_dataset_filter_and_quotes(self):
+        """Test if hits can be limited to a dataset and quotes cannot break the query."""
+        self.assertEqual(self.index.search("kilo", dataset="physics/units/base_SI_units")[0]["key"], "kg")
+        self.assertEqual(self.index.search('ki"lo'), [])
+
+
+# === Run Tests ===
+if __name__ == "__main__":
+    unittest.main()
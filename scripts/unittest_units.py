@@ -0,0 +1,246 @@
+# === unittest_units.py ===
+import unittest
+from fractions import Fraction
+from pathlib import Path
+import numpy as np
+import yaml
+from api.quantity import QuantityCalculator
+from api.rendering import UnitRenderer
+from api.units import DimensionIndex, UnitRegistry, exact_factor, format_dimension, parse_dimension
+
+PREFIXES = [
+    {"symbol": "Q", "name_en": "quetta", "base": 10, "exponent": 30},
+    {"symbol": "k", "name_en": "kilo", "base": 10, "exponent": 3},
+    {"symbol": "da", "name_en": "deca", "base": 10, "exponent": 1},
+    {"symbol": "d", "name_en": "deci", "base": 10, "exponent": -1},
+    {"symbol": "m", "name_en": "milli", "base": 10, "exponent": -3},
+    {"symbol": "µ", "name_en": "micro", "base": 10, "exponent": -6},
+    {"symbol": "Gi", "name_en": "gibi", "base": 2, "exponent": 30},
+    {"symbol": "", "name_en": "", "base": 10, "exponent": 0},
+]
+
+UNITS = [
+    {"symbol": "m", "name_en": "metre", "dimension": "L",
+     "latex": "\\mathrm{m}", "mathml": "<mi>m</mi>", "markdown": "$m$"},
+    {"symbol": "kg", "name_en": "kilogram", "dimension": "M"},
+    {"symbol": "s", "name_en": "second", "dimension": "T"},
+    {"symbol": "mol", "name_en": "mole", "dimension": "N"},
+    {"symbol": "N", "name_en": "newton", "dimension": "MLT-2"},
+    {"symbol": "J", "name_en": "joule", "dimension": "ML2T-2"},
+    {"symbol": "K", "name_en": "kelvin", "dimension": "Θ"},
+    {"symbol": "Ω", "name_en": "ohm", "dimension": "ML2T-3I-2",
+     "latex": "\\Omega", "mathml": "<mi mathvariant=\"normal\">Ω</mi>", "markdown": "$\\Omega$"},
+]
+
+
+# === Test UnitRegistry ===
+class TestUnitRegistry(unittest.TestCase):
+    def setUp(self):
+        self.registry = UnitRegistry(PREFIXES, UNITS)
+
+    def test_resolve_prefixed_unit(self):
+        """Test if 'resolve' finds prefixed units in the precomputed table."""
+        entry = self.registry.resolve("km")
+        self.assertEqual((entry["unit"], entry["exponent"]), ("m", 3))
+        self.assertEqual(self.registry.resolve("µs")["exponent"], -6)
+        self.assertEqual(self.registry.resolve("us"), self.registry.resolve("µs"))
+
+    def test_ambiguous_metre_and_milli(self):
+        """Test if 'm' is metre while 'mm' is millimetre."""
+        self.assertEqual(self.registry.resolve("m")["prefix"], "")
+        self.assertEqual(self.registry.resolve("mm")["prefix"], "m")
+        self.assertEqual(self.registry.resolve("mol")["unit"], "mol")
+
+    def test_longest_match(self):
+        """Test if 'dam' splits into deca + metre, not deci + 'am'."""
+        prefix, unit = self.registry.split("dam")
+        self.assertEqual((prefix["symbol"], unit["symbol"]), ("da", "m"))
+
+    def test_bare_prefix(self):
+        """Test if a bare binary prefix is parsed with its exact factor."""
+        entry = self.registry.parse("Gi")
+        self.assertIsNone(entry["unit"])
+        self.assertEqual(exact_factor(entry), 2 ** 30)
+
+    def test_kilogram_stem(self):
+        """Test if prefixes of the kilogram are built on the gram."""
+        self.assertEqual(self.registry.resolve("kg")["exponent"], 0)
+        self.assertEqual(exact_factor(self.registry.resolve("mg")), Fraction(1, 10 ** 6))
+        self.assertIsNone(self.registry.resolve("mkg"))
+
+    def test_exact_large_factor(self):
+        """Test if quetta factors are kept exact."""
+        self.assertEqual(exact_factor(self.registry.resolve("Qm")), 10 ** 30)
+
+    def test_parse_expression(self):
+        """Test if compound units combine factors and dimensions."""
+        expression = self.registry.parse_expression("kN·m/s²")
+        self.assertEqual(expression.factor, 1000)
+        self.assertEqual(expression.dimension, parse_dimension("ML2T-4"))
+        self.assertEqual(self.registry.parse_expression("J/(kg*K)").dimension, parse_dimension("L2T-2Θ-1"))
+        self.assertEqual(self.registry.parse_expression("m s^-1").dimension, parse_dimension("LT-1"))
+        with self.assertRaises(ValueError):
+            self.registry.parse_expression("m/")
+
+    def test_unknown_unit(self):
+        """Test if unknown symbols resolve to None."""
+        self.assertIsNone(self.registry.parse("xyz"))
+
+
+# === Test UnitRegistry on the unit data ===
+class TestUnitData(unittest.TestCase):
+    def setUp(self):
+        units_dir = Path(__file__).resolve().parent.parent / "data" / "physics" / "units"
+
+        def load(name):
+            with open(units_dir / f"{name}_data.yaml", "r", encoding="utf-8") as f:
+                return yaml.safe_load(f)["data"]
+
+        units = load("base_SI_units") + load("derived_SI_units") + load("information_units")
+        registry = UnitRegistry(load("prefixes"), units)
+        self.registry = registry
+        self.calculator = QuantityCalculator(registry, DimensionIndex(DimensionIndex.build_rows(registry)))
+
+    def test_binary_prefixed_information_units(self):
+        """Test if binary prefixes combine with the byte from the data, but not with other units."""
+        self.assertEqual(exact_factor(self.registry.resolve("KiB")), 1024)
+        self.assertEqual(exact_factor(self.registry.resolve("Mio")), 2 ** 20)
+        self.assertEqual(exact_factor(self.registry.resolve("kB")), 1000)
+        self.assertIsNone(self.registry.resolve("Kim"))
+
+    def test_information_dimension(self):
+        """Test if bytes only add to and convert into units of information, not pure numbers."""
+        converted = self.calculator.evaluate("add", [{"magnitude": 1, "unit": "KiB"}, {"magnitude": 24, "unit": "o"}],
+                                             unit="kB")
+        np.testing.assert_allclose(converted.magnitude, 1.048)
+        with self.assertRaises(ValueError):
+            self.calculator.evaluate("add", [{"magnitude": 1, "unit": "kB"}, {"magnitude": 1, "unit": "1"}])
+        with self.assertRaises(ValueError):
+            self.calculator.evaluate("mul", [{"magnitude": 1, "unit": "kB"}, {"magnitude": 1, "unit": "1"}], unit="1")
+        rate = self.calculator.evaluate("div", [{"magnitude": 3, "unit": "MiB"}, {"magnitude": 1, "unit": "s"}])
+        self.assertEqual((rate.unit.text, rate.unit.to_dict()["dimension"]), ("B/s", "T-1D"))
+        ratio = self.calculator.evaluate("div", [{"magnitude": 1, "unit": "m"}, {"magnitude": 2, "unit": "km"}])
+        self.assertEqual(ratio.unit.text, "1")
+
+
+# === Test dimension parsing and index ===
+class TestDimensionIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = DimensionIndex(DimensionIndex.build_rows(UnitRegistry(PREFIXES, UNITS)))
+
+    def test_parse_dimension_notations(self):
+        """Test if different notations normalize to the same vector."""
+        expected = parse_dimension("ML2T-2")
+        self.assertEqual(parse_dimension("L^2 M T^-2"), expected)
+        self.assertEqual(parse_dimension("M·L²·T⁻²"), expected)
+        self.assertEqual(format_dimension(expected), "ML2T-2")
+        self.assertEqual(format_dimension(parse_dimension("θ")), "Θ")
+        self.assertEqual(format_dimension(parse_dimension("1")), "1")
+
+    def test_parse_dimension_invalid(self):
+        """Test if unknown dimension symbols raise a ValueError."""
+        with self.assertRaises(ValueError):
+            parse_dimension("MX2")
+
+    def test_exact_lookup(self):
+        """Test if an exact lookup only returns coherent units."""
+        key, units = self.index.lookup("L2MT-2")
+        self.assertEqual(key, "ML2T-2")
+        self.assertEqual([u["symbol"] for u in units], ["J"])
+
+    def test_compatible_lookup(self):
+        """Test if a compatible lookup includes prefixed units."""
+        _, units = self.index.lookup("L", compatible=True)
+        symbols = {u["symbol"] for u in units}
+        self.assertTrue({"m", "km", "mm", "dam"} <= symbols)
+        self.assertNotIn("um", symbols)  # aliases are not listed twice
+
+
+# === Test UnitRenderer ===
+class TestUnitRenderer(unittest.TestCase):
+    def setUp(self):
+        registry = UnitRegistry(PREFIXES, UNITS)
+        self.renderer = UnitRenderer(registry, {row.pop("symbol"): row for row in UnitRenderer(registry).build_rows()})
+
+    def test_prerendered_prefixed_unit(self):
+        """Test if prefixed units are pre-rendered, including aliases."""
+        self.assertEqual(self.renderer.prerendered["km"]["latex"], "\\mathrm{km}")
+        self.assertEqual(self.renderer.prerendered["us"]["latex"], "\\mathrm{\\mu s}")
+        self.assertEqual(self.renderer.render("m"), {"latex": "\\mathrm{m}", "mathml": "<mi>m</mi>", "markdown": "$m$"})
+
+    def test_prefix_composed_with_unit_snippets(self):
+        """Test if a prefixed unit prepends the prefix to its base unit's stored snippets."""
+        self.assertEqual(self.renderer.prerendered["µΩ"], {
+            "latex": "\\mathrm{\\mu}\\Omega",
+            "mathml": "<mrow><mi>µ</mi><mi mathvariant=\"normal\">Ω</mi></mrow>",
+            "markdown": "$µ\\Omega$",
+        })
+        self.assertEqual(self.renderer.render("kΩ/m")["latex"], "\\frac{\\mathrm{k}\\Omega}{\\mathrm{m}}")
+        self.assertEqual(self.renderer.prerendered["km"]["mathml"], "<mi>km</mi>")
+        self.assertEqual(self.renderer.prerendered["mg"]["latex"], "\\mathrm{mg}")  # gram stem, not m + kg
+
+    def test_render_compound_unit(self):
+        """Test if compound units are composed into a fraction."""
+        rendered = self.renderer.render("kN·m/s²")
+        self.assertEqual(rendered["latex"], "\\frac{\\mathrm{kN} \\cdot \\mathrm{m}}{\\mathrm{s}^{2}}")
+        self.assertEqual(rendered["markdown"], "$kN \\cdot m / s^{2}$")
+        self.assertTrue(rendered["mathml"].startswith("<mfrac>"))
+
+    def test_render_cached(self):
+        """Test if repeated renderings are cache hits."""
+        self.renderer.render("J/(kg·K)")
+        self.renderer.render("J/(kg·K)")
+        self.assertGreaterEqual(self.renderer.render.cache_info().hits, 1)
+
+
+# === Test QuantityCalculator ===
+class TestQuantityCalculator(unittest.TestCase):
+    def setUp(self):
+        registry = UnitRegistry(PREFIXES, UNITS)
+        self.calculator = QuantityCalculator(registry, DimensionIndex(DimensionIndex.build_rows(registry)))
+
+    def test_multiply_simplifies_to_named_unit(self):
+        """Test if N·m is simplified to J and prefixes are applied once."""
+        result = self.calculator.evaluate("mul", [{"magnitude": [1, 2], "unit": "kN"}, {"magnitude": 3, "unit": "m"}])
+        self.assertEqual(result.unit.text, "J")
+        np.testing.assert_allclose(result.magnitude, [3000.0, 6000.0])
+
+    def test_divide_falls_back_to_base_units(self):
+        """Test if a dimension without a named unit is expressed in base units."""
+        result = self.calculator.quantity([10.0], "km") / self.calculator.quantity([2.0], "s")
+        self.assertEqual(result.unit.text, "m/s")
+        np.testing.assert_allclose(result.magnitude, [5000.0])
+
+    def test_add_with_result_unit(self):
+        """Test if compatible units are added and converted to the requested unit."""
+        operands = [{"magnitude": [1, 2], "unit": "km"}, {"magnitude": [500, 10], "unit": "m"}]
+        result = self.calculator.evaluate("add", operands, unit="km")
+        np.testing.assert_allclose(result.magnitude, [1.5, 2.01])
+
+    def test_add_incompatible_dimensions(self):
+        """Test if adding quantities of different dimensions raises a ValueError."""
+        with self.assertRaises(ValueError):
+            self.calculator.evaluate("add", [{"magnitude": 1, "unit": "m"}, {"magnitude": 1, "unit": "s"}])
+
+    def test_non_numeric_magnitude(self):
+        """Test if magnitudes that are not numbers raise a ValueError instead of a TypeError."""
+        for magnitude in ({"a": 1}, "abc", None, [1, [2, 3]]):
+            with self.assertRaises(ValueError, msg=repr(magnitude)):
+                self.calculator.evaluate("mul", [{"magnitude": magnitude, "unit": "m"}, {"magnitude": 1, "unit": "s"}])
+
+    def test_division_by_zero(self):
+        """Test if a non-finite result raises a ValueError, as JSON cannot encode it."""
+        with self.assertRaises(ValueError):
+            self.calculator.evaluate("div", [{"magnitude": [1, 2], "unit": "m"}, {"magnitude": [1, 0], "unit": "s"}])
+
+    def test_unit_power_limit(self):
+        """Test if unit powers beyond MAX_UNIT_POWER are rejected before the factor is computed."""
+        self.assertEqual(self.calculator.quantity(1, "km^12").unit.factor, 10 ** 36)
+        for unit in ("m^99999999999999999999", "km^-13", "(km^6)^3"):
+            with self.assertRaises(ValueError, msg=unit):
+                self.calculator.quantity(1, unit)
+
+
+# === Run Tests ===
+if __name__ == "__main__":
+    unittest.main()